@@ -33,6 +33,9 @@ from .policyrep import SELinuxPolicy, BoundsRuletype, ConstraintRuletype, Defaul
                        DefaultRangeValue, DefaultValue, FSUseRuletype, HandleUnknown, MLSRuletype, \
                        NodeconIPVersion, PolicyTarget, PortconProtocol, RBACRuletype, TERuletype
 
+# Concurrent policy loading
+from .loader import load_policies
+
 # Exceptions
 from . import exception
 
@@ -53,6 +56,9 @@ from .mlsrulequery import MLSRuleQuery
 from .rbacrulequery import RBACRuleQuery
 from .terulequery import TERuleQuery
 
+# Running many queries in one pass
+from .multiquery import run_queries
+
 # Constraint queries
 from .constraintquery import ConstraintQuery
 
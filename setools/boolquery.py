@@ -17,10 +17,11 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor
 from .mixins import MatchName
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate
 
 
 class BoolQuery(MatchName, PolicyQuery):
@@ -61,11 +62,16 @@ class BoolQuery(MatchName, PolicyQuery):
         self._match_name_debug(self.log)
         self.log.debug("Default: {0.default}".format(self))
 
-        for boolean in self.policy.bools():
-            if not self._match_name(boolean):
-                continue
+        yield from self.plan().results()
 
-            if self.default is not None and boolean.state != self.default:
-                continue
+    def _candidates(self):
+        return self.policy.bools()
 
-            yield boolean
+    def _predicates(self):
+        predicates = self._match_name_predicates()
+
+        default = self.default
+        if default is not None:
+            predicates.append(equal_predicate(attrgetter("state"), default))
+
+        return predicates
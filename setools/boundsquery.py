@@ -18,11 +18,11 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .policyrep import BoundsRuletype
-from .query import PolicyQuery
-from .util import match_regex
+from .query import PolicyQuery, member_predicate, regex_predicate
 
 
 class BoundsQuery(PolicyQuery):
@@ -54,20 +54,22 @@ class BoundsQuery(PolicyQuery):
         self.log.debug("Parent: {0.parent!r}, regex: {0.parent_regex}".format(self))
         self.log.debug("Child: {0.child!r}, regex: {0.child_regex}".format(self))
 
-        for b in self.policy.bounds():
-            if self.ruletype and b.ruletype not in self.ruletype:
-                continue
+        yield from self.plan().results()
 
-            if self.parent and not match_regex(
-                    b.parent,
-                    self.parent,
-                    self.parent_regex):
-                continue
+    def _candidates(self):
+        return self.policy.bounds()
 
-            if self.child and not match_regex(
-                    b.child,
-                    self.child,
-                    self.child_regex):
-                continue
+    def _predicates(self):
+        predicates = []
 
-            yield b
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
+
+        if self.parent:
+            predicates.append(regex_predicate(attrgetter("parent"), self.parent,
+                                              self.parent_regex))
+
+        if self.child:
+            predicates.append(regex_predicate(attrgetter("child"), self.child, self.child_regex))
+
+        return predicates
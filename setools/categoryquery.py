@@ -49,11 +49,10 @@ class CategoryQuery(MatchAlias, MatchName, PolicyQuery):
         self._match_name_debug(self.log)
         self._match_alias_debug(self.log)
 
-        for cat in self.policy.categories():
-            if not self._match_name(cat):
-                continue
+        yield from self.plan().results()
 
-            if not self._match_alias(cat):
-                continue
+    def _candidates(self):
+        return self.policy.categories()
 
-            yield cat
+    def _predicates(self):
+        return self._match_name_predicates() + self._match_alias_predicates()
@@ -54,11 +54,10 @@ class CommonQuery(MatchPermission, MatchName, PolicyQuery):
         self._match_name_debug(self.log)
         self._match_perms_debug(self.log)
 
-        for com in self.policy.commons():
-            if not self._match_name(com):
-                continue
+        yield from self.plan().results()
 
-            if not self._match_perms(com):
-                continue
+    def _candidates(self):
+        return self.policy.commons()
 
-            yield com
+    def _predicates(self):
+        return self._match_name_predicates() + self._match_perms_predicates()
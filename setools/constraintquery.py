@@ -18,13 +18,16 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .mixins import MatchObjClass, MatchPermission
 from .policyrep import ConstraintRuletype
+from .policyrep.libpolicyrep import BaseType
 from .policyrep.exception import ConstraintUseError
-from .query import PolicyQuery
-from .util import match_in_set
+from .query import PolicyQuery, guard_predicate, in_set_predicate, indirect_selectivity, \
+    member_predicate
+from .util import type_set_union
 
 
 class ConstraintQuery(MatchObjClass, MatchPermission, PolicyQuery):
@@ -79,27 +82,6 @@ class ConstraintQuery(MatchObjClass, MatchPermission, PolicyQuery):
         super(ConstraintQuery, self).__init__(policy, **kwargs)
         self.log = logging.getLogger(__name__)
 
-    def _match_expr(self, expr, criteria, indirect, regex):
-        """
-        Match roles/types/users in a constraint expression,
-        optionally by expanding the contents of attributes.
-
-        Parameters:
-        expr        The expression to match.
-        criteria    The criteria to match.
-        indirect    If attributes in the expression should be expanded.
-        regex       If regular expression matching should be used.
-        """
-
-        if indirect:
-            obj = set()
-            for item in expr:
-                obj.update(item.expand())
-        else:
-            obj = expr
-
-        return match_in_set(obj, criteria, regex)
-
     def results(self):
         """Generator which yields all matching constraints rules."""
         self.log.info("Generating constraint results from {0.policy}".format(self))
@@ -110,39 +92,48 @@ class ConstraintQuery(MatchObjClass, MatchPermission, PolicyQuery):
         self.log.debug("Role: {0.role!r}, regex: {0.role_regex}".format(self))
         self.log.debug("Type: {0.type_!r}, regex: {0.type_regex}".format(self))
 
-        for c in self.policy.constraints():
-            if self.ruletype:
-                if c.ruletype not in self.ruletype:
-                    continue
-
-            if not self._match_object_class(c):
-                continue
-
-            try:
-                if not self._match_perms(c):
-                    continue
-            except ConstraintUseError:
-                    continue
-
-            if self.role and not self._match_expr(
-                        c.roles,
-                        self.role,
-                        self.role_indirect,
-                        self.role_regex):
-                    continue
-
-            if self.type_ and not self._match_expr(
-                        c.types,
-                        self.type_,
-                        self.type_indirect,
-                        self.type_regex):
-                    continue
-
-            if self.user and not self._match_expr(
-                        c.users,
-                        self.user,
-                        False,
-                        self.user_regex):
-                    continue
-
-            yield c
+        yield from self.plan().results()
+
+    def _candidates(self):
+        return self.policy.constraints()
+
+    def _predicates(self):
+        # validatetrans statements do not have permissions
+        predicates = self._match_object_class_predicates() + \
+            [guard_predicate(p, ConstraintUseError)
+             for p in self._match_perms_predicates(by_class=True, vector=True)]
+
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
+
+        if self.role:
+            predicates.append(self._expr_predicate(attrgetter("roles"), self.role,
+                                                   self.role_indirect, self.role_regex))
+
+        if self.type_:
+            predicates.append(self._expr_predicate(attrgetter("types"), self.type_,
+                                                   self.type_indirect, self.type_regex))
+
+        if self.user:
+            predicates.append(self._expr_predicate(attrgetter("users"), self.user, False,
+                                                   self.user_regex))
+
+        return predicates
+
+    @staticmethod
+    def _expr_predicate(getter, criteria, indirect, regex):
+        """Get the query plan predicate of _match_expr()."""
+        if indirect and not regex and isinstance(criteria, BaseType):
+            # match on the precomputed member type bitsets
+            return indirect_selectivity, lambda c: criteria in type_set_union(getter(c))
+        elif indirect:
+            def expand(c):
+                obj = set()
+                for item in getter(c):
+                    obj.update(item.expand())
+
+                return obj
+
+            return in_set_predicate(expand, criteria, regex)
+        else:
+            return in_set_predicate(getter, criteria, regex)
@@ -0,0 +1,470 @@
+# Copyright 2018, Chris PeBenito <pebenito@ieee.org>
+#
+# This file is part of SETools.
+#
+# SETools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1 of
+# the License, or (at your option) any later version.
+#
+# SETools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with SETools.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+import copy
+from array import array
+from bisect import bisect_left
+
+import networkx as nx
+from networkx.exception import NetworkXError, NetworkXNoPath, NodeNotFound
+
+# subgraph_view is imported by the analyses from here, so
+# the NetworkX version fallback is in one place.
+try:
+    from networkx import subgraph_view
+except ImportError:  # pragma: no cover
+    # NetworkX < 2.2
+    from networkx.graphviews import SubDiGraph as subgraph_view
+
+__all__ = ['CSRGraph']
+
+# Graph backends for the analyses
+graph_backends = frozenset(["networkx", "csr"])
+
+
+class CSRGraph:
+
+    """
+    A compact directed graph in compressed sparse row (CSR) form.
+
+    The nodes are numbered by their position in the node list and the
+    edges are numbered by their position in the edge list.  The
+    adjacency is stored in integer arrays, both by source (out edges)
+    and by target (in edges).  The structure is not modified after
+    construction.  Instead, views of the graph mask excluded nodes and
+    edges, and can traverse the graph in reverse.
+
+    Subclasses provide the edge attributes by implementing edge_attrs()
+    and can mask edges by implementing _edge_ok().
+
+    The subset of the NetworkX DiGraph interface used by the analyses
+    is implemented, so the analysis Edge classes work on either graph.
+
+    Parameters:
+    nodes       A sequence of node objects.
+    edges       A sequence of (source, target) node number pairs.
+
+    Keyword Parameters:
+    name        The name of the graph.
+    """
+
+    # the names of the arrays of the graph structure
+    structure_arrays = ("succ_ptr", "succ", "succ_edge", "pred_ptr", "pred", "pred_edge")
+
+    def __init__(self, nodes, edges, name=""):
+        count = len(nodes)
+        succ = self._csr(count, [(s, t, e) for e, (s, t) in enumerate(edges)])
+        pred = self._csr(count, [(t, s, e) for e, (s, t) in enumerate(edges)])
+        self._init_structure(nodes, dict(zip(self.structure_arrays, succ + pred)), name)
+
+    @classmethod
+    def from_arrays(cls, nodes, arrays, name=""):
+        """
+        Create a graph from its structure arrays, e.g. from a
+        previous graph's arrays().  Subclasses must initialize
+        their own attributes.
+
+        Parameters:
+        nodes       A sequence of node objects.
+        arrays      A dictionary of structure array name to the
+                    array (or memoryview).
+        """
+        g = cls.__new__(cls)
+        g._init_structure(nodes, arrays, name)
+        return g
+
+    def __contains__(self, node):
+        return self.has_node(node)
+
+    def __getitem__(self, node):
+        """The adjacency of a node, for G[source][target] edge attribute access."""
+        return CSRAdjacency(self, node)
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __str__(self):
+        return self.name
+
+    def arrays(self):
+        """Get the graph structure arrays, as a dictionary of array name to array."""
+        return dict((name, getattr(self, "_" + name)) for name in self.structure_arrays)
+
+    @property
+    def edges(self):
+        """The edge view of the graph.  G.edges[source, target] gets the edge attributes."""
+        return CSREdgeView(self)
+
+    def edge_attrs(self, edge):
+        """
+        Get the attributes of an edge.
+
+        Parameter:
+        edge    The edge number.
+
+        Return: dict
+        """
+        return {}
+
+    def has_edge(self, source, target):
+        return self._edge_id(source, target) is not None
+
+    def has_node(self, node):
+        return self._node_id(node) is not None
+
+    def in_edges(self, nbunch=None):
+        """List the (source, target) in edges of a node or all edges."""
+        return self._edges(nbunch, False)
+
+    def info(self):
+        """Get the graph statistics."""
+        return "Name: {0}\nType: {1}\nNumber of nodes: {2}\nNumber of edges: {3}".format(
+            self.name, type(self).__name__, self.number_of_nodes(), self.number_of_edges())
+
+    def nodes(self):
+        """List the nodes in the view."""
+        return [n for i, n in enumerate(self._nodes) if not self.node_mask[i]]
+
+    def number_of_edges(self):
+        return sum(1 for u in range(len(self._nodes)) if not self.node_mask[u]
+                   for _ in self._successors(u))
+
+    def number_of_nodes(self):
+        return len(self._nodes) - sum(self.node_mask)
+
+    def out_edges(self, nbunch=None):
+        """List the (source, target) out edges of a node or all edges."""
+        return self._edges(nbunch, True)
+
+    def view(self, exclude=None, reverse=False):
+        """
+        Create a view of the graph.  The view shares the graph's
+        structure, so creating it does not copy the graph.
+
+        Keyword Parameters:
+        exclude     The nodes excluded from the view.
+        reverse     (T/F) reverse the direction of the edges.
+
+        Return: A view of the same class as the graph.
+        """
+        v = copy.copy(self)
+        v.node_mask = bytearray(len(self._nodes))
+        v.reverse = bool(reverse)
+
+        for node in exclude or ():
+            node_id = self._node_index.get(node)
+            if node_id is not None:
+                v.node_mask[node_id] = 1
+
+        return v
+
+    #
+    # Path algorithms.  These have the same behavior
+    # as the NetworkX functions of the same names.
+    #
+    def all_shortest_paths(self, source, target):
+        """Generator which yields all shortest paths from source to target."""
+        s = self._require_node(source)
+        t = self._require_node(target)
+
+        # breadth-first search, keeping all of the
+        # predecessors of each node on a shortest path
+        level = {s: 0}
+        preds = {s: []}
+        frontier = [s]
+        while frontier and t not in level:
+            next_frontier = []
+            for u in frontier:
+                for v, _ in self._successors(u):
+                    if v not in level:
+                        level[v] = level[u] + 1
+                        preds[v] = [u]
+                        next_frontier.append(v)
+                    elif level[v] == level[u] + 1:
+                        preds[v].append(u)
+
+            frontier = next_frontier
+
+        if t not in level:
+            raise NetworkXNoPath("Target {0} cannot be reached from source {1}.".
+                                 format(target, source))
+
+        stack = [(t, [t])]
+        while stack:
+            v, path = stack.pop()
+            if v == s:
+                yield [self._nodes[i] for i in reversed(path)]
+            else:
+                for u in preds[v]:
+                    stack.append((u, path + [u]))
+
+    def all_simple_paths(self, source, target, cutoff):
+        """Generator which yields all paths from source to target up to cutoff edges long."""
+        s = self._require_node(source)
+        t = self._require_node(target)
+
+        if cutoff < 1:
+            return
+
+        visited = [s]
+        stack = [iter(self._successor_ids(s))]
+        while stack:
+            children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                visited.pop()
+            elif child in visited:
+                continue
+            elif len(visited) < cutoff:
+                if child == t:
+                    yield [self._nodes[i] for i in visited + [t]]
+                else:
+                    visited.append(child)
+                    stack.append(iter(self._successor_ids(child)))
+            else:
+                if t not in visited and (child == t or t in children):
+                    yield [self._nodes[i] for i in visited + [t]]
+
+                stack.pop()
+                visited.pop()
+
+    def shortest_path(self, source, target):
+        """Get a shortest path from source to target."""
+        s = self._require_node(source)
+        t = self._require_node(target)
+
+        if s == t:
+            return [source]
+
+        pred = {s: None}
+        frontier = [s]
+        while frontier:
+            next_frontier = []
+            for u in frontier:
+                for v, _ in self._successors(u):
+                    if v in pred:
+                        continue
+
+                    pred[v] = u
+                    if v == t:
+                        path = [t]
+                        while pred[path[-1]] is not None:
+                            path.append(pred[path[-1]])
+
+                        return [self._nodes[i] for i in reversed(path)]
+
+                    next_frontier.append(v)
+
+            frontier = next_frontier
+
+        raise NetworkXNoPath("No path between {0} and {1}.".format(source, target))
+
+    #
+    # Internal functions
+    #
+    @staticmethod
+    def _csr(count, entries):
+        """
+        Build CSR arrays from (row, column, edge) entries.
+
+        Return: tuple(row pointers, columns, edge numbers)
+        """
+        entries.sort()
+
+        ptr = array("L", [0]) * (count + 1)
+        for row, _, _ in entries:
+            ptr[row + 1] += 1
+
+        for row in range(count):
+            ptr[row + 1] += ptr[row]
+
+        columns = array("L", (col for _, col, _ in entries))
+        edges = array("L", (edge for _, _, edge in entries))
+        return ptr, columns, edges
+
+    def _edge_ok(self, edge):
+        """Determine if an edge is included in the view."""
+        return True
+
+    def _edge_id(self, source, target):
+        """Get the edge number of the (source, target) edge in the view, or None."""
+        s = self._node_id(source)
+        t = self._node_id(target)
+        if s is None or t is None:
+            return None
+
+        if self.reverse:
+            s, t = t, s
+
+        lo = self._succ_ptr[s]
+        hi = self._succ_ptr[s + 1]
+        i = bisect_left(self._succ, t, lo, hi)
+        if i < hi and self._succ[i] == t and self._edge_ok(self._succ_edge[i]):
+            return self._succ_edge[i]
+
+        return None
+
+    def _edges(self, nbunch, out):
+        """List the out (or in) edges of a node, or all edges in the view."""
+        if nbunch is None:
+            rows = (i for i in range(len(self._nodes)) if not self.node_mask[i])
+        else:
+            node_id = self._node_id(nbunch)
+            if node_id is None:
+                raise NetworkXError("The node {0} is not in the graph.".format(nbunch))
+
+            rows = (node_id,)
+
+        neighbors = self._successors if out else self._predecessors
+        edges = []
+        for u in rows:
+            for v, _ in neighbors(u):
+                if out:
+                    edges.append((self._nodes[u], self._nodes[v]))
+                else:
+                    edges.append((self._nodes[v], self._nodes[u]))
+
+        return edges
+
+    def _init_structure(self, nodes, arrays, name):
+        self.name = name
+        self._nodes = list(nodes)
+        self._node_index = dict((n, i) for i, n in enumerate(self._nodes))
+        self._succ_ptr = arrays["succ_ptr"]
+        self._succ = arrays["succ"]
+        self._succ_edge = arrays["succ_edge"]
+        self._pred_ptr = arrays["pred_ptr"]
+        self._pred = arrays["pred"]
+        self._pred_edge = arrays["pred_edge"]
+
+        # view settings
+        self.node_mask = bytearray(len(self._nodes))
+        self.reverse = False
+
+    def _neighbors(self, node_id, ptr, columns, edges):
+        for i in range(ptr[node_id], ptr[node_id + 1]):
+            if not self.node_mask[columns[i]] and self._edge_ok(edges[i]):
+                yield columns[i], edges[i]
+
+    def _node_id(self, node):
+        """Get the number of a node in the view, or None."""
+        node_id = self._node_index.get(node)
+        if node_id is None or self.node_mask[node_id]:
+            return None
+
+        return node_id
+
+    def _predecessors(self, node_id):
+        """Generator which yields (node number, edge number) of the in edges of a node."""
+        if self.reverse:
+            return self._neighbors(node_id, self._succ_ptr, self._succ, self._succ_edge)
+        else:
+            return self._neighbors(node_id, self._pred_ptr, self._pred, self._pred_edge)
+
+    def _require_node(self, node):
+        node_id = self._node_id(node)
+        if node_id is None:
+            raise NodeNotFound("Node {0} not in graph.".format(node))
+
+        return node_id
+
+    def _successor_ids(self, node_id):
+        return (v for v, _ in self._successors(node_id))
+
+    def _successors(self, node_id):
+        """Generator which yields (node number, edge number) of the out edges of a node."""
+        if self.reverse:
+            return self._neighbors(node_id, self._pred_ptr, self._pred, self._pred_edge)
+        else:
+            return self._neighbors(node_id, self._succ_ptr, self._succ, self._succ_edge)
+
+
+class CSRAdjacency:
+
+    """The adjacency of a node in a CSRGraph, for G[source][target] access."""
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+
+    def __getitem__(self, target):
+        edge = self.graph._edge_id(self.source, target)
+        if edge is None:
+            raise KeyError(target)
+
+        return self.graph.edge_attrs(edge)
+
+
+class CSREdgeView:
+
+    """The edge view of a CSRGraph.  Calling the view lists the edges."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __call__(self):
+        return self.graph.out_edges()
+
+    def __getitem__(self, edge):
+        source, target = edge
+        return self.graph[source][target]
+
+    def __iter__(self):
+        return iter(self.graph.out_edges())
+
+    def __len__(self):
+        return self.graph.number_of_edges()
+
+
+#
+# Graph functions which work on either NetworkX graphs or CSRGraphs.
+#
+def all_shortest_paths(G, source, target):
+    if isinstance(G, CSRGraph):
+        return G.all_shortest_paths(source, target)
+    else:
+        return nx.all_shortest_paths(G, source, target)
+
+
+def all_simple_paths(G, source, target, cutoff):
+    if isinstance(G, CSRGraph):
+        return G.all_simple_paths(source, target, cutoff)
+    else:
+        return nx.all_simple_paths(G, source, target, cutoff)
+
+
+def graph_info(G):
+    if isinstance(G, CSRGraph):
+        return G.info()
+    else:
+        return nx.info(G)
+
+
+def shortest_path(G, source, target):
+    if isinstance(G, CSRGraph):
+        return G.shortest_path(source, target)
+    else:
+        return nx.shortest_path(G, source, target)
+
+
+def validate_backend(backend):
+    if backend not in graph_backends:
+        raise ValueError("Invalid graph backend: {0}".format(backend))
+
+    return backend
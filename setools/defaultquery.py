@@ -18,8 +18,9 @@
 #
 import logging
 import re
+from operator import attrgetter
 
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate, guard_predicate, member_predicate
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .mixins import MatchObjClass
 from .policyrep import DefaultRuletype, DefaultValue, DefaultRangeValue
@@ -59,21 +60,24 @@ class DefaultQuery(MatchObjClass, PolicyQuery):
         self.log.debug("Default: {0.default!r}".format(self))
         self.log.debug("Range: {0.default_range!r}".format(self))
 
-        for d in self.policy.defaults():
-            if self.ruletype and d.ruletype not in self.ruletype:
-                continue
+        yield from self.plan().results()
 
-            if not self._match_object_class(d):
-                continue
+    def _candidates(self):
+        return self.policy.defaults()
 
-            if self.default and d.default != self.default:
-                continue
+    def _predicates(self):
+        predicates = self._match_object_class_predicates()
 
-            if self.default_range:
-                try:
-                    if d.default_range != self.default_range:
-                        continue
-                except AttributeError:
-                    continue
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
 
-            yield d
+        if self.default:
+            predicates.append(equal_predicate(attrgetter("default"), self.default))
+
+        if self.default_range:
+            # only default_range statements have a range
+            predicates.append(guard_predicate(
+                equal_predicate(attrgetter("default_range"), self.default_range),
+                AttributeError))
+
+        return predicates
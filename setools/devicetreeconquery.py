@@ -17,9 +17,10 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .mixins import MatchContext
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate
 
 
 class DevicetreeconQuery(MatchContext, PolicyQuery):
@@ -68,12 +69,15 @@ class DevicetreeconQuery(MatchContext, PolicyQuery):
         self.log.debug("Path: {0.path!r}".format(self))
         self._match_context_debug(self.log)
 
-        for devicetreecon in self.policy.devicetreecons():
+        yield from self.plan().results()
 
-            if self.path and self.path != devicetreecon.path:
-                continue
+    def _candidates(self):
+        return self.policy.devicetreecons()
 
-            if not self._match_context(devicetreecon.context):
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            yield devicetreecon
+        if self.path:
+            predicates.append(equal_predicate(attrgetter("path"), self.path))
+
+        return predicates
@@ -16,6 +16,8 @@
 # License along with SETools.  If not, see
 # <http://www.gnu.org/licenses/>.
 #
+import multiprocessing
+
 from .bool import BooleansDifference
 from .bounds import BoundsDifference
 from .commons import CommonDifference
@@ -29,6 +31,7 @@ from .mlsrules import MLSRulesDifference
 from .netifcon import NetifconsDifference
 from .nodecon import NodeconsDifference
 from .objclass import ObjClassDifference
+from .parallel import diff_functions, init_worker, load_results, run_diff
 from .polcap import PolCapsDifference
 from .portcon import PortconsDifference
 from .properties import PropertiesDifference
@@ -75,6 +78,55 @@ class PolicyDifference(BooleansDifference,
     right   A policy
     """
 
+    def run_all(self, workers=1):
+        """
+        Compute all of the differences.
+
+        Keyword Parameter:
+        workers     The number of worker processes.  Each worker loads
+                    both policies and computes whole component diffs,
+                    e.g. the allow rule differences.  If 1, the diffs
+                    are computed in this process.  Policies loaded
+                    from memory are always diffed in this process.
+                    (default is 1)
+        """
+        functions = diff_functions(type(self))
+
+        if workers > 1 and (self.left_policy.in_memory or self.right_policy.in_memory):
+            self.log.info("Not using worker processes, since the policies were not all "
+                          "loaded from files.")
+            workers = 1
+
+        if workers > 1:
+            self.log.info("Computing differences from {0.left_policy} to {0.right_policy} "
+                          "with {1} workers".format(self, workers))
+
+            settings = {"terule_memory_budget": self.terule_memory_budget}
+            with multiprocessing.Pool(workers, init_worker,
+                                      (type(self), self.left_policy.path,
+                                       self.right_policy.path, settings)) as pool:
+
+                # start the TE rule diffs first, as they take the longest
+                pending = [pool.apply_async(run_diff, (function, functions[function]))
+                           for function in sorted(functions,
+                                                  key=lambda f: f not in vars(TERulesDifference))]
+
+                for result in pending:
+                    function, data = result.get()
+                    if data is None:
+                        # the results could not be returned; they
+                        # are computed in this process below.
+                        continue
+
+                    for name, value in load_results(data, self.left_policy,
+                                                    self.right_policy).items():
+                        setattr(self, name, value)
+
+                    del functions[function]
+
+        for function in functions:
+            getattr(self, function)()
+
     def _reset_diff(self):
         """Reset diff results on policy changes."""
         for c in PolicyDifference.__bases__:
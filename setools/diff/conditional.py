@@ -42,13 +42,16 @@ def conditional_wrapper_factory(cond):
 
 class ConditionalWrapper(Wrapper):
 
-    """Wrap conditional policy expressions to allow comparisons by truth table."""
+    """Wrap conditional policy expressions to allow comparisons by canonical form."""
 
-    __slots__ = ("truth_table")
+    __slots__ = ()
 
     def __init__(self, cond):
         self.origin = cond
-        self.truth_table = cond.truth_table()
+        self.key = cond.canonical
+
+    def __hash__(self):
+        return hash(self.key)
 
     def __eq__(self, other):
-        return self.truth_table == other.truth_table
+        return self.key == other.key
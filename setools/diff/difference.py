@@ -175,3 +175,45 @@ class SymbolWrapper(Wrapper):
 
     def __eq__(self, other):
         return self.name == other.name
+
+
+class SymbolIDs:
+
+    """
+    Canonical integer IDs for the symbols of the policies of a difference.
+    Symbols from either policy with the same key, by default the name,
+    have the same ID.
+
+    Symbols are looked up by identity, since the policy objects of symbols
+    are cached, so there is no string formatting or hashing per lookup.
+    Symbols should be added up front; others are added when first looked up.
+
+    Parameter:
+    key         A function which returns the canonical key of a symbol.
+                (default is str)
+    """
+
+    def __init__(self, key=str):
+        self.key = key
+
+        # id(symbol) to ID.  The symbols are kept,
+        # so their id()s are not reused.
+        self.ids = {}
+        self.keys = {}
+        self.symbols = []
+
+    def __getitem__(self, symbol):
+        try:
+            return self.ids[id(symbol)]
+        except KeyError:
+            self.add((symbol,))
+            return self.ids[id(symbol)]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, symbols):
+        """Add symbols to the ID table."""
+        for symbol in symbols:
+            self.ids[id(symbol)] = self.keys.setdefault(self.key(symbol), len(self.keys))
+            self.symbols.append(symbol)
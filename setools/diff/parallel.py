@@ -0,0 +1,305 @@
+# Copyright 2018, Chris PeBenito <pebenito@ieee.org>
+#
+# This file is part of SETools.
+#
+# SETools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1 of
+# the License, or (at your option) any later version.
+#
+# SETools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with SETools.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+#
+# Support for computing policy differences in worker processes.
+#
+# Policy objects cannot be pickled between processes, so the results of
+# each diff are pickled with the policy objects replaced by compact
+# references: symbol names, or positions in the policy's iteration order
+# of the statement.  Both processes load the same policy files, so the
+# references are resolved against the parent's policies.
+#
+import io
+import logging
+import pickle
+
+from ..policyrep import IoctlSet, SELinuxPolicy
+from ..policyrep.libpolicyrep import BaseTERule, ExpandedAVRule, ExpandedAVRuleXperm, \
+    ExpandedFileNameTERule, ExpandedMLSRule, ExpandedRoleAllow, ExpandedRoleTransition, \
+    ExpandedTERule, FileNameTERule, Level, PolicySymbol, Range
+
+from .descriptors import DiffResultDescriptor
+
+expanded_rules = (ExpandedAVRule, ExpandedAVRuleXperm, ExpandedFileNameTERule, ExpandedMLSRule,
+                  ExpandedRoleAllow, ExpandedRoleTransition, ExpandedTERule)
+
+# symbols referenced by name, by class name
+symbol_lookups = {"Boolean": "lookup_boolean",
+                  "Category": "lookup_category",
+                  "Common": "lookup_common",
+                  "InitialSID": "lookup_initialsid",
+                  "ObjClass": "lookup_class",
+                  "Role": "lookup_role",
+                  "Sensitivity": "lookup_sensitivity",
+                  "Type": "lookup_type",
+                  "TypeAttribute": "lookup_typeattr",
+                  "User": "lookup_user"}
+
+# statements referenced by position, by class name
+statement_iterators = {"Bounds": "bounds",
+                       "Conditional": "conditionals",
+                       "Constraint": "constraints",
+                       "Default": "defaults",
+                       "DefaultRange": "defaults",
+                       "FSUse": "fs_uses",
+                       "Genfscon": "genfscons",
+                       "LevelDecl": "levels",
+                       "MLSRule": "mlsrules",
+                       "Netifcon": "netifcons",
+                       "Nodecon": "nodecons",
+                       "PolicyCapability": "polcaps",
+                       "Portcon": "portcons",
+                       "RoleAllow": "rbacrules",
+                       "RoleTransition": "rbacrules",
+                       "Validatetrans": "constraints"}
+
+# the worker process's difference
+_worker_diff = None
+
+
+def diff_functions(cls):
+    """
+    Get the diff functions of a Difference class.
+
+    Return:     A dictionary of diff function name to
+                the list of its result attribute names.
+    """
+    functions = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if isinstance(value, DiffResultDescriptor):
+                functions.setdefault(value.diff_function, []).append(name)
+
+    return functions
+
+
+def init_worker(cls, left_path, right_path, settings):
+    """
+    Initialize a worker process by loading the policies.
+
+    Parameters:
+    cls         The Difference class.
+    left_path   The path of the left policy.
+    right_path  The path of the right policy.
+    settings    A dictionary of Difference attributes to set.
+    """
+    global _worker_diff
+    _worker_diff = cls(SELinuxPolicy(left_path), SELinuxPolicy(right_path))
+    for name, value in settings.items():
+        setattr(_worker_diff, name, value)
+
+
+def run_diff(function, attributes):
+    """
+    Run a diff function in a worker process.
+
+    Parameters:
+    function    The name of the diff function.
+    attributes  The names of the function's result attributes.
+
+    Return: tuple(function, results)
+    function    The name of the diff function.
+    results     The pickled dictionary of result attribute name to
+                result, or None if the results cannot be pickled.
+    """
+    getattr(_worker_diff, function)()
+    results = dict((name, getattr(_worker_diff, name)) for name in attributes)
+
+    buffer = io.BytesIO()
+    try:
+        DiffPickler(buffer, _worker_diff.left_policy, _worker_diff.right_policy).dump(results)
+    except (pickle.PicklingError, TypeError) as ex:
+        # TypeError: an object of the results is not picklable
+        logging.getLogger(__name__).debug("Unable to return {0} results: {1}".format(function, ex))
+        return function, None
+
+    return function, buffer.getvalue()
+
+
+def ioctl_set(bits):
+    """Create an IoctlSet from its bitmap, as when it is unpickled."""
+    ioctls = IoctlSet()
+    ioctls.__setstate__(bits)
+    return ioctls
+
+
+def load_results(data, left_policy, right_policy):
+    """Load pickled diff results, resolving the references to the policies."""
+    return DiffUnpickler(io.BytesIO(data), left_policy, right_policy).load()
+
+
+class DiffPickler(pickle.Pickler):
+
+    """
+    Pickler for diff results which replaces policy objects with references.
+
+    Parameters:
+    file            The file to write.
+    left_policy     The left policy of the diff.
+    right_policy    The right policy of the diff.
+    """
+
+    def __init__(self, file, left_policy, right_policy):
+        super(DiffPickler, self).__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.policies = (left_policy, right_policy)
+
+        # policy object to position, by (side, iterator name)
+        self.positions = {}
+
+    def persistent_id(self, obj):
+        # IoctlSets pickle as their bitmap, so they are not referenced.
+        if isinstance(obj, PolicySymbol):
+            return self._reference(obj)
+        elif isinstance(obj, SELinuxPolicy):
+            return ("policy", self._side(obj))
+
+        return None
+
+    #
+    # Internal functions
+    #
+    def _position(self, side, iterator, obj):
+        try:
+            positions = self.positions[side, iterator]
+        except KeyError:
+            if iterator == "terules":
+                # the TE rule differences use the rules of the
+                # TE rule index, so map by identity.
+                positions = dict((id(rule), pos) for pos, rule in
+                                 enumerate(self.policies[side].terule_index()))
+            else:
+                positions = dict((item, pos) for pos, item in
+                                 enumerate(getattr(self.policies[side], iterator)()))
+
+            self.positions[side, iterator] = positions
+
+        try:
+            return positions[id(obj) if iterator == "terules" else obj]
+        except KeyError:
+            raise pickle.PicklingError("{0!r} is not in the policy's {1}".format(obj, iterator))
+
+    def _reference(self, obj):
+        side = self._side(obj.policy)
+        classname = type(obj).__name__
+
+        if isinstance(obj, expanded_rules):
+            # references must be hashable, so the extended
+            # permissions are referenced by their bitmap.
+            try:
+                perms = obj.perms.bits if isinstance(obj, ExpandedAVRuleXperm) \
+                    else tuple(sorted(obj.perms))
+            except AttributeError:
+                perms = None
+
+            return ("expanded", self._reference(obj.origin), self._reference(obj.source),
+                    self._reference(obj.target), perms)
+        elif isinstance(obj, (BaseTERule, FileNameTERule)):
+            return ("item", side, "terules", self._position(side, "terules", obj))
+        elif isinstance(obj, Level):
+            return ("lookup", side, "lookup_level", str(obj))
+        elif isinstance(obj, Range):
+            return ("lookup", side, "lookup_range", str(obj))
+        elif classname in symbol_lookups:
+            return ("lookup", side, symbol_lookups[classname], str(obj))
+        elif classname in statement_iterators:
+            iterator = statement_iterators[classname]
+            return ("item", side, iterator, self._position(side, iterator, obj))
+
+        raise pickle.PicklingError("{0!r} cannot be referenced.".format(obj))
+
+    def _side(self, policy):
+        if policy is self.policies[0]:
+            return 0
+        elif policy is self.policies[1]:
+            return 1
+
+        raise pickle.PicklingError("{0!r} is not a policy of the diff.".format(policy))
+
+
+class DiffUnpickler(pickle.Unpickler):
+
+    """
+    Unpickler for diff results which resolves references to policy objects.
+
+    Parameters:
+    file            The file to read.
+    left_policy     The left policy of the diff.
+    right_policy    The right policy of the diff.
+    """
+
+    def __init__(self, file, left_policy, right_policy):
+        super(DiffUnpickler, self).__init__(file)
+        self.policies = (left_policy, right_policy)
+
+        # resolved references, so each object is only created once
+        self.objects = {}
+
+        # statements, by (side, iterator name)
+        self.statements = {}
+
+    def persistent_load(self, pid):
+        if pid[0] == "policy":
+            return self.policies[pid[1]]
+
+        return self._resolve(pid)
+
+    #
+    # Internal functions
+    #
+    def _resolve(self, ref):
+        try:
+            return self.objects[ref]
+        except KeyError:
+            pass
+
+        kind = ref[0]
+        if kind == "expanded":
+            _, origin, source, target, perms = ref
+            obj = next(self._resolve(origin).expand())
+            obj.source = self._resolve(source)
+            obj.target = self._resolve(target)
+            if perms is not None:
+                obj.perms = ioctl_set(perms) if isinstance(obj, ExpandedAVRuleXperm) \
+                    else set(perms)
+
+        elif kind == "lookup":
+            _, side, lookup, name = ref
+            obj = getattr(self.policies[side], lookup)(name)
+
+        elif kind == "item":
+            _, side, iterator, pos = ref
+            obj = self._statements(side, iterator)[pos]
+
+        else:
+            raise pickle.UnpicklingError("Invalid policy object reference: {0!r}".format(ref))
+
+        self.objects[ref] = obj
+        return obj
+
+    def _statements(self, side, iterator):
+        try:
+            return self.statements[side, iterator]
+        except KeyError:
+            if iterator == "terules":
+                statements = self.policies[side].terule_index()
+            else:
+                statements = list(getattr(self.policies[side], iterator)())
+
+            self.statements[side, iterator] = statements
+            return statements
@@ -17,16 +17,18 @@
 # License along with SETools.  If not, see
 # <http://www.gnu.org/licenses/>.
 #
+import logging
+from array import array
+from bisect import bisect_left
 from collections import defaultdict, namedtuple
+from operator import attrgetter
 
-from ..policyrep import IoctlSet, TERuletype
+from ..policyrep import TERuletype
 from ..policyrep.exception import RuleNotConditional, RuleUseError, TERuleNoFilename
+from ..util import class_perm_bits
 
-from .conditional import conditional_wrapper_factory
 from .descriptors import DiffResultDescriptor
-from .difference import Difference, Wrapper
-from .types import type_wrapper_factory, type_or_attr_wrapper_factory
-from .objclass import class_wrapper_factory
+from .difference import Difference, SymbolIDs, Wrapper
 
 
 modified_avrule_record = namedtuple("modified_avrule", ["rule",
@@ -37,7 +39,7 @@ modified_avrule_record = namedtuple("modified_avrule", ["rule",
 modified_terule_record = namedtuple("modified_terule", ["rule", "added_default", "removed_default"])
 
 
-def _avrule_expand_generator(rule_list, WrapperClass):
+def _avrule_expand_generator(rule_list, WrapperClass, ids):
     """
     Generator that yields wrapped, expanded, av(x) rules with
     unioned permission sets.
@@ -46,7 +48,7 @@ def _avrule_expand_generator(rule_list, WrapperClass):
 
     for unexpanded_rule in rule_list:
         for expanded_rule in unexpanded_rule.expand():
-            expanded_wrapped_rule = WrapperClass(expanded_rule)
+            expanded_wrapped_rule = WrapperClass(expanded_rule, ids)
 
             # create a hash table (dict) with the first rule
             # as the key and value.  Rules where permission sets should
@@ -77,12 +79,23 @@ def av_diff_template(ruletype):
             "Generating {0} differences from {1.left_policy} to {1.right_policy}".
             format(ruletype, self))
 
+        if self.terule_memory_budget:
+            added, removed, modified = AVRuleStreamDiff(self.left_policy, self.right_policy,
+                                                        ruletype, self.terule_memory_budget).run()
+
+            setattr(self, "added_{0}s".format(ruletype), added)
+            setattr(self, "removed_{0}s".format(ruletype), removed)
+            setattr(self, "modified_{0}s".format(ruletype), modified)
+            return
+
         if not self._left_te_rules or not self._right_te_rules:
             self._create_te_rule_lists()
 
         added, removed, matched = self._set_diff(
-                _avrule_expand_generator(self._left_te_rules[ruletype], AVRuleWrapper),
-                _avrule_expand_generator(self._right_te_rules[ruletype], AVRuleWrapper))
+                _avrule_expand_generator(self._left_te_rules[ruletype], AVRuleWrapper,
+                                         self._te_symbol_ids),
+                _avrule_expand_generator(self._right_te_rules[ruletype], AVRuleWrapper,
+                                         self._te_symbol_ids))
 
         modified = []
         for left_rule, right_rule in matched:
@@ -128,24 +141,24 @@ def avx_diff_template(ruletype):
             self._create_te_rule_lists()
 
         added, removed, matched = self._set_diff(
-                _avrule_expand_generator(self._left_te_rules[ruletype], AVRuleXpermWrapper),
-                _avrule_expand_generator(self._right_te_rules[ruletype], AVRuleXpermWrapper))
+                _avrule_expand_generator(self._left_te_rules[ruletype], AVRuleXpermWrapper,
+                                         self._te_symbol_ids),
+                _avrule_expand_generator(self._right_te_rules[ruletype], AVRuleXpermWrapper,
+                                         self._te_symbol_ids))
 
         modified = []
         for left_rule, right_rule in matched:
             # Criteria for modified rules
             # 1. change to permissions
-            added_perms, removed_perms, matched_perms = self._set_diff(left_rule.perms,
-                                                                       right_rule.perms)
-
-            # the final set comprehension is to avoid having lists
-            # like [("perm1", "perm1"), ("perm2", "perm2")], as the
-            # matched_perms return from _set_diff is a set of tuples
-            if added_perms or removed_perms:
+            # the ioctls are compared as bitmaps, so
+            # ioctl numbers do not need to be matched up.
+            left_perms = left_rule.perms
+            right_perms = right_rule.perms
+            if left_perms != right_perms:
                 modified.append(modified_avrule_record(left_rule,
-                                                       IoctlSet(added_perms),
-                                                       IoctlSet(removed_perms),
-                                                       IoctlSet(p[0] for p in matched_perms)))
+                                                       right_perms - left_perms,
+                                                       left_perms - right_perms,
+                                                       left_perms & right_perms))
 
         setattr(self, "added_{0}s".format(ruletype), added)
         setattr(self, "removed_{0}s".format(ruletype), removed)
@@ -174,15 +187,18 @@ def te_diff_template(ruletype):
         if not self._left_te_rules or not self._right_te_rules:
             self._create_te_rule_lists()
 
+        ids = self._te_symbol_ids
         added, removed, matched = self._set_diff(
-                self._expand_generator(self._left_te_rules[ruletype], TERuleWrapper),
-                self._expand_generator(self._right_te_rules[ruletype], TERuleWrapper))
+                (TERuleWrapper(r, ids) for rule in self._left_te_rules[ruletype]
+                 for r in rule.expand()),
+                (TERuleWrapper(r, ids) for rule in self._right_te_rules[ruletype]
+                 for r in rule.expand()))
 
         modified = []
         for left_rule, right_rule in matched:
             # Criteria for modified rules
             # 1. change to default type
-            if type_wrapper_factory(left_rule.default) != type_wrapper_factory(right_rule.default):
+            if ids.types[left_rule.default] != ids.types[right_rule.default]:
                 modified.append(modified_terule_record(left_rule,
                                                        right_rule.default,
                                                        left_rule.default))
@@ -256,10 +272,18 @@ class TERulesDifference(Difference):
     removed_type_members = DiffResultDescriptor("diff_type_members")
     modified_type_members = DiffResultDescriptor("diff_type_members")
 
+    # Approximate memory budget, in bytes, for the expanded
+    # access vector rules.  If set, access vector rules are
+    # diffed with AVRuleStreamDiff.
+    terule_memory_budget = None
+
     # Lists of rules for each policy
     _left_te_rules = defaultdict(list)
     _right_te_rules = defaultdict(list)
 
+    # Canonical IDs of the rules' symbols
+    _te_symbol_ids = None
+
     #
     # Internal functions
     #
@@ -267,12 +291,18 @@ class TERulesDifference(Difference):
         """Create rule lists for both policies."""
         # do not expand yet, to keep memory
         # use down as long as possible
+        self.log.debug("Building TE rule symbol IDs.")
+        self._te_symbol_ids = TERuleSymbolIDs(self.left_policy, self.right_policy)
+
+        #
+        # The rules are taken from the TE rule index, so a rule
+        # can be referenced by its position in the index.
         self.log.debug("Building TE rule lists from {0.left_policy}".format(self))
-        for rule in self.left_policy.terules():
+        for rule in self.left_policy.terule_index():
             self._left_te_rules[rule.ruletype].append(rule)
 
         self.log.debug("Building TE rule lists from {0.right_policy}".format(self))
-        for rule in self.right_policy.terules():
+        for rule in self.right_policy.terule_index():
             self._right_te_rules[rule.ruletype].append(rule)
 
         self.log.debug("Completed building TE rule lists.")
@@ -317,110 +347,472 @@ class TERulesDifference(Difference):
         # Sets of rules for each policy
         self._left_te_rules.clear()
         self._right_te_rules.clear()
+        self._te_symbol_ids = None
 
 
-class AVRuleWrapper(Wrapper):
+class TERuleSymbolIDs:
 
-    """Wrap access vector rules to allow set operations."""
-
-    __slots__ = ("source", "target", "tclass", "conditional", "conditional_block")
+    """
+    Canonical IDs of the types, attributes, classes, and conditional
+    expressions of both policies, for keying TE rules on integers.
+    Conditional expressions are keyed on their canonical forms.
 
-    def __init__(self, rule):
-        self.origin = rule
-        self.source = type_or_attr_wrapper_factory(rule.source)
-        self.target = type_or_attr_wrapper_factory(rule.target)
-        self.tclass = class_wrapper_factory(rule.tclass)
-        self.key = hash(rule)
+    Parameters:
+    left_policy     The left policy.
+    right_policy    The right policy.
+    """
 
+    def __init__(self, left_policy, right_policy):
+        self.types = SymbolIDs()
+        self.classes = SymbolIDs()
+        self.conditionals = SymbolIDs(key=attrgetter("canonical"))
+
+        for policy in (left_policy, right_policy):
+            self.types.add(policy.types())
+            self.types.add(policy.typeattributes())
+            self.classes.add(policy.classes())
+            self.conditionals.add(policy.conditionals())
+
+    def conditional(self, rule):
+        """
+        Get the conditional slot of a rule: 0 for unconditional rules,
+        otherwise 1 + 2 * conditional ID + conditional block.
+        """
         try:
-            self.conditional = conditional_wrapper_factory(rule.conditional)
-            self.conditional_block = rule.conditional_block
+            return 1 + 2 * self.conditionals[rule.conditional] + int(rule.conditional_block)
         except RuleNotConditional:
-            self.conditional = None
-            self.conditional_block = None
+            return 0
+
+
+class AVRuleWrapper(Wrapper):
+
+    """
+    Wrap access vector rules to allow set operations.
+
+    Parameters:
+    rule        The rule to wrap.
+    ids         The TERuleSymbolIDs of the difference.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, rule, ids):
+        # because TERuleDifference groups rules by ruletype,
+        # the ruletype always matches.
+        self.origin = rule
+        self.key = (ids.types[rule.source], ids.types[rule.target], ids.classes[rule.tclass],
+                    ids.conditional(rule))
 
     def __hash__(self):
-        return self.key
+        return hash(self.key)
 
     def __lt__(self, other):
         return self.key < other.key
 
     def __eq__(self, other):
-        # because TERuleDifference groups rules by ruletype,
-        # the ruletype always matches.
-        return self.source == other.source and \
-               self.target == other.target and \
-               self.tclass == other.tclass and \
-               self.conditional == other.conditional and \
-               self.conditional_block == other.conditional_block
+        return self.key == other.key
 
 
 class AVRuleXpermWrapper(Wrapper):
 
-    """Wrap extended permission access vector rules to allow set operations."""
+    """
+    Wrap extended permission access vector rules to allow set operations.
+
+    Parameters:
+    rule        The rule to wrap.
+    ids         The TERuleSymbolIDs of the difference.
+    """
 
-    __slots__ = ("source", "target", "tclass", "xperm_type")
+    __slots__ = ()
 
-    def __init__(self, rule):
+    def __init__(self, rule, ids):
+        # because TERuleDifference groups rules by ruletype,
+        # the ruletype always matches.
         self.origin = rule
-        self.source = type_or_attr_wrapper_factory(rule.source)
-        self.target = type_or_attr_wrapper_factory(rule.target)
-        self.tclass = class_wrapper_factory(rule.tclass)
-        self.xperm_type = rule.xperm_type
-        self.key = hash(rule)
+        self.key = (ids.types[rule.source], ids.types[rule.target], ids.classes[rule.tclass],
+                    rule.xperm_type)
 
     def __hash__(self):
-        return self.key
+        return hash(self.key)
 
     def __lt__(self, other):
         return self.key < other.key
 
     def __eq__(self, other):
-        # because TERuleDifference groups rules by ruletype,
-        # the ruletype always matches.
-        return self.source == other.source and \
-               self.target == other.target and \
-               self.tclass == other.tclass and \
-               self.xperm_type == other.xperm_type
+        return self.key == other.key
 
 
 class TERuleWrapper(Wrapper):
 
-    """Wrap type_* rules to allow set operations."""
-
-    __slots__ = ("source", "target", "tclass", "conditional", "conditional_block", "filename")
+    """
+    Wrap type_* rules to allow set operations.
 
-    def __init__(self, rule):
-        self.origin = rule
-        self.source = type_or_attr_wrapper_factory(rule.source)
-        self.target = type_or_attr_wrapper_factory(rule.target)
-        self.tclass = class_wrapper_factory(rule.tclass)
-        self.key = hash(rule)
+    Parameters:
+    rule        The rule to wrap.
+    ids         The TERuleSymbolIDs of the difference.
+    """
 
-        try:
-            self.conditional = conditional_wrapper_factory(rule.conditional)
-            self.conditional_block = rule.conditional_block
-        except RuleNotConditional:
-            self.conditional = None
-            self.conditional_block = None
+    __slots__ = ()
 
+    def __init__(self, rule, ids):
         try:
-            self.filename = rule.filename
+            filename = rule.filename
         except (RuleUseError, TERuleNoFilename):
-            self.filename = None
+            # no file name sorts before all file names
+            filename = ""
+
+        # because TERuleDifference groups rules by ruletype,
+        # the ruletype always matches.
+        self.origin = rule
+        self.key = (ids.types[rule.source], ids.types[rule.target], ids.classes[rule.tclass],
+                    ids.conditional(rule), filename)
 
     def __hash__(self):
-        return self.key
+        return hash(self.key)
 
     def __lt__(self, other):
         return self.key < other.key
 
     def __eq__(self, other):
-        # because TERuleDifference groups rules by ruletype,
-        # the ruletype always matches.
-        return self.source == other.source and \
-               self.target == other.target and \
-               self.tclass == other.tclass and \
-               self.conditional == other.conditional and \
-               self.conditional_block == other.conditional_block and \
-               self.filename == self.filename
+        return self.key == other.key
+
+
+class AVRuleStreamDiff:
+
+    """
+    A streaming diff of the access vector rules of one rule type.
+
+    The expanded rules are keyed by integers that encode the
+    (source, target, class, conditional) of the rule and the permissions
+    are stored as bitmasks.  Types, classes, permissions, and conditional
+    expressions are numbered by name (or truth table) in a symbol space
+    shared by both policies, so the keys of both policies are comparable.
+    Rather than expanding all of the rules at once, the source types
+    are partitioned so the expanded rules of a partition fit within the
+    memory budget.  Each partition is expanded from both policies and
+    the sorted keys are merged in a single pass.
+
+    The budget is approximate, as a single source type's expanded rules
+    are never split between partitions.
+
+    Parameters:
+    left_policy     The left policy.
+    right_policy    The right policy.
+    ruletype        The access vector TERuletype.
+    budget          The approximate memory budget, in bytes.
+    """
+
+    # estimated bytes per expanded rule in the partition tables
+    entry_size = 128
+
+    def __init__(self, left_policy, right_policy, ruletype, budget):
+        self.log = logging.getLogger(__name__)
+        self.ruletype = ruletype
+        self.budget = budget
+
+        # shared symbol spaces.  Types and classes are numbered in
+        # name order, so the merged output is ordered by name.
+        self.type_ids = dict((n, i) for i, n in enumerate(sorted(
+            set(str(t) for t in left_policy.types()) | set(str(t) for t in right_policy.types()))))
+
+        self.class_ids = dict((n, i) for i, n in enumerate(sorted(
+            set(str(c) for c in left_policy.classes()) |
+            set(str(c) for c in right_policy.classes()))))
+
+        # per class name: permission names ordered by shared bit
+        self.class_perms = {}
+
+        # conditional expressions keyed by (Booleans, truth table results)
+        self.cond_ids = {}
+
+        self.left = _AVRuleStreamSide(self, left_policy)
+        self.right = _AVRuleStreamSide(self, right_policy)
+
+    def run(self):
+        """
+        Run the diff.
+
+        Return: tuple(added, removed, modified)
+        added       Set of expanded rules in right but not left.
+        removed     Set of expanded rules in left but not right.
+        modified    List of modified_avrule records.
+        """
+        counts = [0] * len(self.type_ids)
+        self.left.count(counts)
+        self.right.count(counts)
+
+        # the key radixes are known once all conditionals are numbered
+        self.ntypes = len(self.type_ids)
+        self.nclasses = len(self.class_ids)
+        self.nslots = 1 + 2 * len(self.cond_ids)
+
+        added = set()
+        removed = set()
+        modified = []
+
+        for lo, hi in self._partitions(counts):
+            self.log.debug("Diffing {0} rules with source types {1}-{2} of {3}".format(
+                self.ruletype, lo, hi - 1, self.ntypes))
+
+            left_table = self.left.expand(lo, hi)
+            right_table = self.right.expand(lo, hi)
+            self._merge(left_table, right_table, added, removed, modified)
+
+        return added, removed, modified
+
+    #
+    # Internal functions
+    #
+    def _merge(self, left_table, right_table, added, removed, modified):
+        """Merge the sorted keys of a partition of both policies."""
+        left_keys = sorted(left_table)
+        right_keys = sorted(right_table)
+        left_len = len(left_keys)
+        right_len = len(right_keys)
+        left_pos = right_pos = 0
+
+        while left_pos < left_len or right_pos < right_len:
+            if right_pos == right_len or \
+                    (left_pos < left_len and left_keys[left_pos] < right_keys[right_pos]):
+                key = left_keys[left_pos]
+                removed.add(self.left.rule(key, left_table[key]))
+                left_pos += 1
+            elif left_pos == left_len or right_keys[right_pos] < left_keys[left_pos]:
+                key = right_keys[right_pos]
+                added.add(self.right.rule(key, right_table[key]))
+                right_pos += 1
+            else:
+                key = left_keys[left_pos]
+                left_perms = left_table[key] >> 32
+                right_perms = right_table[key] >> 32
+                if left_perms != right_perms:
+                    tclass = self._unpack(key)[2]
+                    modified.append(modified_avrule_record(
+                        self.left.rule(key, left_table[key]),
+                        self._perm_names(tclass, right_perms & ~left_perms),
+                        self._perm_names(tclass, left_perms & ~right_perms),
+                        self._perm_names(tclass, left_perms & right_perms)))
+
+                left_pos += 1
+                right_pos += 1
+
+    def _partitions(self, counts):
+        """Generate (low, high) source type ranges that fit in the budget."""
+        limit = max(1, self.budget // self.entry_size)
+        lo = 0
+        total = 0
+        for source, count in enumerate(counts):
+            if total and total + count > limit:
+                yield lo, source
+                lo = source
+                total = 0
+
+            total += count
+
+        if total:
+            yield lo, len(counts)
+
+    def _perm_names(self, tclass, perms):
+        """Get the set of permission names of a shared permission bitmask."""
+        names = self.class_perms[tclass]
+        return set(names[bit] for bit in range(len(names)) if perms & (1 << bit))
+
+    def _pack(self, source, target, tclass, slot):
+        return ((source * self.ntypes + target) * self.nclasses + tclass) * self.nslots + slot
+
+    def _unpack(self, key):
+        key, slot = divmod(key, self.nslots)
+        key, tclass = divmod(key, self.nclasses)
+        source, target = divmod(key, self.ntypes)
+        return source, target, tclass, slot
+
+
+class _AVRuleStreamSide:
+
+    """
+    One policy's access vector rules in an AVRuleStreamDiff.
+
+    The rules are read from the integer columns of the policy's
+    terule_array(), so rule objects are only created for the
+    rules in the results.
+    """
+
+    # the terule_array() columns used by the diff
+    columns = (("source", "H"),
+               ("target", "H"),
+               ("tclass", "H"),
+               ("data", "L"),
+               ("cond", "L"),
+               ("block", "B"))
+
+    def __init__(self, diff, policy):
+        self.diff = diff
+        self.policy = policy
+
+        # copy the columns of the rules of the rule type
+        terules = policy.terule_array()
+        rules = terules.rules
+        ruletype = diff.ruletype.value
+        if isinstance(rules, dict):
+            # array.array columns, as NumPy is not installed
+            columns = [array(typecode) for _, typecode in self.columns]
+            for row in zip(rules["ruletype"], *(rules[name] for name, _ in self.columns)):
+                if row[0] == ruletype:
+                    for column, value in zip(columns, row[1:]):
+                        column.append(value)
+        else:
+            rules = rules[rules["ruletype"] == ruletype]
+            columns = [array(typecode, rules[name].tolist()) for name, typecode in self.columns]
+
+        self.source_col, self.target_col, self.tclass_col, self.data_col, self.cond_col, \
+            self.block_col = columns
+        self.type_names = terules.types
+        self.class_names = terules.classes
+
+        # local policy values to shared numbers
+        self.expansions = {}
+        self.class_ids = {}
+        self.perm_masks = {}
+
+        # shared type numbers to types, for creating result rules
+        self.types = {}
+
+        # conditional slot of each rule: 0 for unconditional, otherwise
+        # 1 + 2 * conditional number + conditional block.
+        self.slots = array("L")
+
+    def count(self, counts):
+        """
+        Add the number of expanded rules of each shared source type
+        to counts.  This also numbers the conditional expressions.
+        """
+        cond_ids = self.diff.cond_ids
+        conditionals = None
+        cond_slots = {}
+
+        for source, target, cond, block in zip(self.source_col, self.target_col,
+                                               self.cond_col, self.block_col):
+            ntargets = len(self._expand(target))
+            for source_id in self._expand(source):
+                counts[source_id] += ntargets
+
+            if not cond:
+                self.slots.append(0)
+                continue
+
+            try:
+                cond_id = cond_slots[cond]
+            except KeyError:
+                if conditionals is None:
+                    # conditional IDs are numbered from 1 in policy order
+                    conditionals = [None]
+                    conditionals.extend(self.policy.conditionals())
+
+                cond_id = cond_slots[cond] = cond_ids.setdefault(conditionals[cond].canonical,
+                                                                 len(cond_ids))
+
+            self.slots.append(1 + 2 * cond_id + block)
+
+    def expand(self, lo, hi):
+        """
+        Expand the rules with source types in the shared type range [lo, hi).
+
+        Return:     A dictionary of rule key to (permission mask << 32 | rule position).
+                    The rule position is of the first rule with the key.
+        """
+        diff = self.diff
+        ntypes = diff.ntypes
+        nclasses = diff.nclasses
+        nslots = diff.nslots
+        table = {}
+
+        for pos, (source, target, tclass, data, slot) in enumerate(zip(
+                self.source_col, self.target_col, self.tclass_col, self.data_col, self.slots)):
+            sources = self._expand(source)
+            start = bisect_left(sources, lo)
+            if start == len(sources) or sources[start] >= hi:
+                continue
+
+            targets = self._expand(target)
+            perms = self._perm_mask(tclass, data) << 32
+            tclass = self._class_id(tclass)
+
+            for source in sources[start:bisect_left(sources, hi, start)]:
+                base = source * ntypes
+                for target in targets:
+                    key = ((base + target) * nclasses + tclass) * nslots + slot
+                    try:
+                        table[key] |= perms
+                    except KeyError:
+                        table[key] = perms | pos
+
+        return table
+
+    def rule(self, key, value):
+        """Create the expanded rule for a key and table value."""
+        source, target, tclass, _ = self.diff._unpack(key)
+        pos = value & 0xffffffff
+        cond = self.cond_col[pos]
+
+        # look up the rule by its SELinuxPolicy.terule_key()
+        rule = self.policy.lookup_terule((
+            self.diff.ruletype.value, self.source_col[pos], self.target_col[pos],
+            self.tclass_col[pos], 0, 1 + 2 * (cond - 1) + self.block_col[pos] if cond else 0,
+            None))
+
+        rule = next(rule.expand())
+        rule.source = self.types[source]
+        rule.target = self.types[target]
+        rule.perms = self.diff._perm_names(tclass, value >> 32)
+        return rule
+
+    #
+    # Internal functions
+    #
+    def _class_id(self, value):
+        try:
+            return self.class_ids[value]
+        except KeyError:
+            class_id = self.class_ids[value] = self.diff.class_ids[self.class_names[value]]
+            return class_id
+
+    def _expand(self, value):
+        """Get the sorted shared numbers of the types of a type or attribute."""
+        try:
+            return self.expansions[value]
+        except KeyError:
+            types = []
+            for type_ in self.policy.lookup_type_or_attr(self.type_names[value]).expand():
+                type_id = self.diff.type_ids[str(type_)]
+                self.types[type_id] = type_
+                types.append(type_id)
+
+            expansion = self.expansions[value] = tuple(sorted(types))
+            return expansion
+
+    def _perm_mask(self, tclass, perms):
+        """
+        Convert a rule's permission vector to a shared permission bitmask.
+        The vectors of dontaudit rules are the permissions not audited.
+        """
+        try:
+            return self.perm_masks[tclass, perms]
+        except KeyError:
+            pass
+
+        # number permissions in the shared space as they are first seen
+        class_perms = class_perm_bits(self.policy.lookup_class(self.class_names[tclass]))
+        names = self.diff.class_perms.setdefault(self._class_id(tclass), [])
+        bits = dict((n, i) for i, n in enumerate(names))
+
+        mask = 0
+        for name, bit in class_perms.items():
+            if perms & bit:
+                try:
+                    mask |= 1 << bits[name]
+                except KeyError:
+                    mask |= 1 << len(names)
+                    names.append(name)
+
+        self.perm_masks[tclass, perms] = mask
+        return mask
@@ -20,13 +20,17 @@
 
 import itertools
 import logging
+from array import array
 from collections import defaultdict, namedtuple
 from contextlib import suppress
 
 import networkx as nx
 from networkx.exception import NetworkXError, NetworkXNoPath, NodeNotFound
 
+from .csrgraph import CSRGraph, all_shortest_paths, all_simple_paths, graph_info, \
+    shortest_path, subgraph_view, validate_backend
 from .descriptors import EdgeAttrDict, EdgeAttrList
+from .graphcache import GraphCache, RuleKeys, file_digest
 from .policyrep import TERuletype
 
 __all__ = ['DomainTransitionAnalysis']
@@ -51,21 +55,52 @@ class DomainTransitionAnalysis:
 
     """Domain transition analysis."""
 
-    def __init__(self, policy, reverse=False, exclude=None):
+    def __init__(self, policy, reverse=False, exclude=None, backend="networkx", cache_dir=None):
         """
         Parameter:
-        policy   The policy to analyze.
+        policy      The policy to analyze.
+
+        Keyword Parameters:
+        reverse     (T/F) analyze transitions in to the types.
+        exclude     The types excluded from the analysis.
+        backend     The graph backend, "networkx" or the compact "csr".
+                    (default is networkx)
+        cache_dir   A directory for caching the built graph, keyed by
+                    the policy file contents.  Only used with the csr
+                    backend.  (default is no cache)
         """
         self.log = logging.getLogger(__name__)
 
         self.policy = policy
         self.exclude = exclude
         self.reverse = reverse
+        self.backend = backend
+        self.cache_dir = cache_dir
         self.rebuildgraph = True
         self.rebuildsubgraph = True
         self.G = nx.DiGraph()
         self.subG = None
 
+    @property
+    def backend(self):
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = validate_backend(backend)
+        self.rebuildgraph = True
+        self.rebuildsubgraph = True
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @cache_dir.setter
+    def cache_dir(self, directory):
+        self._cache_dir = directory
+        self.rebuildgraph = True
+        self.rebuildsubgraph = True
+
     @property
     def reverse(self):
         return self._reverse
@@ -115,7 +150,7 @@ class DomainTransitionAnalysis:
             # NodeNotFound: the type is valid but not in graph, e.g. excluded
             # NetworkXNoPath: no paths or the target type is
             # not in the graph
-            yield self.__generate_steps(nx.shortest_path(self.subG, s, t))
+            yield self.__generate_steps(shortest_path(self.subG, s, t))
 
     def all_paths(self, source, target, maxlen=2):
         """
@@ -150,7 +185,7 @@ class DomainTransitionAnalysis:
             # NodeNotFound: the type is valid but not in graph, e.g. excluded
             # NetworkXNoPath: no paths or the target type is
             # not in the graph
-            for path in nx.all_simple_paths(self.subG, s, t, maxlen):
+            for path in all_simple_paths(self.subG, s, t, maxlen):
                 yield self.__generate_steps(path)
 
     def all_shortest_paths(self, source, target):
@@ -181,7 +216,7 @@ class DomainTransitionAnalysis:
             # NodeNotFound: the type is valid but not in graph, e.g. excluded
             # NetworkXNoPath: no paths or the target type is
             # not in the graph
-            for path in nx.all_shortest_paths(self.subG, s, t):
+            for path in all_shortest_paths(self.subG, s, t):
                 yield self.__generate_steps(path)
 
     def transitions(self, type_):
@@ -232,16 +267,16 @@ class DomainTransitionAnalysis:
         if self.rebuildgraph:
             self._build_graph()
 
-        return nx.info(self.G)
+        return graph_info(self.G)
 
     #
     # Internal functions follow
     #
-    @staticmethod
-    def __generate_entrypoints(edge):
+    def __generate_entrypoints(self, edge):
         """
         Creates a list of entrypoint, execute, and
         type_transition rules for each entrypoint.
+        Excluded entrypoint types are skipped.
 
         Parameter:
         data     The dictionary of entrypoints.
@@ -254,7 +289,7 @@ class DomainTransitionAnalysis:
         trans    The list of type_transition rules.
         """
         return [entrypoint_output(e, edge.entrypoint[e], edge.execute[e], edge.type_transition[e])
-                for e in edge.entrypoint]
+                for e in edge.entrypoint if e not in self.exclude]
 
     def __generate_steps(self, path):
         """
@@ -351,8 +386,19 @@ class DomainTransitionAnalysis:
     #      lists on the edge.
     #
     def _build_graph(self):
-        self.G.clear()
-        self.G.name = "Domain transition graph for {0}.".format(self.policy)
+        name = "Domain transition graph for {0}.".format(self.policy)
+
+        cache, cache_key = self._graph_cache()
+        if cache:
+            self.G = DomainTransitionCSRGraph.load(cache, cache_key, self.policy, name)
+            if self.G is not None:
+                self.rebuildgraph = False
+                self.rebuildsubgraph = True
+                return
+
+        rules = self.policy.terules()
+
+        self.G = nx.DiGraph(name=name)
 
         self.log.info("Building domain transition graph from {0}...".format(self.policy))
 
@@ -369,7 +415,7 @@ class DomainTransitionAnalysis:
         # hash table keyed on (domain, entrypoint, target domain)
         type_trans = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
 
-        for rule in self.policy.terules():
+        for rule in rules:
             if rule.ruletype == TERuletype.allow:
                 if rule.tclass not in ["process", "file"]:
                     continue
@@ -492,40 +538,38 @@ class DomainTransitionAnalysis:
             del edge.dyntransition
             del edge.setcurrent
 
+        if self.backend == "csr":
+            self.G = DomainTransitionCSRGraph.from_networkx(self.policy, self.G)
+
+            if cache:
+                self.G.save(cache, cache_key)
+
         self.rebuildgraph = False
         self.rebuildsubgraph = True
         self.log.info("Completed building domain transition graph.")
         self.log.debug("Graph stats: nodes: {0}, edges: {1}.".format(
-            nx.number_of_nodes(self.G),
-            nx.number_of_edges(self.G)))
-
-    def __remove_excluded_entrypoints(self):
-        invalid_edges = []
-        for source, target in self.subG.edges():
-            edge = Edge(self.subG, source, target)
-            entrypoints = set(edge.entrypoint)
-            entrypoints.intersection_update(self.exclude)
-
-            if not entrypoints:
-                # short circuit if there are no
-                # excluded entrypoint types on
-                # this edge.
-                continue
+            self.G.number_of_nodes(),
+            self.G.number_of_edges()))
 
-            for e in entrypoints:
-                # clear the entrypoint data
-                # pylint: disable=unsupported-delete-operation
-                del edge.entrypoint[e]
-                del edge.execute[e]
+    def _graph_cache(self):
+        """
+        Get the graph cache and the cache key for the graph.
 
-                with suppress(KeyError):  # setexec
-                    del edge.type_transition[e]
+        Return: tuple(cache, key), which are None if the cache is not used.
+        """
+        if not self.cache_dir or self.backend != "csr":
+            return None, None
 
-            # cannot delete the edges while iterating over them
-            if not edge.entrypoint and not edge.dyntransition:
-                invalid_edges.append(edge)
+        if self.policy.in_memory:
+            self.log.warning("Not caching the domain transition graph: {0} was not loaded "
+                             "from a file.".format(self.policy))
+            return None, None
 
-        self.subG.remove_edges_from(invalid_edges)
+        try:
+            return GraphCache(self.cache_dir), file_digest(self.policy.path)
+        except OSError as ex:
+            self.log.warning("Not caching the domain transition graph: {0}".format(ex))
+            return None, None
 
     def _build_subgraph(self):
         if self.rebuildgraph:
@@ -535,24 +579,27 @@ class DomainTransitionAnalysis:
         self.log.debug("Excluding {0}".format(self.exclude))
         self.log.debug("Reverse {0}".format(self.reverse))
 
-        # reverse graph for reverse DTA
-        if self.reverse:
-            self.subG = self.G.reverse(copy=True)
+        if isinstance(self.G, CSRGraph):
+            # excluded domains and entrypoints are masked in a view
+            self.subG = self.G.view(exclude=self.exclude, reverse=self.reverse)
         else:
-            self.subG = self.G.copy()
+            # reverse graph view for reverse DTA
+            G = self.G.reverse(copy=False) if self.reverse else self.G
+            excluded = frozenset(self.exclude)
+
+            def node_filter(node):
+                return node not in excluded
 
-        if self.exclude:
-            # delete excluded domains from subgraph
-            self.subG.remove_nodes_from(self.exclude)
+            def edge_filter(source, target):
+                return valid_transition(G[source][target], excluded)
 
-            # delete excluded entrypoints from subgraph
-            self.__remove_excluded_entrypoints()
+            if excluded:
+                self.subG = subgraph_view(G, filter_node=node_filter, filter_edge=edge_filter)
+            else:
+                self.subG = G
 
         self.rebuildsubgraph = False
         self.log.info("Completed building domain transition subgraph.")
-        self.log.debug("Subgraph stats: nodes: {0}, edges: {1}.".format(
-            nx.number_of_nodes(self.subG),
-            nx.number_of_edges(self.subG)))
 
 
 class Edge:
@@ -612,3 +659,185 @@ class Edge:
             return self.target
         else:
             raise IndexError("Invalid index (edges only have 2 items): {0}".format(index))
+
+
+class DomainTransitionCSRGraph(CSRGraph):
+
+    """
+    A compact domain transition graph.  The rule lists and dictionaries
+    of each edge are kept in a list indexed by edge number.  In views
+    with excluded types, edges without remaining transitions after
+    excluding the entrypoints are masked.
+
+    In the graph cache, the edge attributes are stored as rows of
+    (attribute, entrypoint type, rule) and the rules as their keys.  A
+    loaded graph decodes the attributes of an edge on first use, and
+    only looks up the rules of the decoded edges.
+
+    Parameters:
+    policy      The policy of the graph.
+    nodes       A sequence of types.
+    edges       A sequence of (source, target) node number pairs.
+    edge_data   The attribute dictionary of each edge.  Edges with None
+                are decoded from the cached rows.
+
+    Keyword Parameters:
+    name        The name of the graph.
+    """
+
+    # the name of the graph in the graph cache
+    cache_kind = "dta"
+
+    # the order of the edge attributes in the cached rows
+    list_attrs = ("transition", "setexec", "dyntransition", "setcurrent")
+    dict_attrs = ("entrypoint", "execute", "type_transition")
+
+    def __init__(self, policy, nodes, edges, edge_data, name=""):
+        super(DomainTransitionCSRGraph, self).__init__(nodes, edges, name)
+        self.policy = policy
+        self.edge_data = edge_data
+        self.excluded = frozenset()
+
+    @classmethod
+    def from_networkx(cls, policy, G):
+        """Create the graph from a NetworkX domain transition graph."""
+        nodes = list(G.nodes())
+        node_ids = dict((n, i) for i, n in enumerate(nodes))
+        edges = []
+        edge_data = []
+        for s, t, data in G.edges(data=True):
+            edges.append((node_ids[s], node_ids[t]))
+            edge_data.append(data)
+
+        return cls(policy, nodes, edges, edge_data, G.name)
+
+    @classmethod
+    def load(cls, cache, key, policy, name=""):
+        """
+        Load the graph from the graph cache.
+
+        Parameters:
+        cache       The GraphCache.
+        key         The cache key of the graph.
+        policy      The policy of the graph.
+
+        Keyword Parameters:
+        name        The name of the graph.
+
+        Return:     The graph, or None if it is not cached.
+        """
+        cached = cache.load(cls.cache_kind, key)
+        if cached is None:
+            return None
+
+        metadata, arrays = cached
+        types = [policy.lookup_type(n) for n in metadata["types"]]
+        g = cls.from_arrays(types[:metadata["nodes"]], arrays, name)
+        g.policy = policy
+        g.edge_data = [None] * (len(arrays["row_ptr"]) - 1)
+        g.excluded = frozenset()
+        g._rows = (types, arrays["row_ptr"], arrays["row_attr"], arrays["row_key"],
+                   RuleKeys(policy, arrays, metadata["filenames"]))
+        return g
+
+    def save(self, cache, key):
+        """
+        Save the graph to the graph cache.
+
+        Parameters:
+        cache       The GraphCache.
+        key         The cache key of the graph.
+        """
+        # entrypoint types are numbered after the nodes
+        type_ids = dict((n, i) for i, n in enumerate(self._nodes))
+        types = list(self._nodes)
+
+        row_ptr = array("L", [0])
+        row_attr = array("B")
+        row_key = array("L")
+        row_rules = []
+
+        def add_rows(attr, type_id, rules):
+            for rule in rules:
+                row_attr.append(attr)
+                row_key.append(type_id)
+                row_rules.append(rule)
+
+        for edge in range(len(self.edge_data)):
+            data = self.edge_attrs(edge)
+
+            for attr, name in enumerate(self.list_attrs):
+                add_rows(attr, 0, data[name])
+
+            for attr, name in enumerate(self.dict_attrs, len(self.list_attrs)):
+                for type_, rules in data[name].items():
+                    try:
+                        type_id = type_ids[type_]
+                    except KeyError:
+                        type_id = type_ids[type_] = len(types)
+                        types.append(type_)
+
+                    add_rows(attr, type_id, rules)
+
+            row_ptr.append(len(row_attr))
+
+        rule_keys, filenames = RuleKeys.encode(self.policy, row_rules)
+
+        arrays = self.arrays()
+        arrays.update(rule_keys)
+        arrays["row_ptr"] = row_ptr
+        arrays["row_attr"] = row_attr
+        arrays["row_key"] = row_key
+        cache.save(self.cache_kind, key, {"nodes": len(self._nodes),
+                                          "types": [str(t) for t in types],
+                                          "filenames": filenames}, arrays)
+
+    def edge_attrs(self, edge):
+        data = self.edge_data[edge]
+        if data is None:
+            # views share the edge data list, so
+            # the decoded attributes are shared.
+            data = self.edge_data[edge] = self._decode(edge)
+
+        return data
+
+    def view(self, exclude=None, reverse=False):
+        v = super(DomainTransitionCSRGraph, self).view(exclude, reverse)
+        v.excluded = frozenset(exclude or ())
+        return v
+
+    def _decode(self, edge):
+        types, row_ptr, row_attr, row_key, rules = self._rows
+
+        data = dict((name, []) for name in self.list_attrs)
+        data.update((name, defaultdict(list)) for name in self.dict_attrs)
+        attrs = self.list_attrs + self.dict_attrs
+        nlist = len(self.list_attrs)
+
+        for row in range(row_ptr[edge], row_ptr[edge + 1]):
+            attr = row_attr[row]
+            if attr < nlist:
+                data[attrs[attr]].append(rules[row])
+            else:
+                data[attrs[attr]][types[row_key[row]]].append(rules[row])
+
+        return data
+
+    def _edge_ok(self, edge):
+        return not self.excluded or valid_transition(self.edge_attrs(edge), self.excluded)
+
+
+def valid_transition(data, excluded):
+    """
+    Determine if an edge still has a transition when
+    the excluded types are not used as entrypoints.
+
+    Parameters:
+    data        The edge's attribute dictionary.
+    excluded    The set of excluded types.
+    """
+    entrypoints = data["entrypoint"].keys()
+    if not excluded.intersection(entrypoints):
+        return True
+
+    return bool(entrypoints - excluded) or bool(data["dyntransition"])
@@ -18,12 +18,12 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .mixins import MatchContext
 from .policyrep import FSUseRuletype
-from .query import PolicyQuery
-from .util import match_regex
+from .query import PolicyQuery, member_predicate, regex_predicate
 
 
 class FSUseQuery(MatchContext, PolicyQuery):
@@ -74,17 +74,18 @@ class FSUseQuery(MatchContext, PolicyQuery):
         self.log.debug("FS: {0.fs!r}, regex: {0.fs_regex}".format(self))
         self._match_context_debug(self.log)
 
-        for fsu in self.policy.fs_uses():
-            if self.ruletype and fsu.ruletype not in self.ruletype:
-                continue
+        yield from self.plan().results()
 
-            if self.fs and not match_regex(
-                    fsu.fs,
-                    self.fs,
-                    self.fs_regex):
-                continue
+    def _candidates(self):
+        return self.policy.fs_uses()
 
-            if not self._match_context(fsu.context):
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            yield fsu
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
+
+        if self.fs:
+            predicates.append(regex_predicate(attrgetter("fs"), self.fs, self.fs_regex))
+
+        return predicates
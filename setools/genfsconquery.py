@@ -18,11 +18,11 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor
 from .mixins import MatchContext
-from .query import PolicyQuery
-from .util import match_regex
+from .query import PolicyQuery, equal_predicate, regex_predicate
 
 
 class GenfsconQuery(MatchContext, PolicyQuery):
@@ -78,23 +78,21 @@ class GenfsconQuery(MatchContext, PolicyQuery):
         self.log.debug("Filetype: {0.filetype!r}".format(self))
         self._match_context_debug(self.log)
 
-        for genfs in self.policy.genfscons():
-            if self.fs and not match_regex(
-                    genfs.fs,
-                    self.fs,
-                    self.fs_regex):
-                continue
+        yield from self.plan().results()
 
-            if self.path and not match_regex(
-                    genfs.path,
-                    self.path,
-                    self.path_regex):
-                continue
+    def _candidates(self):
+        return self.policy.genfscons()
 
-            if self.filetype and not self.filetype == genfs.filetype:
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            if not self._match_context(genfs.context):
-                continue
+        if self.fs:
+            predicates.append(regex_predicate(attrgetter("fs"), self.fs, self.fs_regex))
 
-            yield genfs
+        if self.path:
+            predicates.append(regex_predicate(attrgetter("path"), self.path, self.path_regex))
+
+        if self.filetype:
+            predicates.append(equal_predicate(attrgetter("filetype"), self.filetype))
+
+        return predicates
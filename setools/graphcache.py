@@ -0,0 +1,271 @@
+# Copyright 2018, Chris PeBenito <pebenito@ieee.org>
+#
+# This file is part of SETools.
+#
+# SETools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1 of
+# the License, or (at your option) any later version.
+#
+# SETools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with SETools.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from contextlib import suppress
+
+__all__ = ['GraphCache', 'RuleKeys']
+
+# File format:
+#
+# magic          8 bytes
+# header length  unsigned 64-bit little endian
+# header         JSON: {"metadata": {...},
+#                       "arrays": [[name, typecode, itemsize, offset, count], ...]}
+# array data     each array starts on an 8 byte boundary.  Offsets
+#                are from the start of the file.
+magic = b"SETGRPH2"
+preamble = struct.Struct("<8sQ")
+alignment = 8
+
+
+class GraphCache:
+
+    """
+    An on-disk cache of built analysis graphs.
+
+    Each graph is stored in one file as a set of named integer
+    arrays, plus JSON metadata.  The arrays are memory-mapped when
+    the graph is loaded, so they are not read or copied until used.
+
+    Parameter:
+    directory   The cache directory.  It is created if needed.
+    """
+
+    def __init__(self, directory):
+        self.log = logging.getLogger(__name__)
+        self.directory = directory
+
+    def __repr__(self):
+        return "<GraphCache({0!r})>".format(self.directory)
+
+    def load(self, kind, key):
+        """
+        Load a graph from the cache.
+
+        Parameters:
+        kind        The kind of graph, e.g. "infoflow".
+        key         The cache key of the graph.
+
+        Return: tuple(metadata, arrays) or None if the graph is not cached.
+        metadata    The graph's metadata dictionary.
+        arrays      A dictionary of array name to a memoryview of the array.
+        """
+        path = self._path(kind, key)
+
+        try:
+            with open(path, "rb") as fd:
+                mapping = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # ValueError: empty file
+            return None
+
+        try:
+            file_magic, header_len = preamble.unpack_from(mapping)
+            if file_magic != magic:
+                raise ValueError("Bad magic.")
+
+            header = json.loads(mapping[preamble.size:preamble.size + header_len].decode())
+
+            view = memoryview(mapping)
+            arrays = {}
+            for name, typecode, itemsize, offset, count in header["arrays"]:
+                if array(typecode).itemsize != itemsize:
+                    raise ValueError("Array {0} has a different item size on this system.".
+                                     format(name))
+
+                if offset + itemsize * count > len(mapping):
+                    raise ValueError("Array {0} is truncated.".format(name))
+
+                arrays[name] = view[offset:offset + itemsize * count].cast(typecode)
+
+        except (ValueError, KeyError, TypeError, struct.error) as ex:
+            self.log.warning("Ignoring invalid graph cache file {0}: {1}".format(path, ex))
+            return None
+
+        self.log.info("Loaded {0} graph from cache file {1}".format(kind, path))
+        return header["metadata"], arrays
+
+    def save(self, kind, key, metadata, arrays):
+        """
+        Save a graph to the cache.  Failures are logged but not raised,
+        since the cache is only an optimization.
+
+        Parameters:
+        kind        The kind of graph, e.g. "infoflow".
+        key         The cache key of the graph.
+        metadata    A dictionary of JSON-serializable graph metadata.
+        arrays      A dictionary of array name to array.array.
+        """
+        path = self._path(kind, key)
+
+        table = []
+        header = {"metadata": metadata, "arrays": table}
+        relative = []
+        offset = 0
+        for name, data in sorted(arrays.items()):
+            table.append([name, data.typecode, data.itemsize, 0, len(data)])
+            relative.append(offset)
+            offset += self._aligned(data.itemsize * len(data))
+
+        # the array offsets depend on the header length, so reserve
+        # space for the header, and pad it with whitespace if the
+        # encoded header is shorter.
+        header_len = len(json.dumps(header).encode()) + 20 * len(table)
+        while True:
+            start = self._aligned(preamble.size + header_len)
+            for entry, rel in zip(table, relative):
+                entry[3] = start + rel
+
+            encoded = json.dumps(header).encode()
+            if len(encoded) <= header_len:
+                encoded += b" " * (header_len - len(encoded))
+                break
+
+            header_len = len(encoded)
+
+        tmp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".{0}-".format(kind))
+            with os.fdopen(fd, "wb") as out:
+                out.write(preamble.pack(magic, len(encoded)))
+                out.write(encoded)
+                for name, _, _, offset, _ in table:
+                    out.write(b"\0" * (offset - out.tell()))
+                    out.write(arrays[name])
+
+            # replace atomically, so concurrent
+            # readers never see a partial file
+            os.replace(tmp_path, path)
+        except OSError as ex:
+            self.log.warning("Unable to save {0} graph to cache file {1}: {2}".
+                             format(kind, path, ex))
+            if tmp_path:
+                with suppress(OSError):
+                    os.unlink(tmp_path)
+
+            return
+
+        self.log.info("Saved {0} graph to cache file {1}".format(kind, path))
+
+    #
+    # Internal functions
+    #
+    @staticmethod
+    def _aligned(size):
+        return (size + alignment - 1) // alignment * alignment
+
+    def _path(self, kind, key):
+        return os.path.join(self.directory, "{0}-{1}.graph".format(kind, key))
+
+
+class RuleKeys:
+
+    """
+    The TE rules of a cached graph, stored as integer arrays of the rule
+    keys from SELinuxPolicy.terule_key().  Each rule is looked up in the
+    policy when it is first used, so the other rules of the policy are
+    not created.
+
+    Parameters:
+    policy      The policy of the rules.
+    arrays      A dictionary of array name to array, including
+                the key arrays from encode().
+    filenames   The list of filenames from encode().
+    """
+
+    # the names and typecodes of the key arrays,
+    # in the order of the fields of the rule keys.
+    key_arrays = (("rule_type", "H"),
+                  ("rule_source", "H"),
+                  ("rule_target", "H"),
+                  ("rule_class", "H"),
+                  ("rule_xperms", "H"),
+                  ("rule_cond", "L"),
+                  ("rule_filename", "L"))
+
+    def __init__(self, policy, arrays, filenames):
+        self.policy = policy
+        self.columns = [arrays[name] for name, _ in self.key_arrays]
+        self.filenames = filenames
+        self.rules = {}
+
+    def __getitem__(self, pos):
+        try:
+            return self.rules[pos]
+        except KeyError:
+            key = [column[pos] for column in self.columns]
+            # filenames are numbered from 1, 0 is no filename
+            key[-1] = self.filenames[key[-1] - 1] if key[-1] else None
+            rule = self.rules[pos] = self.policy.lookup_terule(key)
+            return rule
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    @classmethod
+    def encode(cls, policy, rules):
+        """
+        Encode TE rules as arrays of their keys.
+
+        Parameters:
+        policy      The policy of the rules.
+        rules       An iterable of TE rules.
+
+        Return: tuple(arrays, filenames)
+        arrays      A dictionary of array name to array.array of the keys.
+        filenames   The list of the filenames of the rules.
+        """
+        columns = [array(typecode) for _, typecode in cls.key_arrays]
+        filename_ids = {}
+
+        for rule in rules:
+            key = list(policy.terule_key(rule))
+            if key[-1] is not None:
+                key[-1] = filename_ids.setdefault(key[-1], len(filename_ids) + 1)
+            else:
+                key[-1] = 0
+
+            for column, value in zip(columns, key):
+                column.append(value)
+
+        return dict((name, column) for (name, _), column in zip(cls.key_arrays, columns)), \
+            list(filename_ids)
+
+
+def file_digest(path):
+    """Get the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def json_digest(data):
+    """Get the SHA-256 hex digest of JSON-serializable data."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
@@ -18,12 +18,16 @@
 #
 import itertools
 import logging
+from array import array
 from contextlib import suppress
 
 import networkx as nx
 from networkx.exception import NetworkXError, NetworkXNoPath, NodeNotFound
 
+from .csrgraph import CSRGraph, all_shortest_paths, all_simple_paths, graph_info, \
+    shortest_path, subgraph_view, validate_backend
 from .descriptors import EdgeAttrIntMax, EdgeAttrList
+from .graphcache import GraphCache, RuleKeys, file_digest, json_digest
 from .policyrep import TERuletype
 
 __all__ = ['InfoFlowAnalysis']
@@ -33,7 +37,8 @@ class InfoFlowAnalysis:
 
     """Information flow analysis."""
 
-    def __init__(self, policy, perm_map, min_weight=1, exclude=None):
+    def __init__(self, policy, perm_map, min_weight=1, exclude=None, backend="networkx",
+                 cache_dir=None):
         """
         Parameters:
         policy      The policy to analyze.
@@ -42,6 +47,11 @@ class InfoFlowAnalysis:
                     (default is 1)
         exclude     The types excluded from the information flow analysis.
                     (default is none)
+        backend     The graph backend, "networkx" or the compact "csr".
+                    (default is networkx)
+        cache_dir   A directory for caching the built graph, keyed by
+                    the policy file and permission map contents.  Only
+                    used with the csr backend.  (default is no cache)
         """
         self.log = logging.getLogger(__name__)
 
@@ -50,12 +60,34 @@ class InfoFlowAnalysis:
         self.min_weight = min_weight
         self.perm_map = perm_map
         self.exclude = exclude
+        self.backend = backend
+        self.cache_dir = cache_dir
         self.rebuildgraph = True
         self.rebuildsubgraph = True
 
         self.G = nx.DiGraph()
         self.subG = None
 
+    @property
+    def backend(self):
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = validate_backend(backend)
+        self.rebuildgraph = True
+        self.rebuildsubgraph = True
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @cache_dir.setter
+    def cache_dir(self, directory):
+        self._cache_dir = directory
+        self.rebuildgraph = True
+        self.rebuildsubgraph = True
+
     @property
     def min_weight(self):
         return self._min_weight
@@ -123,7 +155,7 @@ class InfoFlowAnalysis:
             # excluded or disconnected due to min weight
             # NetworkXNoPath: no paths or the target type is
             # not in the graph
-            yield self.__generate_steps(nx.shortest_path(self.subG, s, t))
+            yield self.__generate_steps(shortest_path(self.subG, s, t))
 
     def all_paths(self, source, target, maxlen=2):
         """
@@ -162,7 +194,7 @@ class InfoFlowAnalysis:
             # excluded or disconnected due to min weight
             # NetworkXNoPath: no paths or the target type is
             # not in the graph
-            for path in nx.all_simple_paths(self.subG, s, t, maxlen):
+            for path in all_simple_paths(self.subG, s, t, maxlen):
                 yield self.__generate_steps(path)
 
     def all_shortest_paths(self, source, target):
@@ -196,7 +228,7 @@ class InfoFlowAnalysis:
             # excluded or disconnected due to min weight
             # NetworkXNoPath: no paths or the target type is
             # not in the graph
-            for path in nx.all_shortest_paths(self.subG, s, t):
+            for path in all_shortest_paths(self.subG, s, t):
                 yield self.__generate_steps(path)
 
     def infoflows(self, type_, out=True):
@@ -247,7 +279,7 @@ class InfoFlowAnalysis:
         if self.rebuildgraph:
             self._build_graph()
 
-        return nx.info(self.G)
+        return graph_info(self.G)
 
     #
     # Internal functions follow
@@ -276,49 +308,138 @@ class InfoFlowAnalysis:
     #
     #
     # 1. _build_graph determines the flow in each direction for each TE
-    #    rule and then expands the rule.  All information flows are
+    #    rule and then expands the rule.  This works on the integer
+    #    columns of the policy's TE rule index, with the rule weights
+    #    calculated from per-class permission bitmask tables, and the
+    #    graph is loaded in one pass at the end.  All information flows are
     #    included in this main graph: memory is traded off for efficiency
     #    as the main graph should only need to be rebuilt if permission
-    #    weights change.
-    # 2. _build_subgraph derives a subgraph which removes all excluded
+    #    weights change.  With the csr backend, the main graph can be
+    #    loaded from, and is saved to, the graph cache.
+    # 2. _build_subgraph derives a subgraph view which hides all excluded
     #    types (nodes) and edges (information flows) which are below the
-    #    minimum weight. This subgraph is rebuilt only if the main graph
-    #    is rebuilt or the minimum weight or excluded types change.
+    #    minimum weight.  The main graph is not modified or copied, so
+    #    the view is cheap to recreate when the minimum weight or
+    #    excluded types change.
 
     def _build_graph(self):
-        self.G.clear()
-        self.G.name = "Information flow graph for {0}.".format(self.policy)
+        name = "Information flow graph for {0}.".format(self.policy)
 
         self.perm_map.map_policy(self.policy)
 
+        cache, cache_key = self._graph_cache()
+        if cache:
+            self.G = InfoFlowCSRGraph.load(cache, cache_key, self.policy, name)
+            if self.G is not None:
+                self.rebuildgraph = False
+                self.rebuildsubgraph = True
+                return
+
         self.log.info("Building information flow graph from {0}...".format(self.policy))
 
-        for rule in self.policy.terules():
-            if rule.ruletype != TERuletype.allow:
-                continue
+        index = self.policy.terule_index()
 
-            (rweight, wweight) = self.perm_map.rule_weight(rule)
+        # per-class permission weight tables and a memo of
+        # permission vector weights, keyed by class value
+        weight_tables = {}
+        vector_weights = {}
+
+        # information flows keyed by (source, target) type values.
+        # Each value is [weight, rule positions in the index].
+        flows = {}
+
+        def add_flow(source, target, weight, pos):
+            try:
+                flow = flows[source, target]
+            except KeyError:
+                flows[source, target] = [weight, [pos]]
+            else:
+                flow[0] = max(flow[0], weight)
+                flow[1].append(pos)
+
+        source_col = index.source_col
+        target_col = index.target_col
+        tclass_col = index.tclass_col
+        perms_col = index.perms_col
+
+        for pos in index.positions(TERuletype.allow):
+            tclass = tclass_col[pos]
+            perms = perms_col[pos]
+
+            try:
+                rweight, wweight = vector_weights[tclass, perms]
+            except KeyError:
+                try:
+                    table = weight_tables[tclass]
+                except KeyError:
+                    table = self.perm_map.weight_table(str(index.tclass(tclass)),
+                                                       index.class_perms(tclass))
+                    weight_tables[tclass] = table
+
+                # the weight in each direction is the
+                # largest-weight permission in that direction
+                rweight = max((r for bit, r, _ in table if perms & bit), default=0)
+                wweight = max((w for bit, _, w in table if perms & bit), default=0)
+                vector_weights[tclass, perms] = (rweight, wweight)
+
+            if not (rweight or wweight):
+                continue
 
-            for s, t in itertools.product(rule.source.expand(), rule.target.expand()):
+            for s, t in itertools.product(index.expand_type(source_col[pos]),
+                                          index.expand_type(target_col[pos])):
                 # only add flows if they actually flow
                 # in or out of the source type type
                 if s != t:
                     if wweight:
-                        edge = Edge(self.G, s, t, create=True)
-                        edge.rules.append(rule)
-                        edge.weight = wweight
+                        add_flow(s, t, wweight, pos)
 
                     if rweight:
-                        edge = Edge(self.G, t, s, create=True)
-                        edge.rules.append(rule)
-                        edge.weight = rweight
+                        add_flow(t, s, rweight, pos)
+
+        if self.backend == "csr":
+            self.G = InfoFlowCSRGraph.from_flows(self.policy, index, flows, name)
+
+            if cache:
+                self.G.save(cache, cache_key)
+        else:
+            # load the flows into the graph in one pass.  Use capacity to
+            # store the info flow weight; see the Edge class below.
+            types = dict((v, index.type_(v)) for v in set(itertools.chain.from_iterable(flows)))
+            self.G = nx.DiGraph(name=name)
+            self.G.add_edges_from((types[s], types[t], {"rules": [index[p] for p in positions],
+                                                        "capacity": weight,
+                                                        "weight": 1})
+                                  for (s, t), (weight, positions) in flows.items())
 
         self.rebuildgraph = False
         self.rebuildsubgraph = True
         self.log.info("Completed building information flow graph.")
         self.log.debug("Graph stats: nodes: {0}, edges: {1}.".format(
-            nx.number_of_nodes(self.G),
-            nx.number_of_edges(self.G)))
+            self.G.number_of_nodes(),
+            self.G.number_of_edges()))
+
+    def _graph_cache(self):
+        """
+        Get the graph cache and the cache key for the graph.
+
+        Return: tuple(cache, key), which are None if the cache is not used.
+        """
+        if not self.cache_dir or self.backend != "csr":
+            return None, None
+
+        if self.policy.in_memory:
+            self.log.warning("Not caching the information flow graph: {0} was not loaded "
+                             "from a file.".format(self.policy))
+            return None, None
+
+        try:
+            policy_digest = file_digest(self.policy.path)
+        except OSError as ex:
+            self.log.warning("Not caching the information flow graph: {0}".format(ex))
+            return None, None
+
+        return GraphCache(self.cache_dir), "{0}-{1}".format(policy_digest,
+                                                            json_digest(self.perm_map.permmap))
 
     def _build_subgraph(self):
         if self.rebuildgraph:
@@ -328,27 +449,29 @@ class InfoFlowAnalysis:
         self.log.debug("Excluding {0!r}".format(self.exclude))
         self.log.debug("Min weight {0}".format(self.min_weight))
 
-        # delete excluded types from subgraph
-        nodes = [n for n in self.G.nodes() if n not in self.exclude]
-        self.subG = self.G.subgraph(nodes).copy()
+        if isinstance(self.G, CSRGraph):
+            # excluded types and low-weight edges are masked in a view
+            self.subG = self.G.view(exclude=self.exclude)
+            self.subG.min_weight = self.min_weight
+        else:
+            G = self.G
+            excluded = frozenset(self.exclude)
+            min_weight = self.min_weight
 
-        # delete edges below minimum weight.
-        # no need if weight is 1, since that
-        # does not exclude any edges.
-        if self.min_weight > 1:
-            delete_list = []
-            for s, t in self.subG.edges():
-                edge = Edge(self.subG, s, t)
-                if edge.weight < self.min_weight:
-                    delete_list.append(edge)
+            def node_filter(node):
+                return node not in excluded
 
-            self.subG.remove_edges_from(delete_list)
+            def edge_filter(source, target):
+                return G[source][target]["capacity"] >= min_weight
+
+            # no need to filter edges if weight is 1,
+            # since that does not exclude any edges.
+            filter_edge = edge_filter if min_weight > 1 else nx.filters.no_filter
+
+            self.subG = subgraph_view(G, filter_node=node_filter, filter_edge=filter_edge)
 
         self.rebuildsubgraph = False
         self.log.info("Completed building information flow subgraph.")
-        self.log.debug("Subgraph stats: nodes: {0}, edges: {1}.".format(
-            nx.number_of_nodes(self.subG),
-            nx.number_of_edges(self.subG)))
 
 
 class Edge:
@@ -404,3 +527,135 @@ class Edge:
             return self.target
         else:
             raise IndexError("Invalid index (edges only have 2 items): {0}".format(index))
+
+
+class InfoFlowCSRGraph(CSRGraph):
+
+    """
+    A compact information flow graph.  The rules of the edges are
+    stored as positions in a rule table, in a single array, and each
+    edge refers to its rules by a range of the array.  The edges of a
+    view which are below the view's minimum weight are masked.
+
+    A built graph's rule table is the policy's TE rule index.  In the
+    graph cache, the rules are stored as their keys, so a loaded graph
+    only looks up the rules of the edges which are used.
+
+    Parameters:
+    policy      The policy of the graph.
+    nodes       A sequence of types.
+    edges       A sequence of (source, target) node number pairs.
+    weights     The information flow weight of each edge.
+    rule_table  A sequence of TE rules.
+    rules       The rule table positions of the rules of all edges.
+    rule_ptr    The start of each edge's rules in the rules array.  This
+                has one more entry than the edges, for the end of the
+                last edge's rules.
+
+    Keyword Parameters:
+    name        The name of the graph.
+    """
+
+    # the name of the graph in the graph cache
+    cache_kind = "infoflow"
+
+    def __init__(self, policy, nodes, edges, weights, rule_table, rules, rule_ptr, name=""):
+        super(InfoFlowCSRGraph, self).__init__(nodes, edges, name)
+        self._init_flows(policy, weights, rule_table, rules, rule_ptr)
+
+    @classmethod
+    def from_flows(cls, policy, index, flows, name=""):
+        """
+        Create the graph from information flows.
+
+        Parameters:
+        policy      The policy of the graph.
+        index       The policy's TE rule index.
+        flows       A dictionary of (source, target) type values to
+                    [weight, rule positions] of the information flow.
+
+        Keyword Parameters:
+        name        The name of the graph.
+        """
+        node_ids = {}
+        nodes = []
+        edges = []
+        weights = array("B")
+        rules = array("L")
+        rule_ptr = array("L", [0])
+
+        for (s, t), (weight, positions) in flows.items():
+            for value in (s, t):
+                if value not in node_ids:
+                    node_ids[value] = len(nodes)
+                    nodes.append(index.type_(value))
+
+            edges.append((node_ids[s], node_ids[t]))
+            weights.append(weight)
+            rules.extend(positions)
+            rule_ptr.append(len(rules))
+
+        return cls(policy, nodes, edges, weights, index, rules, rule_ptr, name)
+
+    @classmethod
+    def load(cls, cache, key, policy, name=""):
+        """
+        Load the graph from the graph cache.
+
+        Parameters:
+        cache       The GraphCache.
+        key         The cache key of the graph.
+        policy      The policy of the graph.
+
+        Keyword Parameters:
+        name        The name of the graph.
+
+        Return:     The graph, or None if it is not cached.
+        """
+        cached = cache.load(cls.cache_kind, key)
+        if cached is None:
+            return None
+
+        metadata, arrays = cached
+        g = cls.from_arrays([policy.lookup_type(n) for n in metadata["nodes"]], arrays, name)
+        rule_table = RuleKeys(policy, arrays, metadata["filenames"])
+        g._init_flows(policy, arrays["weights"], rule_table, range(len(rule_table)),
+                      arrays["rule_ptr"])
+        return g
+
+    def save(self, cache, key):
+        """
+        Save the graph to the graph cache.
+
+        Parameters:
+        cache       The GraphCache.
+        key         The cache key of the graph.
+        """
+        rule_keys, filenames = RuleKeys.encode(self.policy,
+                                               (self.rule_table[p] for p in self.rules))
+
+        arrays = self.arrays()
+        arrays.update(rule_keys)
+        arrays["weights"] = self.weights
+        arrays["rule_ptr"] = self.rule_ptr
+        cache.save(self.cache_kind, key, {"nodes": [str(n) for n in self._nodes],
+                                          "filenames": filenames}, arrays)
+
+    def edge_attrs(self, edge):
+        # same attributes as the NetworkX graph edges.
+        rule_table = self.rule_table
+        return {"rules": [rule_table[p] for p in self.rules[self.rule_ptr[edge]:
+                                                            self.rule_ptr[edge + 1]]],
+                "capacity": self.weights[edge],
+                "weight": 1}
+
+    def _edge_ok(self, edge):
+        return self.weights[edge] >= self.min_weight
+
+    def _init_flows(self, policy, weights, rule_table, rules, rule_ptr):
+        self.policy = policy
+        self.weights = weights
+        self.rule_table = rule_table
+        self.rules = rules
+        self.rule_ptr = rule_ptr
+        self.min_weight = 1
@@ -64,11 +64,10 @@ class InitialSIDQuery(MatchName, MatchContext, PolicyQuery):
         self._match_name_debug(self.log)
         self._match_context_debug(self.log)
 
-        for i in self.policy.initialsids():
-            if not self._match_name(i):
-                continue
+        yield from self.plan().results()
 
-            if not self._match_context(i.context):
-                continue
+    def _candidates(self):
+        return self.policy.initialsids()
 
-            yield i
+    def _predicates(self):
+        return self._match_name_predicates() + self._match_context_predicates()
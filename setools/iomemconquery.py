@@ -17,11 +17,11 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .mixins import MatchContext
 from .policyrep import IomemconRange
-from .query import PolicyQuery
-from .util import match_range
+from .query import PolicyQuery, range_predicate
 
 
 class IomemconQuery(MatchContext, PolicyQuery):
@@ -107,18 +107,17 @@ class IomemconQuery(MatchContext, PolicyQuery):
                        "proper: {0.addr_proper}".format(self))
         self._match_context_debug(self.log)
 
-        for iomemcon in self.policy.iomemcons():
+        yield from self.plan().results()
 
-            if self.addr and not match_range(
-                    iomemcon.addr,
-                    self.addr,
-                    self.addr_subset,
-                    self.addr_overlap,
-                    self.addr_superset,
-                    self.addr_proper):
-                continue
+    def _candidates(self):
+        return self.policy.iomemcons()
 
-            if not self._match_context(iomemcon.context):
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            yield iomemcon
+        if self.addr:
+            predicates.append(range_predicate(attrgetter("addr"), self.addr, self.addr_subset,
+                                              self.addr_overlap, self.addr_superset,
+                                              self.addr_proper))
+
+        return predicates
@@ -17,11 +17,11 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .mixins import MatchContext
 from .policyrep import IoportconRange
-from .query import PolicyQuery
-from .util import match_range
+from .query import PolicyQuery, range_predicate
 
 
 class IoportconQuery(MatchContext, PolicyQuery):
@@ -107,18 +107,17 @@ class IoportconQuery(MatchContext, PolicyQuery):
                        "proper: {0.ports_proper}".format(self))
         self._match_context_debug(self.log)
 
-        for ioportcon in self.policy.ioportcons():
+        yield from self.plan().results()
 
-            if self.ports and not match_range(
-                    ioportcon.ports,
-                    self.ports,
-                    self.ports_subset,
-                    self.ports_overlap,
-                    self.ports_superset,
-                    self.ports_proper):
-                continue
+    def _candidates(self):
+        return self.policy.ioportcons()
 
-            if not self._match_context(ioportcon.context):
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            yield ioportcon
+        if self.ports:
+            predicates.append(range_predicate(attrgetter("ports"), self.ports, self.ports_subset,
+                                              self.ports_overlap, self.ports_superset,
+                                              self.ports_proper))
+
+        return predicates
@@ -0,0 +1,54 @@
+# Copyright 2018, Chris PeBenito <pebenito@ieee.org>
+#
+# This file is part of SETools.
+#
+# SETools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1 of
+# the License, or (at your option) any later version.
+#
+# SETools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with SETools.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .policyrep import SELinuxPolicy
+
+__all__ = ['load_policies']
+
+
+def load_policies(paths, workers=None):
+    """
+    Load several policies concurrently.  Policy loading runs without
+    the Python global interpreter lock, so the policies are loaded in
+    parallel by a pool of threads.
+
+    Parameters:
+    paths       An iterable of policy paths.
+    workers     The number of threads.  If None, the number of
+                processors is used.  (default is None)
+
+    Return:     A list of the policies, in the same order as the paths.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    workers = min(workers, len(paths))
+
+    logging.getLogger(__name__).info("Loading {0} policies with {1} threads".format(
+        len(paths), workers))
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(SELinuxPolicy, paths))
@@ -18,9 +18,12 @@
 #
 # pylint: disable=attribute-defined-outside-init,no-member
 import re
+from operator import attrgetter, methodcaller
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
-from .util import match_in_set, match_regex, match_range, match_regex_or_set
+from .query import equal_selectivity, in_set_predicate, itself, member_predicate, \
+    range_predicate, regex_predicate, resolve_regex, set_predicate, value_predicate
+from .util import class_perm_bits, match_in_set, match_regex, match_range, match_regex_or_set
 
 
 class MatchAlias:
@@ -48,6 +51,14 @@ class MatchAlias:
 
         return match_in_set(obj.aliases(), self.alias, self.alias_regex)
 
+    def _match_alias_predicates(self):
+        """Get the query plan predicates for alias matching."""
+        alias = self.alias
+        if not alias:
+            return []
+
+        return [in_set_predicate(methodcaller("aliases"), alias, self.alias_regex)]
+
 
 class MatchContext:
 
@@ -134,6 +145,38 @@ class MatchContext:
 
         return True
 
+    def _match_context_predicates(self, context="context"):
+        """
+        Get the query plan predicates for context matching.
+
+        Parameter:
+        context     The name of the candidate's context attribute.
+        """
+        predicates = []
+
+        user = self.user
+        if user:
+            predicates.append(regex_predicate(attrgetter(context + ".user"), user,
+                                              self.user_regex))
+
+        role = self.role
+        if role:
+            predicates.append(regex_predicate(attrgetter(context + ".role"), role,
+                                              self.role_regex))
+
+        type_ = self.type_
+        if type_:
+            predicates.append(regex_predicate(attrgetter(context + ".type_"), type_,
+                                              self.type_regex))
+
+        range_ = self.range_
+        if range_:
+            predicates.append(range_predicate(attrgetter(context + ".range_"), range_,
+                                              self.range_subset, self.range_overlap,
+                                              self.range_superset, self.range_proper))
+
+        return predicates
+
 
 class MatchName:
 
@@ -154,6 +197,19 @@ class MatchName:
 
         return match_regex(obj, self.name, self.name_regex)
 
+    def _match_name_predicates(self, getter=itself):
+        """
+        Get the query plan predicates for name matching.
+
+        Parameter:
+        getter      A callable which gets the name to match from a candidate.
+        """
+        name = self.name
+        if not name:
+            return []
+
+        return [regex_predicate(getter, name, self.name_regex)]
+
 
 class MatchObjClass:
 
@@ -182,6 +238,19 @@ class MatchObjClass:
         else:
             return obj.tclass in self.tclass
 
+    def _match_object_class_predicates(self):
+        """Get the query plan predicates for object class matching."""
+        tclass = self.tclass
+        if not tclass:
+            return []
+
+        if self.tclass_regex:
+            # resolve the expression once against the policy's classes
+            return [value_predicate(attrgetter("tclass"),
+                                    resolve_regex(tclass, self.policy.classes()))]
+
+        return [member_predicate(attrgetter("tclass"), tclass)]
+
 
 class MatchPermission:
 
@@ -213,3 +282,80 @@ class MatchPermission:
             return obj.perms >= self.perms
         else:
             return match_regex_or_set(obj.perms, self.perms, self.perms_equal, self.perms_regex)
+
+    def _match_perms_predicates(self, by_class=False, vector=False):
+        """
+        Get the query plan predicates for permission matching.
+
+        Parameters:
+        by_class    If true, the candidates have an object class attribute
+                    named "tclass".  The criteria are resolved once per object
+                    class into an access vector mask, which is zero if no
+                    candidates of the class can match.  Without vector, the
+                    mask is only a pre-filter: candidates of object classes
+                    which cannot match are rejected without getting their
+                    permissions, and the others are matched on permission
+                    names.
+        vector      If true, the candidates also have an access vector
+                    attribute named "perm_vector".  Candidates are matched
+                    by comparing the vector to the mask of their class,
+                    without matching permission names.
+        """
+        perms = self.perms
+        if not perms:
+            return []
+
+        if not self.perms_subset and self.perms_regex:
+            return [set_predicate(attrgetter("perms"), perms, False, True)]
+
+        criteria = frozenset(perms)
+        if self.perms_subset:
+            selectivity = equal_selectivity
+
+            def match_perms(obj):
+                return obj.perms >= criteria
+        else:
+            selectivity, match_perms = set_predicate(attrgetter("perms"), criteria,
+                                                     self.perms_equal, False)
+
+        if not by_class:
+            return [(selectivity, match_perms)]
+
+        # the mask is zero if no permissions of the class can
+        # match, e.g. for equality, if any criteria permission
+        # is not in the class.
+        complete = self.perms_subset or self.perms_equal
+        masks = {}
+
+        def class_mask(tclass):
+            try:
+                return masks[tclass]
+            except KeyError:
+                bits = class_perm_bits(tclass)
+                mask = 0
+                if not complete or criteria.issubset(bits):
+                    for name in criteria.intersection(bits):
+                        mask |= bits[name]
+
+                masks[tclass] = mask
+                return mask
+
+        if not vector:
+            def match(obj):
+                return class_mask(obj.tclass) and match_perms(obj)
+
+        elif self.perms_subset:
+            def match(obj):
+                mask = class_mask(obj.tclass)
+                return mask and obj.perm_vector & mask == mask
+
+        elif self.perms_equal:
+            def match(obj):
+                mask = class_mask(obj.tclass)
+                return mask and obj.perm_vector == mask
+
+        else:
+            def match(obj):
+                return obj.perm_vector & class_mask(obj.tclass)
+
+        return [(selectivity, match)]
@@ -17,12 +17,12 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .mixins import MatchObjClass
 from .policyrep import MLSRuletype
-from .query import PolicyQuery
-from .util import match_indirect_regex, match_range
+from .query import PolicyQuery, indirect_predicate, member_predicate, range_predicate
 
 
 class MLSRuleQuery(MatchObjClass, PolicyQuery):
@@ -78,51 +78,28 @@ class MLSRuleQuery(MatchObjClass, PolicyQuery):
                        "subset: {0.default_subset}, superset: {0.default_superset}, "
                        "proper: {0.default_proper}".format(self))
 
-        for rule in self.policy.mlsrules():
-            #
-            # Matching on rule type
-            #
-            if self.ruletype:
-                if rule.ruletype not in self.ruletype:
-                    continue
-
-            #
-            # Matching on source type
-            #
-            if self.source and not match_indirect_regex(
-                    rule.source,
-                    self.source,
-                    self.source_indirect,
-                    self.source_regex):
-                continue
-
-            #
-            # Matching on target type
-            #
-            if self.target and not match_indirect_regex(
-                    rule.target,
-                    self.target,
-                    self.target_indirect,
-                    self.target_regex):
-                continue
-
-            #
-            # Matching on object class
-            #
-            if not self._match_object_class(rule):
-                continue
-
-            #
-            # Matching on range
-            #
-            if self.default and not match_range(
-                    rule.default,
-                    self.default,
-                    self.default_subset,
-                    self.default_overlap,
-                    self.default_superset,
-                    self.default_proper):
-                continue
-
-            # if we get here, we have matched all available criteria
-            yield rule
+        yield from self.plan().results()
+
+    def _candidates(self):
+        return self.policy.mlsrules()
+
+    def _predicates(self):
+        predicates = self._match_object_class_predicates()
+
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
+
+        if self.source:
+            predicates.append(indirect_predicate(attrgetter("source"), self.source,
+                                                 self.source_indirect, self.source_regex))
+
+        if self.target:
+            predicates.append(indirect_predicate(attrgetter("target"), self.target,
+                                                 self.target_indirect, self.target_regex))
+
+        if self.default:
+            predicates.append(range_predicate(attrgetter("default"), self.default,
+                                              self.default_subset, self.default_overlap,
+                                              self.default_superset, self.default_proper))
+
+        return predicates
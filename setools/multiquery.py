@@ -0,0 +1,79 @@
+# Copyright 2018, Chris PeBenito <pebenito@ieee.org>
+#
+# This file is part of SETools.
+#
+# SETools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 2.1 of
+# the License, or (at your option) any later version.
+#
+# SETools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with SETools.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+import logging
+
+from .mlsrulequery import MLSRuleQuery
+from .rbacrulequery import RBACRuleQuery
+from .terulequery import TERuleQuery
+
+__all__ = ['run_queries']
+
+# rule query classes, and the name of the
+# policy iterator of the rules they match
+rule_iterators = ((TERuleQuery, "terules"),
+                  (RBACRuleQuery, "rbacrules"),
+                  (MLSRuleQuery, "mlsrules"))
+
+
+def run_queries(policy, queries):
+    """
+    Run many queries on a policy.  The TE, RBAC, and MLS rule queries
+    are evaluated together in one pass over the policy's rules of each
+    kind, and each rule is added to the results of every query it
+    matches.  Other queries are run separately.
+
+    Parameters:
+    policy      The policy to query.
+    queries     An iterable of queries of the policy.
+
+    Return:     A list of the list of results of each query, in the
+                same order as the queries.  Results of the rule queries
+                are in policy order.
+    """
+    log = logging.getLogger(__name__)
+    queries = list(queries)
+    results = [[] for _ in queries]
+
+    # (result list, plan) of the queries, by policy iterator name
+    passes = dict((name, []) for _, name in rule_iterators)
+
+    for query, result in zip(queries, results):
+        if query.policy is not policy:
+            raise ValueError("{0!r} is not a query of {1}.".format(query, policy))
+
+        for cls, name in rule_iterators:
+            if isinstance(query, cls):
+                passes[name].append((result, query.plan(candidates=())))
+                break
+        else:
+            result.extend(query.results())
+
+    for name, plans in passes.items():
+        if not plans:
+            continue
+
+        log.info("Matching {0} rule queries in one pass over the {1} of {2}".format(
+            len(plans), name, policy))
+
+        for rule in getattr(policy, name)():
+            for result, plan in plans:
+                if plan.match(rule):
+                    result.append(rule)
+
+    return results
@@ -17,10 +17,10 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .mixins import MatchContext, MatchName
 from .query import PolicyQuery
-from .util import match_regex
 
 
 class NetifconQuery(MatchContext, MatchName, PolicyQuery):
@@ -65,14 +65,11 @@ class NetifconQuery(MatchContext, MatchName, PolicyQuery):
         self._match_name_debug(self.log)
         self._match_context_debug(self.log)
 
-        for netif in self.policy.netifcons():
-            if self.name and not match_regex(
-                    netif.netif,
-                    self.name,
-                    self.name_regex):
-                continue
+        yield from self.plan().results()
 
-            if not self._match_context(netif.context):
-                continue
+    def _candidates(self):
+        return self.policy.netifcons()
 
-            yield netif
+    def _predicates(self):
+        return self._match_name_predicates(attrgetter("netif")) + \
+            self._match_context_predicates()
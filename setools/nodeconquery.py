@@ -21,10 +21,11 @@ import ipaddress
 
 import logging
 from socket import AF_INET, AF_INET6
+from operator import attrgetter
 
 from .mixins import MatchContext
 from .policyrep import NodeconIPVersion
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate, range_selectivity
 
 
 class NodeconQuery(MatchContext, PolicyQuery):
@@ -100,20 +101,23 @@ class NodeconQuery(MatchContext, PolicyQuery):
         self.log.debug("IP Version: {0.ip_version!r}".format(self))
         self._match_context_debug(self.log)
 
-        for nodecon in self.policy.nodecons():
+        yield from self.plan().results()
 
-            if self.network:
-                if self.network_overlap:
-                    if not self.network.overlaps(nodecon.network):
-                        continue
-                else:
-                    if not nodecon.network == self.network:
-                        continue
+    def _candidates(self):
+        return self.policy.nodecons()
 
-            if self.ip_version and self.ip_version != nodecon.ip_version:
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            if not self._match_context(nodecon.context):
-                continue
+        network = self.network
+        if network:
+            if self.network_overlap:
+                predicates.append((range_selectivity,
+                                   lambda nodecon: network.overlaps(nodecon.network)))
+            else:
+                predicates.append(equal_predicate(attrgetter("network"), network))
 
-            yield nodecon
+        if self.ip_version:
+            predicates.append(equal_predicate(attrgetter("ip_version"), self.ip_version))
+
+        return predicates
@@ -19,12 +19,12 @@
 import logging
 import re
 from contextlib import suppress
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .mixins import MatchName
 from .policyrep.exception import NoCommon
-from .query import PolicyQuery
-from .util import match_regex, match_regex_or_set
+from .query import PolicyQuery, guard_predicate, regex_predicate, set_predicate
 
 
 class ObjClassQuery(MatchName, PolicyQuery):
@@ -75,32 +75,34 @@ class ObjClassQuery(MatchName, PolicyQuery):
         self.log.debug("Perms: {0.perms}, regex: {0.perms_regex}, "
                        "eq: {0.perms_equal}, indirect: {0.perms_indirect}".format(self))
 
-        for class_ in self.policy.classes():
-            if not self._match_name(class_):
-                continue
-
-            if self.common:
-                try:
-                    if not match_regex(
-                            class_.common,
-                            self.common,
-                            self.common_regex):
-                        continue
-                except NoCommon:
-                    continue
-
-            if self.perms:
-                perms = class_.perms
-
-                if self.perms_indirect:
-                    with suppress(NoCommon):
-                        perms |= class_.common.perms
-
-                if not match_regex_or_set(
-                        perms,
-                        self.perms,
-                        self.perms_equal,
-                        self.perms_regex):
-                    continue
-
-            yield class_
+        yield from self.plan().results()
+
+    def _candidates(self):
+        return self.policy.classes()
+
+    def _predicates(self):
+        predicates = self._match_name_predicates()
+
+        if self.common:
+            predicates.append(guard_predicate(
+                regex_predicate(attrgetter("common"), self.common, self.common_regex),
+                NoCommon))
+
+        if self.perms:
+            predicates.append(set_predicate(
+                self._class_perms if self.perms_indirect else attrgetter("perms"),
+                self.perms,
+                self.perms_equal,
+                self.perms_regex))
+
+        return predicates
+
+    @staticmethod
+    def _class_perms(class_):
+        """Get the permissions of a class, including its common's permissions."""
+        perms = class_.perms
+
+        with suppress(NoCommon):
+            perms |= class_.common.perms
+
+        return perms
@@ -17,9 +17,10 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .mixins import MatchContext
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate
 
 
 class PcideviceconQuery(MatchContext, PolicyQuery):
@@ -82,12 +83,15 @@ class PcideviceconQuery(MatchContext, PolicyQuery):
         self.log.debug("Device ID: {0.device!r}".format(self))
         self._match_context_debug(self.log)
 
-        for pcidevicecon in self.policy.pcidevicecons():
+        yield from self.plan().results()
 
-            if self.device and self.device != pcidevicecon.device:
-                continue
+    def _candidates(self):
+        return self.policy.pcidevicecons()
 
-            if not self._match_context(pcidevicecon.context):
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            yield pcidevicecon
+        if self.device:
+            predicates.append(equal_predicate(attrgetter("device"), self.device))
+
+        return predicates
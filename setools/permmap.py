@@ -366,6 +366,42 @@ class PermissionMap:
 
         return (read_weight, write_weight)
 
+    def weight_table(self, class_, perm_bits):
+        """
+        Get the information flow read and write weights of the
+        permissions of an object class, for calculating the weights
+        of permission vectors.
+
+        Parameter:
+        class_          The object class name.
+        perm_bits       A dictionary of permission name to the
+                        permission's bit in a permission vector.
+
+        Return: List of tuple(bit, read_weight, write_weight)
+        bit             The permission's bit.
+        read_weight     The permission's read weight.
+        write_weight    The permission's write weight.
+
+        Permissions which are disabled or do not have
+        an information flow are not included.
+        """
+
+        table = []
+        for perm_name, bit in perm_bits.items():
+            mapping = Mapping(self.permmap, class_, perm_name)
+
+            if not mapping.enabled:
+                continue
+
+            if mapping.direction == "r":
+                table.append((bit, mapping.weight, 0))
+            elif mapping.direction == "w":
+                table.append((bit, 0, mapping.weight))
+            elif mapping.direction == "b":
+                table.append((bit, mapping.weight, mapping.weight))
+
+        return table
+
     def set_direction(self, class_, permission, direction):
         """
         Set the information flow direction of a permission.
@@ -17,9 +17,10 @@
 # <http://www.gnu.org/licenses/>.
 #
 import logging
+from operator import attrgetter
 
 from .mixins import MatchContext
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate
 
 
 class PirqconQuery(MatchContext, PolicyQuery):
@@ -82,12 +83,15 @@ class PirqconQuery(MatchContext, PolicyQuery):
         self.log.debug("IRQ: {0.irq!r}".format(self))
         self._match_context_debug(self.log)
 
-        for pirqcon in self.policy.pirqcons():
+        yield from self.plan().results()
 
-            if self.irq and self.irq != pirqcon.irq:
-                continue
+    def _candidates(self):
+        return self.policy.pirqcons()
 
-            if not self._match_context(pirqcon.context):
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            yield pirqcon
+        if self.irq:
+            predicates.append(equal_predicate(attrgetter("irq"), self.irq))
+
+        return predicates
@@ -45,8 +45,10 @@ class PolCapQuery(MatchName, PolicyQuery):
         self.log.info("Generating policy capability results from {0.policy}".format(self))
         self._match_name_debug(self.log)
 
-        for cap in self.policy.polcaps():
-            if not self._match_name(cap):
-                continue
+        yield from self.plan().results()
 
-            yield cap
+    def _candidates(self):
+        return self.policy.polcaps()
+
+    def _predicates(self):
+        return self._match_name_predicates()
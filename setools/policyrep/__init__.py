@@ -28,4 +28,4 @@ from .libpolicyrep import BoundsRuletype, ConstraintRuletype, DefaultRuletype, D
                           DefaultRangeValue, FSUseRuletype, HandleUnknown, IoctlSet, \
                           IomemconRange, IoportconRange, MLSRuletype, NodeconIPVersion, \
                           PolicyTarget, PortconProtocol, PortconRange, RBACRuletype, \
-                          SELinuxPolicy, TERuletype
+                          SELinuxPolicy, TERuletype, TypeSet
@@ -23,6 +23,12 @@ from collections import namedtuple
 
 truth_table_row = namedtuple("truth_table_row", ["values", "result"])
 
+# The canonical form of a conditional expression.  booleans is the sorted
+# tuple of the names of the Booleans in the expression, and table is the
+# truth table as an integer: bit i is the result when each Boolean k is
+# true if bit k of i is set.
+CanonicalExpression = namedtuple("CanonicalExpression", ["booleans", "table"])
+
 cdef dict _cond_cache = {}
 
 #
@@ -49,6 +55,15 @@ cdef class Boolean(PolicySymbol):
         """Low-level equality check (C pointers)."""
         return self.handle == other.handle
 
+    @property
+    def _value(self):
+        """
+        The value of the Boolean.
+
+        This is a low-level policy detail exposed for internal use only.
+        """
+        return self.handle.s.value
+
     @property
     def state(self):
         """The default state of the Boolean."""
@@ -63,7 +78,9 @@ cdef class Conditional(PolicySymbol):
 
     """A conditional policy block."""
 
-    cdef sepol.cond_node_t *handle
+    cdef:
+        sepol.cond_node_t *handle
+        object _canonical
 
     @staticmethod
     cdef factory(SELinuxPolicy policy, sepol.cond_node_t *symbol):
@@ -179,6 +196,18 @@ cdef class Conditional(PolicySymbol):
         """The set of Booleans in the expression."""
         return set(i for i in self.expression() if isinstance(i, Boolean))
 
+    @property
+    def canonical(self):
+        """
+        The canonical form of the expression, as a CanonicalExpression.
+        Conditionals with equivalent expressions of the same Booleans
+        have equal canonical forms.  It is compiled on first use.
+        """
+        if self._canonical is None:
+            self._canonical = compile_expression(self.policy, self.handle.expr)
+
+        return self._canonical
+
     def evaluate(self, **kwargs):
         """
         Evaluate the expression with the stated boolean values.
@@ -189,35 +218,12 @@ cdef class Conditional(PolicySymbol):
 
         Return:     bool
         """
-        bools = sorted(self.booleans)
+        booleans, table = self.canonical
 
-        if sorted(kwargs.keys()) != bools:
+        if tuple(sorted(kwargs.keys())) != booleans:
             raise ValueError("All Booleans must have a specified value.")
 
-        stack = []
-        for expr_node in self.expression():
-            if isinstance(expr_node, Boolean):
-                stack.append(kwargs[expr_node])
-            elif expr_node.unary:
-                operand = stack.pop()
-                operator = str(expr_node)
-                stack.append(not operand)
-            else:
-                operand1 = stack.pop()
-                operand2 = stack.pop()
-                operator = str(expr_node)
-                if operator == "||":
-                    stack.append(operand1 or operand2)
-                elif operator == "&&":
-                    stack.append(operand1 and operand2)
-                elif operator == "^":
-                    stack.append(operand1 ^ operand2)
-                elif operator == "==":
-                    stack.append(operand1 == operand2)
-                else:  # not equal
-                    stack.append(operand1 != operand2)
-
-        return stack[0]
+        return bool(table >> assignment_bit(kwargs[b] for b in booleans) & 1)
 
     def expression(self):
         """Iterator over The conditional expression."""
@@ -249,16 +255,16 @@ cdef class Conditional(PolicySymbol):
         result:     Evaluation result for the expression
                     given the values.
         """
-        bools = sorted(str(b) for b in self.booleans)
+        booleans, table = self.canonical
 
         truth_table = []
 
         # create a list of all combinations of T/F for each Boolean
-        truth_list = list(product([True, False], repeat=len(bools)))
+        truth_list = list(product([True, False], repeat=len(booleans)))
 
         for row in truth_list:
-            values = {bools[i]: row[i] for i in range(len(bools))}
-            truth_table.append(truth_table_row(values, self.evaluate(**values)))
+            values = {booleans[i]: row[i] for i in range(len(booleans))}
+            truth_table.append(truth_table_row(values, bool(table >> assignment_bit(row) & 1)))
 
         return truth_table
 
@@ -311,6 +317,72 @@ cdef class ConditionalOperator(PolicySymbol):
         return self.handle.expr_type == sepol.COND_NOT
 
 
+#
+# Functions
+#
+cdef assignment_bit(values):
+    """
+    Get the bit of a CanonicalExpression's truth table which has the
+    result of the assignment of the values to its Booleans, in order.
+    """
+    bit = 0
+    for k, value in enumerate(values):
+        if value:
+            bit |= 1 << k
+
+    return bit
+
+
+cdef compile_expression(SELinuxPolicy policy, sepol.cond_expr_t *head):
+    """
+    Compile a conditional expression into its CanonicalExpression.  The
+    expression is evaluated for all assignments of its Booleans at once,
+    using integers as bit vectors with one bit per assignment.
+    """
+    cdef sepol.cond_expr_t *expr
+
+    names = {}
+    expr = head
+    while expr != NULL:
+        if expr.expr_type == sepol.COND_BOOL and expr.bool not in names:
+            names[expr.bool] = policy.boolean_value_to_name(expr.bool - 1)
+
+        expr = expr.next
+
+    booleans = tuple(sorted(names.values()))
+    full = (<object>1 << (<object>1 << len(booleans))) - 1
+
+    # the vector of Boolean k has the bits of the assignments
+    # with bit k set, e.g. 0b1010 and 0b1100 for two Booleans.
+    vectors = {}
+    for k, name in enumerate(booleans):
+        width = 1 << k
+        vectors[name] = full // ((1 << (width << 1)) - 1) * (((1 << width) - 1) << width)
+
+    stack = []
+    expr = head
+    while expr != NULL:
+        if expr.expr_type == sepol.COND_BOOL:
+            stack.append(vectors[names[expr.bool]])
+        elif expr.expr_type == sepol.COND_NOT:
+            stack.append(full ^ stack.pop())
+        else:
+            operand1 = stack.pop()
+            operand2 = stack.pop()
+            if expr.expr_type == sepol.COND_OR:
+                stack.append(operand1 | operand2)
+            elif expr.expr_type == sepol.COND_AND:
+                stack.append(operand1 & operand2)
+            elif expr.expr_type == sepol.COND_EQ:
+                stack.append(full ^ operand1 ^ operand2)
+            else:  # xor and not equal
+                stack.append(operand1 ^ operand2)
+
+        expr = expr.next
+
+    return CanonicalExpression(booleans, stack[0])
+
+
 #
 # Iterators
 #
@@ -358,16 +430,7 @@ cdef class ConditionalIterator(PolicyIterator):
         return item
 
     def __len__(self):
-        cdef:
-            sepol.cond_node_t *curr
-            size_t count = 0
-
-        curr = self.head
-        while curr != NULL:
-             count += 1
-             curr = curr.next
-
-        return count
+        return self.policy._symbol_counts().conditionals
 
     def reset(self):
         """Reset the iterator back to the start."""
@@ -97,23 +97,7 @@ cdef class TypeboundsIterator(HashtabIterator):
             Type.factory(self.policy, datum))
 
     def __len__(self):
-        cdef sepol.type_datum_t *datum
-        cdef sepol.hashtab_node_t *node
-        cdef uint32_t bucket = 0
-        cdef size_t count = 0
-
-        while bucket < self.table[0].size:
-            node = self.table[0].htable[bucket]
-            while node != NULL:
-                datum = <sepol.type_datum_t *>node.datum if node else NULL
-                if datum != NULL and datum.flavor == sepol.TYPE_TYPE and datum.bounds != 0:
-                    count += 1
-
-                node = node.next
-
-            bucket += 1
-
-        return count
+        return self.policy._symbol_counts().typebounds
 
     def reset(self):
         cdef sepol.type_datum_t * datum
@@ -55,6 +55,10 @@ cdef class BaseConstraint(PolicySymbol):
     def perms(self):
         raise NotImplementedError
 
+    @property
+    def perm_vector(self):
+        raise NotImplementedError
+
     def statement(self):
         return str(self)
 
@@ -235,6 +239,14 @@ cdef class Constraint(BaseConstraint):
         return set(p for p in PermissionVectorIterator.factory(self.policy, self.tclass,
                                                                self.handle.permissions))
 
+    @property
+    def perm_vector(self):
+        """
+        The constraint's permission set as an access vector.  Each permission
+        is the bit (value - 1) of the permission in the object class.
+        """
+        return self.handle.permissions
+
 
 cdef class Validatetrans(BaseConstraint):
 
@@ -265,6 +277,10 @@ cdef class Validatetrans(BaseConstraint):
     def perms(self):
         raise ConstraintUseError("{0} rules do not have permissions.".format(self.ruletype))
 
+    @property
+    def perm_vector(self):
+        raise ConstraintUseError("{0} rules do not have permissions.".format(self.ruletype))
+
 
 cdef class ConstraintExprNode(PolicySymbol):
 
@@ -294,19 +294,39 @@ cdef class LevelDecl(BaseMLSLevel):
         return "level {0};".format(self)
 
 
+cdef inline bint mls_level_eq(sepol.mls_level_t *l1, sepol.mls_level_t *l2) nogil:
+    """Determine if two MLS levels are equal."""
+    return l1.sens == l2.sens and ebitmap_cmp(&l1.cat, &l2.cat)
+
+
+cdef inline bint mls_level_dom(sepol.mls_level_t *l1, sepol.mls_level_t *l2) nogil:
+    """Determine if MLS level l1 dominates l2."""
+    return l1.sens >= l2.sens and ebitmap_contains(&l1.cat, &l2.cat)
+
+
+cdef sepol.mls_level_t *mls_level_of(obj):
+    """Get the MLS level of a Level or LevelDecl, or NULL for other objects."""
+    if isinstance(obj, Level):
+        return (<Level>obj).handle
+    elif isinstance(obj, LevelDecl):
+        return (<LevelDecl>obj).handle.level
+    else:
+        return NULL
+
+
 cdef class Level(BaseMLSLevel):
 
     """
     An MLS level used in contexts.
 
-    The _sensitivity and _categories attributes are only populated
-    if the level is user-generated.
+    Comparisons are done on the sensitivity value and the category
+    bitmap of the levels.  User-generated levels store their own
+    level, in the same form as the policy's levels.
     """
 
     cdef:
         sepol.mls_level_t *handle
-        list _categories
-        Sensitivity _sensitivity
+        sepol.mls_level_t _level
 
     @staticmethod
     cdef factory(SELinuxPolicy policy, sepol.mls_level_t *symbol):
@@ -365,11 +385,13 @@ cdef class Level(BaseMLSLevel):
                     raise InvalidLevel("{0} is not a valid level (level parsing error)".format(name))
 
         # build object
-        l = Level()
+        cdef Level l = Level()
         l.policy = policy
-        l.handle = NULL
-        l._sensitivity = s
-        l._categories = c
+        l.handle = &l._level
+        l._level.sens = s._value
+        for cat in c:
+            if ebitmap_set_bit(&l._level.cat, (<Category>cat).handle.s.value - 1, 1) < 0:
+                raise MemoryError
 
         # verify level is valid
         if not l <= s.level_decl():
@@ -379,45 +401,54 @@ cdef class Level(BaseMLSLevel):
 
         return l
 
+    def __dealloc__(self):
+        ebitmap_destroy(&self._level.cat)
+
     def __hash__(self):
         return hash(str(self))
 
     def __eq__(self, other):
-        try:
-            othercats = set(other.categories())
-        except AttributeError:
+        cdef sepol.mls_level_t *level = mls_level_of(other)
+        if level == NULL:
             return str(self) == str(other)
-        else:
-            selfcats = set(self.categories())
-            return self.sensitivity == other.sensitivity and selfcats == othercats
+
+        return mls_level_eq(self.handle, level)
 
     def __ge__(self, other):
         # Dom operator
-        selfcats = set(self.categories())
-        othercats = set(other.categories())
-        return self.sensitivity >= other.sensitivity and selfcats >= othercats
+        return mls_level_dom(self.handle, self._level_of(other))
 
     def __gt__(self, other):
-        selfcats = set(self.categories())
-        othercats = set(other.categories())
-        return ((self.sensitivity > other.sensitivity and selfcats >= othercats) or
-                (self.sensitivity >= other.sensitivity and selfcats > othercats))
+        cdef sepol.mls_level_t *level = self._level_of(other)
+        return mls_level_dom(self.handle, level) and not mls_level_eq(self.handle, level)
 
     def __le__(self, other):
         # Domby operator
-        selfcats = set(self.categories())
-        othercats = set(other.categories())
-        return self.sensitivity <= other.sensitivity and selfcats <= othercats
+        return mls_level_dom(self._level_of(other), self.handle)
 
     def __lt__(self, other):
-        selfcats = set(self.categories())
-        othercats = set(other.categories())
-        return ((self.sensitivity < other.sensitivity and selfcats <= othercats) or
-                (self.sensitivity <= other.sensitivity and selfcats < othercats))
+        cdef sepol.mls_level_t *level = self._level_of(other)
+        return mls_level_dom(level, self.handle) and not mls_level_eq(self.handle, level)
 
-    def __xor__(self, other):
+    # In Cython, either operand of a binary operator can be the Level
+    def __xor__(left, right):
         # Incomp operator
-        return not (self >= other or self <= other)
+        cdef:
+            sepol.mls_level_t *l1 = mls_level_of(left)
+            sepol.mls_level_t *l2 = mls_level_of(right)
+
+        if l1 == NULL or l2 == NULL:
+            return NotImplemented
+
+        return not (mls_level_dom(l1, l2) or mls_level_dom(l2, l1))
+
+    cdef sepol.mls_level_t *_level_of(self, other) except NULL:
+        """Get the MLS level of the other operand of a dominance comparison."""
+        cdef sepol.mls_level_t *level = mls_level_of(other)
+        if level == NULL:
+            raise TypeError("{0!r} cannot be compared to {1!r}".format(self, other))
+
+        return level
 
     def _eq(self, Level other):
         """Low-level equality check (C pointers)."""
@@ -429,19 +460,13 @@ cdef class Level(BaseMLSLevel):
         All categories are yielded, not a compact notation such as
         c0.c255
         """
-        if self.handle == NULL:
-            return iter(self._categories)
-        else:
-            return CategoryEbitmapIterator.factory(self.policy, &self.handle.cat)
+        return CategoryEbitmapIterator.factory(self.policy, &self.handle.cat)
 
     @property
     def sensitivity(self):
         """The sensitivity of the level."""
-        if self.handle == NULL:
-            return self._sensitivity
-        else:
-            return Sensitivity.factory(self.policy,
-                                       self.policy.level_value_to_datum(self.handle.sens - 1))
+        return Sensitivity.factory(self.policy,
+                                   self.policy.level_value_to_datum(self.handle.sens - 1))
 
     def statement(self):
         raise NoStatement
@@ -611,66 +636,6 @@ cdef class CategoryHashtabIterator(HashtabIterator):
             datum = <sepol.cat_datum_t *> self.node.datum if self.node else NULL
 
 
-cdef class CategoryAliasHashtabIterator(HashtabIterator):
-
-    """Iterate over category aliases in the policy."""
-
-    cdef uint32_t primary
-
-    @staticmethod
-    cdef factory(SELinuxPolicy policy, sepol.hashtab_t *table, Category primary):
-        """Factory function for creating category alias iterators."""
-        i = CategoryAliasHashtabIterator()
-        i.policy = policy
-        i.table = table
-        i.primary = primary._value
-        i.reset()
-        return i
-
-    def __next__(self):
-        super().__next__()
-        datum = <sepol.cat_datum_t *> self.curr.datum if self.curr else NULL
-
-        while datum != NULL and (not datum.isalias or datum.s.value != self.primary):
-            super().__next__()
-            datum = <sepol.cat_datum_t *> self.curr.datum if self.curr else NULL
-
-        return intern(self.curr.key)
-
-    def __len__(self):
-        cdef sepol.cat_datum_t *datum
-        cdef sepol.hashtab_node_t *node
-        cdef uint32_t bucket = 0
-        cdef size_t count = 0
-
-        while bucket < self.table[0].size:
-            node = self.table[0].htable[bucket]
-            while node != NULL:
-                datum = <sepol.cat_datum_t *>node.datum if node else NULL
-                if datum != NULL and self.primary == datum.s.value and datum.isalias:
-                    count += 1
-
-                node = node.next
-
-            bucket += 1
-
-        return count
-
-    def reset(self):
-        super().reset()
-
-        cdef sepol.cat_datum_t *datum = <sepol.cat_datum_t *> self.node.datum if self.node else NULL
-
-        # advance over any attributes or aliases
-        while datum != NULL and (not datum.isalias and self.primary != datum.s.value):
-            self._next_node()
-
-            if self.node == NULL or self.bucket >= self.table[0].size:
-                break
-
-            datum = <sepol.cat_datum_t *> self.node.datum if self.node else NULL
-
-
 cdef class SensitivityHashtabIterator(HashtabIterator):
 
     """Iterate over sensitivity in the policy."""
@@ -728,66 +693,6 @@ cdef class SensitivityHashtabIterator(HashtabIterator):
             datum = <sepol.level_datum_t *> self.node.datum if self.node else NULL
 
 
-cdef class SensitivityAliasHashtabIterator(HashtabIterator):
-
-    """Iterate over sensitivity aliases in the policy."""
-
-    cdef uint32_t primary
-
-    @staticmethod
-    cdef factory(SELinuxPolicy policy, sepol.hashtab_t *table, Sensitivity primary):
-        """Factory function for creating Sensitivity alias iterators."""
-        i = SensitivityAliasHashtabIterator()
-        i.policy = policy
-        i.table = table
-        i.primary = primary._value
-        i.reset()
-        return i
-
-    def __next__(self):
-        super().__next__()
-        datum = <sepol.level_datum_t *> self.curr.datum if self.curr else NULL
-
-        while datum != NULL and (not datum.isalias or datum.level.sens != self.primary):
-            super().__next__()
-            datum = <sepol.level_datum_t *> self.curr.datum if self.curr else NULL
-
-        return intern(self.curr.key)
-
-    def __len__(self):
-        cdef sepol.level_datum_t *datum
-        cdef sepol.hashtab_node_t *node
-        cdef uint32_t bucket = 0
-        cdef size_t count = 0
-
-        while bucket < self.table[0].size:
-            node = self.table[0].htable[bucket]
-            while node != NULL:
-                datum = <sepol.level_datum_t *>node.datum if node else NULL
-                if datum != NULL and self.primary == datum.level.sens and datum.isalias:
-                    count += 1
-
-                node = node.next
-
-            bucket += 1
-
-        return count
-
-    def reset(self):
-        super().reset()
-
-        cdef sepol.level_datum_t *datum = <sepol.level_datum_t *> self.node.datum if self.node else NULL
-
-        # advance over any attributes or aliases
-        while datum != NULL and (not datum.isalias and self.primary != datum.level.sens):
-            self._next_node()
-
-            if self.node == NULL or self.bucket >= self.table[0].size:
-                break
-
-            datum = <sepol.level_datum_t *> self.node.datum if self.node else NULL
-
-
 cdef class LevelDeclHashtabIterator(HashtabIterator):
 
     """Iterate over level declarations in the policy."""
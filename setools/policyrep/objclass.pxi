@@ -142,6 +142,15 @@ cdef class ObjClass(PolicySymbol):
         """Low-level equality check (C pointers)."""
         return self.handle == other.handle
 
+    @property
+    def _value(self):
+        """
+        The value of the object class.
+
+        This is a low-level policy detail exposed for internal use only.
+        """
+        return self.handle.s.value
+
     @property
     def common(self):
         """
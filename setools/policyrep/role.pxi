@@ -53,6 +53,10 @@ cdef class Role(PolicySymbol):
         """Generator which yields the role's set of types."""
         return TypeEbitmapIterator.factory_from_set(self.policy, &self.handle.types)
 
+    def type_set(self):
+        """The role's set of types, as a TypeSet."""
+        return TypeSet.from_ebitmap(self.policy, &self.handle.types.types)
+
     def statement(self):
         types = list(str(t) for t in self.types())
         stmt = "role {0}".format(self)
@@ -20,6 +20,30 @@
 # pylint: disable=too-many-public-methods
 
 import logging
+import mmap
+from array import array
+from collections import namedtuple
+
+# The result of SELinuxPolicy.terule_array()
+TERuleArray = namedtuple("TERuleArray", ["rules", "types", "classes", "conditionals", "filenames"])
+
+# The Boolean-to-conditional index.  conditionals is the list of the
+# policy's conditionals, by_boolean is a dictionary of Boolean value
+# to the tuple of the positions of the conditionals referencing it,
+# and positions is a dictionary of conditional node address to the
+# conditional's position.
+ConditionalIndex = namedtuple("ConditionalIndex", ["conditionals", "by_boolean", "positions"])
+
+# name, array typecode, and NumPy type of the terule_array() columns.
+# These must match the terule_row struct.
+terule_array_columns = (("ruletype", "H", "u2"),
+                        ("source", "H", "u2"),
+                        ("target", "H", "u2"),
+                        ("tclass", "H", "u2"),
+                        ("data", "I", "u4"),
+                        ("cond", "I", "u4"),
+                        ("block", "B", "u1"),
+                        ("filename", "I", "u4"))
 
 
 class PolicyTarget(PolicyEnum):
@@ -39,14 +63,61 @@ class HandleUnknown(PolicyEnum):
     reject = sepol.SEPOL_REJECT_UNKNOWN
 
 
+cdef struct terule_counts:
+    size_t allow
+    size_t auditallow
+    size_t dontaudit
+    size_t neverallow
+    size_t allowxperm
+    size_t auditallowxperm
+    size_t dontauditxperm
+    size_t neverallowxperm
+    size_t type_transition
+    size_t type_change
+    size_t type_member
+
+ctypedef terule_counts terule_counts_t
+
+
+cdef struct symbol_counts:
+    size_t types
+    size_t type_aliases
+    size_t type_attributes
+    size_t typebounds
+    size_t conditionals
+
+ctypedef symbol_counts symbol_counts_t
+
+
+cdef packed struct terule_row:
+    uint16_t ruletype
+    uint16_t source
+    uint16_t target
+    uint16_t tclass
+    uint32_t data
+    uint32_t cond
+    uint8_t block
+    uint32_t filename
+
+ctypedef terule_row terule_row_t
+
+
 cdef class SELinuxPolicy:
     cdef:
         sepol.sepol_policydb *handle
         sepol.sepol_handle *sh
         sepol.cat_datum_t **cat_val_to_struct
         sepol.level_datum_t **level_val_to_struct
+        terule_counts_t te_counts
+        bint te_counts_valid
+        symbol_counts_t sym_counts
+        bint sym_counts_valid
+        object te_index
+        dict alias_maps
+        object cond_index
         readonly str path
         object log
+        readonly bint in_memory
 
     def __init__(self, policyfile=None):
         """
@@ -68,10 +139,12 @@ cdef class SELinuxPolicy:
         self.handle = NULL
         self.cat_val_to_struct = NULL
         self.level_val_to_struct = NULL
+        self.te_counts_valid = False
+        self.sym_counts_valid = False
 
     def __dealloc__(self):
-        PyMem_Free(self.cat_val_to_struct)
-        PyMem_Free(self.level_val_to_struct)
+        PyMem_RawFree(self.cat_val_to_struct)
+        PyMem_RawFree(self.level_val_to_struct)
 
         if self.handle:
             sepol.sepol_policydb_free(self.handle)
@@ -79,6 +152,41 @@ cdef class SELinuxPolicy:
         if self.sh:
             sepol.sepol_handle_destroy(self.sh)
 
+    @classmethod
+    def from_buffer(cls, buffer, name="<buffer>"):
+        """
+        Load a binary policy from memory.  The policy is read directly
+        from the buffer, without copying it or writing it to a file.
+
+        Parameters:
+        buffer      An object supporting the buffer protocol, such as
+                    bytes, bytearray, memoryview, or mmap, containing
+                    the binary policy.
+        name        The name of the policy, used as its path.
+
+        Return:     The policy.
+        """
+        cdef SELinuxPolicy policy = cls.__new__(cls)
+        policy.log = logging.getLogger(__name__)
+        policy.log.info("Opening SELinux policy \"{0}\" from memory".format(name))
+        policy._load_policy_buffer(buffer, name)
+        policy.in_memory = True
+        policy.log.info("Successfully opened SELinux policy \"{0}\"".format(name))
+        return policy
+
+    @classmethod
+    def from_bytes(cls, data, name="<bytes>"):
+        """
+        Load a binary policy from bytes.
+
+        Parameters:
+        data        The binary policy.
+        name        The name of the policy, used as its path.
+
+        Return:     The policy.
+        """
+        return cls.from_buffer(data, name)
+
     def __repr__(self):
         return "<SELinuxPolicy(\"{0}\")>".format(self.path)
 
@@ -117,12 +225,53 @@ cdef class SELinuxPolicy:
 
     cdef _load_policy(self, str filename):
         """Load the specified policy."""
-        cdef:
-            sepol.sepol_policy_file_t *pfile = NULL
-            FILE *infile = NULL
+        cdef FILE *infile = NULL
 
         self.log.info("Opening SELinux policy \"{0}\"".format(filename))
 
+        # Read the policy through a memory mapping if possible, so the
+        # file is not copied through stdio buffers.
+        with open(filename, "rb") as fd:
+            try:
+                mapping = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # ValueError: empty file.  OSError: not mappable, e.g. a pipe
+                mapping = None
+
+        if mapping is not None:
+            with mapping:
+                self._load_policy_buffer(mapping, filename)
+        else:
+            infile = fopen(filename, "rb")
+            if infile == NULL:
+                PyErr_SetFromErrnoWithFilename(OSError, filename)
+
+            try:
+                self._read_policy(filename, infile, NULL, 0)
+            finally:
+                fclose(infile)
+
+        self.log.info("Successfully opened SELinux policy \"{0}\"".format(filename))
+
+    cdef _load_policy_buffer(self, buffer, str name):
+        """Load the policy from a buffer."""
+        cdef Py_buffer view
+
+        PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE)
+        try:
+            self._read_policy(name, NULL, <char *>view.buf, view.len)
+        finally:
+            PyBuffer_Release(&view)
+
+    cdef _read_policy(self, str name, FILE *infile, char *data, size_t size):
+        """
+        Read the policy from the file, or from memory if the
+        file is NULL, and (re)create the data structures.
+        """
+        cdef:
+            sepol.sepol_policy_file_t *pfile = NULL
+            int ret
+
         self.sh = sepol.sepol_handle_create()
         if self.sh == NULL:
             raise MemoryError
@@ -135,21 +284,25 @@ cdef class SELinuxPolicy:
         if sepol.sepol_policy_file_create(&pfile) < 0:
             raise MemoryError
 
-        infile = fopen(filename, "rb")
-        if infile == NULL:
-            PyErr_SetFromErrnoWithFilename(OSError, filename)
-
-        sepol.sepol_policy_file_set_handle(pfile, self.sh)
-        sepol.sepol_policy_file_set_fp(pfile, infile)
+        try:
+            sepol.sepol_policy_file_set_handle(pfile, self.sh)
+            if infile != NULL:
+                sepol.sepol_policy_file_set_fp(pfile, infile)
+            else:
+                sepol.sepol_policy_file_set_mem(pfile, data, size)
 
-        if sepol.sepol_policydb_read(self.handle, pfile) < 0:
-            raise InvalidPolicy("Invalid policy: {}. A binary policy must be specified. "
-                                "(use e.g. policy.{} or sepolicy) Source policies are not "
-                                "supported.".format(filename,
-                                                    sepol.sepol_policy_kern_vers_max()))
+            # release the GIL so other threads can run,
+            # e.g. to load several policies concurrently
+            with nogil:
+                ret = sepol.sepol_policydb_read(self.handle, pfile)
 
-        fclose(infile)
-        sepol.sepol_policy_file_free(pfile)
+            if ret < 0:
+                raise InvalidPolicy("Invalid policy: {}. A binary policy must be specified. "
+                                    "(use e.g. policy.{} or sepolicy) Source policies are not "
+                                    "supported.".format(name,
+                                                        sepol.sepol_policy_kern_vers_max()))
+        finally:
+            sepol.sepol_policy_file_free(pfile)
 
         #
         # (Re)create data structures
@@ -166,8 +319,7 @@ cdef class SELinuxPolicy:
         if self.mls:
             self._create_mls_val_to_struct()
 
-        self.log.info("Successfully opened SELinux policy \"{0}\"".format(filename))
-        self.path = filename
+        self.path = name
 
     def _potential_policies(self):
         """Generate a list of potential policies to use."""
@@ -226,26 +378,22 @@ cdef class SELinuxPolicy:
     @property
     def allow_count(self):
         """The number of (type) allow rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.allow)
+        return self._terule_counts().allow
 
     @property
     def allowxperm_count(self):
         """The number of allowxperm rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.allowxperm)
+        return self._terule_counts().allowxperm
 
     @property
     def auditallow_count(self):
         """The number of auditallow rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.auditallow)
+        return self._terule_counts().auditallow
 
     @property
     def auditallowxperm_count(self):
         """The number of auditallowxperm rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.auditallowxperm)
+        return self._terule_counts().auditallowxperm
 
     @property
     def boolean_count(self):
@@ -270,7 +418,7 @@ cdef class SELinuxPolicy:
     @property
     def conditional_count(self):
         """The number of conditionals."""
-        return len(self.conditionals())
+        return self._symbol_counts().conditionals
 
     @property
     def constraint_count(self):
@@ -291,14 +439,12 @@ cdef class SELinuxPolicy:
     @property
     def dontaudit_count(self):
         """The number of dontaudit rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.dontaudit)
+        return self._terule_counts().dontaudit
 
     @property
     def dontauditxperm_count(self):
         """The number of dontauditxperm rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.dontauditxperm)
+        return self._terule_counts().dontauditxperm
 
     @property
     def fs_use_count(self):
@@ -350,14 +496,12 @@ cdef class SELinuxPolicy:
     @property
     def neverallow_count(self):
         """The number of neverallow rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.neverallow)
+        return self._terule_counts().neverallow
 
     @property
     def neverallowxperm_count(self):
         """The number of neverallowxperm rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.neverallowxperm)
+        return self._terule_counts().neverallowxperm
 
     @property
     def nodecon_count(self):
@@ -406,46 +550,49 @@ cdef class SELinuxPolicy:
 
     @property
     def range_transition_count(self):
-        return sum(1 for r in self.mlsrules()
-                   if r.ruletype == MLSRuletype.range_transition)
+        """The number of range_transition rules."""
+        # range_transition is the only MLS rule type
+        return len(self.mlsrules())
 
     @property
     def role_count(self):
         """The number of roles."""
         return len(self.roles())
 
+    @property
+    def type_alias_count(self):
+        """The number of type aliases."""
+        return self._symbol_counts().type_aliases
+
     @property
     def type_attribute_count(self):
         """The number of (type) attributes."""
-        return len(self.typeattributes())
+        return self._symbol_counts().type_attributes
 
     @property
     def type_change_count(self):
         """The number of type_change rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.type_change)
+        return self._terule_counts().type_change
 
     @property
     def type_count(self):
         """The number of types."""
-        return len(self.types())
+        return self._symbol_counts().types
 
     @property
     def type_member_count(self):
         """The number of type_member rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.type_member)
+        return self._terule_counts().type_member
 
     @property
     def type_transition_count(self):
         """The number of type_transition rules."""
-        return sum(1 for r in self.terules()
-                   if r.ruletype == TERuletype.type_transition)
+        return self._terule_counts().type_transition
 
     @property
     def typebounds_count(self):
         """The number of typebounds rules."""
-        return len(TypeboundsIterator.factory(self, &self.handle.p.symtab[sepol.SYM_TYPES].table))
+        return self._symbol_counts().typebounds
 
     @property
     def user_count(self):
@@ -462,35 +609,46 @@ cdef class SELinuxPolicy:
     #
     def lookup_boolean(self, name):
         """Look up a Boolean."""
-        for b in self.bools():
-            if b == name:
-                return b
+        cdef sepol.cond_bool_datum_t *datum = \
+            <sepol.cond_bool_datum_t *>self.symbol_name_to_datum(sepol.SYM_BOOLS, name)
+
+        if datum == NULL:
+            raise InvalidBoolean("{0} is not a valid Boolean".format(name))
 
-        raise InvalidBoolean("{0} is not a valid Boolean".format(name))
+        return Boolean.factory(self, datum)
 
     def lookup_category(self, name):
         """Look up a category."""
-        for c in self.categories():
-            if c == name:
-                return c
+        cdef sepol.cat_datum_t *datum = \
+            <sepol.cat_datum_t *>self.symbol_name_to_datum(sepol.SYM_CATS, name)
 
-        raise InvalidCategory("{0} is not a valid category".format(name))
+        if datum == NULL:
+            raise InvalidCategory("{0} is not a valid category".format(name))
+
+        if datum.isalias:
+            datum = self.category_value_to_datum(datum.s.value - 1)
+
+        return Category.factory(self, datum)
 
     def lookup_class(self, name):
         """Look up an object class."""
-        for cls in self.classes():
-            if cls == name:
-                return cls
+        cdef sepol.class_datum_t *datum = \
+            <sepol.class_datum_t *>self.symbol_name_to_datum(sepol.SYM_CLASSES, name)
+
+        if datum == NULL:
+            raise InvalidClass("{0} is not a valid class".format(name))
 
-        raise InvalidClass("{0} is not a valid class".format(name))
+        return ObjClass.factory(self, datum)
 
     def lookup_common(self, name):
         """Look up a common permission set."""
-        for common in self.commons():
-            if common == name:
-                return common
+        cdef sepol.common_datum_t *datum = \
+            <sepol.common_datum_t *>self.symbol_name_to_datum(sepol.SYM_COMMONS, name)
 
-        raise InvalidCommon("{0} is not a valid common".format(name))
+        if datum == NULL:
+            raise InvalidCommon("{0} is not a valid common".format(name))
+
+        return Common.factory(self, datum)
 
     def lookup_initialsid(self, name):
         """Look up an initial sid."""
@@ -506,11 +664,16 @@ cdef class SELinuxPolicy:
 
     def lookup_sensitivity(self, name):
         """Look up a MLS sensitivity by name."""
-        for s in self.sensitivities():
-            if s == name:
-                return s
+        cdef sepol.level_datum_t *datum = \
+            <sepol.level_datum_t *>self.symbol_name_to_datum(sepol.SYM_LEVELS, name)
+
+        if datum == NULL:
+            raise InvalidSensitivity("{0} is not a valid sensitivity".format(name))
 
-        raise InvalidSensitivity("{0} is not a valid sensitivity".format(name))
+        if datum.isalias:
+            datum = self.level_value_to_datum(datum.level.sens - 1)
+
+        return Sensitivity.factory(self, datum)
 
     def lookup_range(self, range_):
         """Look up a MLS range."""
@@ -518,43 +681,50 @@ cdef class SELinuxPolicy:
 
     def lookup_role(self, name):
         """Look up a role by name."""
-        for r in self.roles():
-            if r == name:
-                return r
+        cdef sepol.role_datum_t *datum = \
+            <sepol.role_datum_t *>self.symbol_name_to_datum(sepol.SYM_ROLES, name)
+
+        if datum == NULL:
+            raise InvalidRole("{0} is not a valid role".format(name))
 
-        raise InvalidRole("{0} is not a valid role".format(name))
+        return Role.factory(self, datum)
 
     def lookup_type(self, name):
         """Look up a type by name."""
-        for t in self.types():
-            if t == name:
-                return t
+        cdef sepol.type_datum_t *datum = self.type_name_to_datum(name)
 
-        raise InvalidType("{0} is not a valid type".format(name))
+        if datum == NULL or datum.flavor != sepol.TYPE_TYPE:
+            raise InvalidType("{0} is not a valid type".format(name))
+
+        return Type.factory(self, datum)
 
     def lookup_type_or_attr(self, name):
         """Look up a type or type attribute by name."""
-        for t in chain(self.types(), self.typeattributes()):
-            if t == name:
-                return t
+        cdef sepol.type_datum_t *datum = self.type_name_to_datum(name)
+
+        if datum == NULL:
+            raise InvalidType("{0} is not a valid type attribute".format(name))
 
-        raise InvalidType("{0} is not a valid type attribute".format(name))
+        return type_or_attr_factory(self, datum)
 
     def lookup_typeattr(self, name):
         """Look up a type attribute by name."""
-        for t in self.typeattributes():
-            if t == name:
-                return t
+        cdef sepol.type_datum_t *datum = self.type_name_to_datum(name)
+
+        if datum == NULL or datum.flavor != sepol.TYPE_ATTRIB:
+            raise InvalidType("{0} is not a valid type attribute".format(name))
 
-        raise InvalidType("{0} is not a valid type attribute".format(name))
+        return TypeAttribute.factory(self, datum)
 
     def lookup_user(self, name):
         """Look up a user by name."""
-        for u in self.users():
-            if u == name:
-                return u
+        cdef sepol.user_datum_t *datum = \
+            <sepol.user_datum_t *>self.symbol_name_to_datum(sepol.SYM_USERS, name)
 
-        raise InvalidUser("{0} is not a valid user".format(name))
+        if datum == NULL:
+            raise InvalidUser("{0} is not a valid user".format(name))
+
+        return User.factory(self, datum)
 
     #
     # Policy components iterators
@@ -619,6 +789,26 @@ cdef class SELinuxPolicy:
         """Iterator over all conditional rule blocks."""
         return ConditionalIterator.factory(self, self.handle.p.cond_list)
 
+    def boolean_conditionals(self, booleans):
+        """
+        Get the conditionals whose expressions reference any of the
+        Booleans, in policy order.  The Boolean-to-conditional index
+        is built on first use.
+
+        Parameter:
+        booleans    An iterable of Booleans.
+
+        Return:     A list of Conditionals.
+        """
+        cdef Boolean b
+
+        index = self._conditional_index()
+        positions = set()
+        for b in booleans:
+            positions.update(index.by_boolean.get(b.handle.s.value, ()))
+
+        return [index.conditionals[pos] for pos in sorted(positions)]
+
     def mlsrules(self):
         """Iterator over all MLS rules."""
         return MLSRuleIterator.factory(self, &self.handle.p.range_tr)
@@ -637,6 +827,219 @@ cdef class SELinuxPolicy:
             yield from c.true_rules()
             yield from c.false_rules()
 
+    def terule_cursor(self):
+        """
+        Cursor over all type enforcement rules.  This is faster than
+        terules(), but each rule is only valid until the cursor advances.
+        """
+        return TERuleCursor.factory(self)
+
+    def terule_index(self):
+        """
+        The inverted indexes of the type enforcement rules.
+        The indexes are built on first use.
+        """
+        if self.te_index is None:
+            self.log.debug("Building TE rule index.")
+            self.te_index = TERuleIndex.factory(self)
+
+        return self.te_index
+
+    def terule_key(self, rule):
+        """
+        Get the key of a TE rule, for looking up the rule with
+        lookup_terule() without creating the other rules of the policy.
+        Keys are valid for the policy and other loads of the same
+        policy file.
+
+        Parameter:
+        rule        A TE rule of the policy.
+
+        Return: tuple(ruletype, source, target, tclass, xperms, cond, filename)
+        ruletype    The TERuletype value of the rule.
+        source      The policy value of the source type or attribute.
+        target      The policy value of the target type or attribute.
+        tclass      The policy value of the object class.
+        xperms      For extended permission rules, the extended permission
+                    type and ioctl driver (type << 8 | driver), otherwise 0.
+        cond        0 if the rule is unconditional, otherwise
+                    1 + 2 * the position of the rule's conditional in
+                    conditionals() + 1 if the rule is in the true block.
+        filename    The filename of filename type_transition
+                    rules, otherwise None.
+        """
+        cdef:
+            BaseTERule terule
+            FileNameTERule fnrule
+            uint32_t xperms = 0
+            size_t cond = 0
+
+        if isinstance(rule, FileNameTERule):
+            fnrule = <FileNameTERule>rule
+            return (sepol.AVTAB_TRANSITION, fnrule.key.stype, fnrule.key.ttype,
+                    fnrule.key.tclass, 0, 0, intern(fnrule.key.name))
+
+        terule = rule
+
+        if terule.key.specified & sepol.AVTAB_XPERMS:
+            xperms = terule.datum.xperms.specified << 8 | terule.datum.xperms.driver
+
+        if terule._conditional is not None:
+            cond = 1 + 2 * self._conditional_index().positions[
+                <uintptr_t>(<Conditional>terule._conditional).handle] + \
+                (1 if terule._conditional_block else 0)
+
+        return (terule.key.specified & ~sepol.AVTAB_ENABLED, terule.key.source_type,
+                terule.key.target_type, terule.key.target_class, xperms, cond, None)
+
+    def lookup_terule(self, key):
+        """
+        Look up a TE rule by its key from terule_key().  Unconditional
+        rules are found with the hash table of the rules, and conditional
+        rules in the block of their conditional.
+
+        Parameter:
+        key         The key of the rule.
+
+        Return:     The TE rule.
+        """
+        cdef:
+            sepol.avtab_key_t avkey
+            sepol.filename_trans_t fnkey
+            sepol.avtab_ptr_t node
+            sepol.cond_av_list_t *cond_rule
+            sepol.hashtab_ptr_t fnnode
+            uint32_t xperms
+            uint32_t bucket
+            bytes name
+
+        ruletype, source, target, tclass, xperms, cond, filename = key
+
+        if filename is not None:
+            name = filename.encode("ascii")
+            fnkey.stype = source
+            fnkey.ttype = target
+            fnkey.tclass = tclass
+            fnkey.name = name
+            fnnode = hashtab_search_node(self.handle.p.filename_trans,
+                                         <sepol.const_hashtab_key_t>&fnkey)
+            if fnnode != NULL:
+                return FileNameTERule.factory(self, <sepol.filename_trans_t *>fnnode.key,
+                                              <sepol.filename_trans_datum_t *>fnnode.datum)
+
+        elif cond:
+            conditional = self._conditional_index().conditionals[(cond - 1) >> 1]
+            block = bool((cond - 1) & 1)
+            cond_rule = (<Conditional>conditional).handle.true_list if block else \
+                (<Conditional>conditional).handle.false_list
+
+            while cond_rule != NULL:
+                if avtab_node_matches(cond_rule.node, ruletype, source, target, tclass, xperms):
+                    return terule_factory(self, cond_rule.node, conditional, block)
+
+                cond_rule = cond_rule.next
+
+        else:
+            avkey.source_type = source
+            avkey.target_type = target
+            avkey.target_class = tclass
+            avkey.specified = ruletype
+
+            node = avtab_search_node(&self.handle.p.te_avtab, &avkey)
+            while node != NULL:
+                if avtab_node_matches(node, ruletype, source, target, tclass, xperms):
+                    return terule_factory(self, node, None, None)
+
+                node = node.next
+
+            # fall back to searching all of the table, in case the
+            # table was hashed differently by this libsepol version.
+            for bucket in range(self.handle.p.te_avtab.nslot):
+                node = self.handle.p.te_avtab.htable[bucket]
+                while node != NULL:
+                    if avtab_node_matches(node, ruletype, source, target, tclass, xperms):
+                        return terule_factory(self, node, None, None)
+
+                    node = node.next
+
+        raise LowLevelPolicyError("{0!r} is not the key of a TE rule in {1}".format(key, self))
+
+    def terule_array(self):
+        """
+        Export the type enforcement rules as integer columns, in one
+        pass over the policy without creating rule objects.  The rules
+        are in the same order as terules().
+
+        The columns are:
+        ruletype    The rule type, as a TERuletype value.
+        source      The policy value of the source type or attribute.
+        target      The policy value of the target type or attribute.
+        tclass      The policy value of the object class.
+        data        The permission bitmask of access vector rules, or the
+                    policy value of the default type of type_* rules.  The
+                    bitmask of dontaudit rules is the permissions which
+                    are not audited, limited to the permissions of the
+                    object class, as in AVRule.perm_vector.  Each
+                    permission is the bit (value - 1) of the permission
+                    in the object class.  It is 0 for extended permission
+                    rules.
+        cond        The ID of the rule's conditional, or 0 if unconditional.
+        block       1 if the rule is in the true block of its
+                    conditional, otherwise 0.
+        filename    The ID of the filename of filename type_transition
+                    rules, otherwise 0.
+
+        Return: TERuleArray(rules, types, classes, conditionals, filenames)
+        rules           A NumPy structured array of the rules.  If NumPy is
+                        not installed, a dictionary of column name to
+                        array.array of the column.
+        types           A list of type and attribute names, indexed by
+                        policy value.
+        classes         A list of object class names, indexed by policy value.
+        conditionals    A list of conditional expressions, indexed by ID.
+        filenames       A list of filenames, indexed by ID.
+
+        Index 0 of the lists is None.
+        """
+        cdef:
+            terule_counts_t counts = self._terule_counts()
+            size_t count
+            terule_row_t *rows
+            dict filenames = {}
+
+        count = counts.allow + counts.auditallow + counts.dontaudit + counts.neverallow + \
+            counts.allowxperm + counts.auditallowxperm + counts.dontauditxperm + \
+            counts.neverallowxperm + counts.type_transition + counts.type_change + \
+            counts.type_member
+
+        buffer = bytearray(count * sizeof(terule_row_t))
+        rows = <terule_row_t *>PyByteArray_AS_STRING(buffer)
+        fill_terule_rows(&self.handle.p, rows, filenames)
+
+        # NumPy is only imported here, so it is not
+        # loaded by users which do not need the array.
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover
+            rules = terule_row_columns(rows, count)
+        else:
+            # the array uses the buffer, so this does not copy the rows
+            rules = numpy.frombuffer(buffer, dtype=numpy.dtype(
+                [(name, "=" + numpy_type) for name, _, numpy_type in terule_array_columns]))
+
+        types = [None]
+        types.extend(self.type_value_to_name(i)
+                     for i in range(self.handle.p.symtab[sepol.SYM_TYPES].nprim))
+
+        classes = [None]
+        classes.extend(self.class_value_to_name(i)
+                       for i in range(self.handle.p.symtab[sepol.SYM_CLASSES].nprim))
+
+        conditionals = [None]
+        conditionals.extend(str(c) for c in self.conditionals())
+
+        return TERuleArray(rules, types, classes, conditionals, [None] + list(filenames))
+
     #
     # Constraints iterators
     #
@@ -718,9 +1121,7 @@ cdef class SELinuxPolicy:
 
     cdef inline category_aliases(self, Category primary):
         """Return an interator for the aliases for the specified category."""
-        return CategoryAliasHashtabIterator.factory(self,
-                                                    &self.handle.p.symtab[sepol.SYM_CATS].table,
-                                                    primary)
+        return iter(self._alias_map(sepol.SYM_CATS).get(primary.handle.s.value, ()))
 
     cdef inline str category_value_to_name(self, size_t value):
         """Return the name of the category by its value."""
@@ -756,14 +1157,41 @@ cdef class SELinuxPolicy:
 
     cdef inline sensitivity_aliases(self, Sensitivity primary):
         """Return an interator for the aliases for the specified sensitivity."""
-        return SensitivityAliasHashtabIterator.factory(self,
-            &self.handle.p.symtab[sepol.SYM_LEVELS].table, primary)
+        return iter(self._alias_map(sepol.SYM_LEVELS).get(primary.handle.level.sens, ()))
 
     cdef inline type_aliases(self, Type primary):
         """Return an iterator for the aliases for the specified type."""
-        return TypeAliasHashtabIterator.factory(self,
-                                                &self.handle.p.symtab[sepol.SYM_TYPES].table,
-                                                primary)
+        return iter(self._alias_map(sepol.SYM_TYPES).get(primary.handle.s.value, ()))
+
+    cdef sepol.hashtab_datum_t symbol_name_to_datum(self, size_t symtab, name):
+        """
+        Return the datum for the specified symbol name using the
+        symbol table's hash table, or NULL if the name is not found.
+        Aliases are not resolved to their primary.
+        """
+        cdef bytes key
+
+        try:
+            key = str(name).encode("ascii")
+        except UnicodeEncodeError:
+            # symbol names are always ASCII
+            return NULL
+
+        return hashtab_search(self.handle.p.symtab[symtab].table, key)
+
+    cdef sepol.type_datum_t* type_name_to_datum(self, name):
+        """
+        Return the type/attribute datum for the specified name, or NULL
+        if the name is not found.  Type aliases are resolved to their
+        primary type.
+        """
+        cdef sepol.type_datum_t *datum = \
+            <sepol.type_datum_t *>self.symbol_name_to_datum(sepol.SYM_TYPES, name)
+
+        if datum != NULL and type_is_alias(datum):
+            datum = self.type_value_to_datum(datum.s.value - 1)
+
+        return datum
 
     cdef inline sepol.type_datum_t* type_value_to_datum(self, size_t value):
         """Return the type datum for the specified type value."""
@@ -784,86 +1212,78 @@ cdef class SELinuxPolicy:
     #
     # Internal methods
     #
-    cdef _set_permissive_flags(self):
+    cdef _alias_map(self, size_t symtab):
         """
-        Set permissive flag in type datums.
-
-        This modifies the policydb.
+        Return the alias map of the type, category, or sensitivity symbol
+        table, a dictionary of primary value to the tuple of its alias
+        names.  The maps of all three tables are built on first use.
+        Alias lookups resolve aliases with the symbol hash tables, so
+        they do not need a map of alias name to primary.
         """
-        cdef:
-            size_t bit
-            sepol.ebitmap_node_t *node = NULL
+        if self.alias_maps is None:
+            self.log.debug("Building alias maps.")
+            self.alias_maps = {}
+            for table in (sepol.SYM_TYPES, sepol.SYM_CATS, sepol.SYM_LEVELS):
+                self.alias_maps[table] = build_alias_map(self.handle.p.symtab[table].table,
+                                                         table)
 
-        self.log.debug("Setting permissive flags in type datums.")
+        return self.alias_maps[symtab]
 
-        bit = sepol.ebitmap_start(&self.handle.p.permissive_map, &node)
-        while bit < sepol.ebitmap_length(&self.handle.p.permissive_map):
-            if sepol.ebitmap_node_get_bit(node, bit):
-                assert bit == self.handle.p.type_val_to_struct[bit - 1].s.value
-                self.handle.p.type_val_to_struct[bit - 1].flags |= sepol.TYPE_FLAGS_PERMISSIVE
+    cdef _conditional_index(self):
+        """Return the ConditionalIndex, building it on first use."""
+        if self.cond_index is None:
+            self.log.debug("Building Boolean conditional index.")
+            self.cond_index = build_conditional_index(self)
 
-            bit = sepol.ebitmap_next(&node, bit)
+        return self.cond_index
 
-    cdef _create_mls_val_to_struct(self):
-        """Create *_val_to_struct arrays for categories and levels."""
-        cdef:
-            sepol.cat_datum_t *cat_datum
-            sepol.hashtab_node_t *node
-            uint32_t bucket = 0
-            size_t bucket_len
-            size_t map_len
-
-        #
-        # Create cat_val_to_struct  (indexed by value -1)
-        #
-        self.log.debug("Creating cat_val_to_struct.")
+    cdef symbol_counts_t _symbol_counts(self):
+        """
+        Return the counts of the types table by flavor, the typebounds,
+        and the conditionals, counting them on first use.
+        """
+        if not self.sym_counts_valid:
+            self.log.debug("Counting types and conditionals.")
+            with nogil:
+                count_symbols(&self.handle.p, &self.sym_counts)
+            self.sym_counts_valid = True
 
-        map_len = self.handle.p.symtab[sepol.SYM_CATS].table.nel
-        bucket_len = self.handle.p.symtab[sepol.SYM_CATS].table[0].size
+        return self.sym_counts
 
-        self.cat_val_to_struct = <sepol.cat_datum_t**>PyMem_Malloc(
-            map_len * sizeof(sepol.cat_datum_t*))
+    cdef terule_counts_t _terule_counts(self):
+        """Return the TE rule counts, counting the rules on first use."""
+        if not self.te_counts_valid:
+            self.log.debug("Counting TE rules.")
+            with nogil:
+                count_terules(&self.handle.p, &self.te_counts)
+            self.te_counts_valid = True
 
-        if self.cat_val_to_struct == NULL:
-            raise MemoryError
+        return self.te_counts
 
-        while bucket < bucket_len:
-            node = self.handle.p.symtab[sepol.SYM_CATS].table[0].htable[bucket]
-            while node != NULL:
-                cat_datum = <sepol.cat_datum_t *>node.datum
-                if cat_datum != NULL:
-                    self.cat_val_to_struct[cat_datum.s.value - 1] = cat_datum
+    cdef _set_permissive_flags(self):
+        """
+        Set permissive flag in type datums.
 
-                node = node.next
+        This modifies the policydb.
+        """
+        self.log.debug("Setting permissive flags in type datums.")
 
-            bucket += 1
+        with nogil:
+            set_permissive_flags(&self.handle.p)
 
-        #
-        # Create level_val_to_struct  (indexed by value -1)
-        #
-        self.log.debug("Creating level_val_to_struct.")
+    cdef _create_mls_val_to_struct(self):
+        """Create *_val_to_struct arrays for categories and levels."""
+        cdef int ret
 
-        map_len = self.handle.p.symtab[sepol.SYM_LEVELS].table.nel
-        bucket_len = self.handle.p.symtab[sepol.SYM_LEVELS].table[0].size
-        bucket = 0
+        self.log.debug("Creating cat_val_to_struct and level_val_to_struct.")
 
-        self.level_val_to_struct = <sepol.level_datum_t**>PyMem_Malloc(
-            map_len * sizeof(sepol.level_datum_t*))
+        with nogil:
+            ret = create_mls_val_to_struct(&self.handle.p, &self.cat_val_to_struct,
+                                           &self.level_val_to_struct)
 
-        if self.level_val_to_struct == NULL:
+        if ret < 0:
             raise MemoryError
 
-        while bucket < bucket_len:
-            node = self.handle.p.symtab[sepol.SYM_LEVELS].table[0].htable[bucket]
-            while node != NULL:
-                level_datum = <sepol.level_datum_t *>node.datum
-                if level_datum != NULL:
-                    self.level_val_to_struct[level_datum.level.sens - 1] = level_datum
-
-                node = node.next
-
-            bucket += 1
-
     cdef _rebuild_attrs_from_map(self):
         """
         Rebuilds data for the attributes and inserts them into the policydb.
@@ -874,68 +1294,17 @@ cdef class SELinuxPolicy:
         the form @ttr<value> where value is the value of the attribute as
         a 0-padded four digit number.
         """
-
-        cdef:
-            size_t i, count
-            int bit
-            sepol.ebitmap_node_t *node = NULL
-            sepol.type_datum_t *tmp_type
-            char *tmp_name
+        cdef int ret
 
         self.log.debug("Rebuilding attributes.")
 
-        for i in range(self.handle.p.symtab[sepol.SYM_TYPES].nprim):
-            tmp_type = self.handle.p.type_val_to_struct[i]
-
-            # skip types
-            if tmp_type.flavor != sepol.TYPE_ATTRIB:
-                continue
-
-            # Synthesize a name if it is missing
-            if self.handle.p.sym_val_to_name[sepol.SYM_TYPES][i] == NULL:
-                # synthesize name
-                tmp_name = <char*>calloc(10, sizeof(char))
-                if tmp_name == NULL:
-                    raise MemoryError
-
-                memset(tmp_name, 0, 10 * sizeof(char))
-                snprintf(tmp_name, 9, "@ttr%04zd", i + 1)
-
-                self.handle.p.sym_val_to_name[sepol.SYM_TYPES][i] = tmp_name
-
-                # do not free, memory is owned by policydb now.
-                tmp_name = NULL
+        with nogil:
+            ret = rebuild_attrs_from_map(&self.handle.p)
 
-            # determine if attribute is empty
-            bit = sepol.ebitmap_start(&self.handle.p.attr_type_map[i], &node)
-            while bit < sepol.ebitmap_length(&self.handle.p.attr_type_map[i]):
-                if sepol.ebitmap_node_get_bit(node, bit):
-                    break
-
-                bit = sepol.ebitmap_next(&node, bit)
-
-            else:
-                # skip empty attributes
-                continue
-
-            # relink the attr_type_map ebitmap to the type datum
-            tmp_type.types.node = self.handle.p.attr_type_map[i].node
-            tmp_type.types.highbit = self.handle.p.attr_type_map[i].highbit
-
-            # disconnect ebitmap from attr_type_map to avoid
-            # double free on policy destroy
-            self.handle.p.attr_type_map[i].node = NULL
-            self.handle.p.attr_type_map[i].highbit = 0
-
-            # now go through each of the member types, and set
-            # the reverse mapping
-            bit = sepol.ebitmap_start(&tmp_type.types, &node)
-            while bit < sepol.ebitmap_length(&tmp_type.types):
-                if sepol.ebitmap_node_get_bit(node, bit):
-                    orig_type = self.handle.p.type_val_to_struct[bit]
-                    ebitmap_set_bit(&orig_type.types, tmp_type.s.value - 1, 1)
-
-                bit = sepol.ebitmap_next(&node, bit)
+        if ret == -EINVAL:
+            raise LowLevelPolicyError("Bitmap overflow while rebuilding attributes.")
+        elif ret < 0:
+            raise MemoryError
 
     cdef _synthesize_attrs(self):
         """
@@ -997,3 +1366,457 @@ cdef class SELinuxPolicy:
             # memory now owned by policydb, do not free
             tmp_name = NULL
             tmp_type = NULL
+
+
+#
+# Functions
+#
+cdef inline void count_terule(terule_counts_t *counts, uint32_t specified) nogil:
+    """Increment the count for the TE rule type specified in an avtab key."""
+    specified &= ~sepol.AVTAB_ENABLED
+
+    if specified == sepol.AVTAB_ALLOWED:
+        counts.allow += 1
+    elif specified == sepol.AVTAB_AUDITALLOW:
+        counts.auditallow += 1
+    elif specified == sepol.AVTAB_AUDITDENY:
+        counts.dontaudit += 1
+    elif specified == sepol.AVTAB_NEVERALLOW:
+        counts.neverallow += 1
+    elif specified == sepol.AVTAB_XPERMS_ALLOWED:
+        counts.allowxperm += 1
+    elif specified == sepol.AVTAB_XPERMS_AUDITALLOW:
+        counts.auditallowxperm += 1
+    elif specified == sepol.AVTAB_XPERMS_DONTAUDIT:
+        counts.dontauditxperm += 1
+    elif specified == sepol.AVTAB_XPERMS_NEVERALLOW:
+        counts.neverallowxperm += 1
+    elif specified == sepol.AVTAB_TRANSITION:
+        counts.type_transition += 1
+    elif specified == sepol.AVTAB_CHANGE:
+        counts.type_change += 1
+    elif specified == sepol.AVTAB_MEMBER:
+        counts.type_member += 1
+
+
+cdef void count_terules(sepol.policydb_t *p, terule_counts_t *counts) nogil:
+    """
+    Count the TE rules by rule type in one pass over the
+    unconditional avtab, the conditional rule lists, and the
+    filename type_transitions, without creating rule objects.
+    """
+    cdef:
+        uint32_t bucket
+        sepol.avtab_ptr_t node
+        sepol.cond_node_t *cond
+        sepol.cond_av_list_t *cond_rule
+
+    memset(counts, 0, sizeof(terule_counts_t))
+
+    for bucket in range(p.te_avtab.nslot):
+        node = p.te_avtab.htable[bucket]
+        while node != NULL:
+            count_terule(counts, node.key.specified)
+            node = node.next
+
+    cond = p.cond_list
+    while cond != NULL:
+        cond_rule = cond.true_list
+        while cond_rule != NULL:
+            count_terule(counts, cond_rule.node.key.specified)
+            cond_rule = cond_rule.next
+
+        cond_rule = cond.false_list
+        while cond_rule != NULL:
+            count_terule(counts, cond_rule.node.key.specified)
+            cond_rule = cond_rule.next
+
+        cond = cond.next
+
+    if p.filename_trans != NULL:
+        counts.type_transition += p.filename_trans.nel
+
+
+cdef void count_symbols(sepol.policydb_t *p, symbol_counts_t *counts) nogil:
+    """
+    Count the types table entries by flavor, the typebounds, and the
+    conditionals in one pass over the types hash table and the
+    conditional list.
+    """
+    cdef:
+        uint32_t bucket
+        sepol.hashtab_node_t *node
+        sepol.type_datum_t *datum
+        sepol.cond_node_t *cond
+        sepol.hashtab_t table = p.symtab[sepol.SYM_TYPES].table
+
+    memset(counts, 0, sizeof(symbol_counts_t))
+
+    for bucket in range(table.size):
+        node = table.htable[bucket]
+        while node != NULL:
+            datum = <sepol.type_datum_t *>node.datum
+            if datum.flavor == sepol.TYPE_ATTRIB:
+                counts.type_attributes += 1
+            elif datum.flavor == sepol.TYPE_ALIAS \
+                    or (datum.flavor == sepol.TYPE_TYPE and datum.primary == 0):
+                # see type_is_alias()
+                counts.type_aliases += 1
+            elif datum.flavor == sepol.TYPE_TYPE:
+                counts.types += 1
+
+            if datum.flavor == sepol.TYPE_TYPE and datum.bounds != 0:
+                counts.typebounds += 1
+
+            node = node.next
+
+    cond = p.cond_list
+    while cond != NULL:
+        counts.conditionals += 1
+        cond = cond.next
+
+
+cdef void set_permissive_flags(sepol.policydb_t *p) nogil:
+    """Set the permissive flag in the type datums of permissive types."""
+    cdef:
+        size_t bit
+        sepol.ebitmap_node_t *node = NULL
+
+    bit = sepol.ebitmap_start(&p.permissive_map, &node)
+    while bit < sepol.ebitmap_length(&p.permissive_map):
+        if sepol.ebitmap_node_get_bit(node, bit):
+            p.type_val_to_struct[bit - 1].flags |= sepol.TYPE_FLAGS_PERMISSIVE
+
+        bit = sepol.ebitmap_next(&node, bit)
+
+
+cdef int create_mls_val_to_struct(sepol.policydb_t *p, sepol.cat_datum_t ***cat_val_to_struct,
+                                  sepol.level_datum_t ***level_val_to_struct) nogil:
+    """
+    Create *_val_to_struct arrays for categories and levels,
+    indexed by value - 1.
+
+    Return:     0 on success, or -ENOMEM.
+    """
+    cdef:
+        sepol.cat_datum_t *cat_datum
+        sepol.level_datum_t *level_datum
+        sepol.hashtab_node_t *node
+        uint32_t bucket
+
+    cat_val_to_struct[0] = <sepol.cat_datum_t**>PyMem_RawMalloc(
+        p.symtab[sepol.SYM_CATS].table.nel * sizeof(sepol.cat_datum_t*))
+
+    if cat_val_to_struct[0] == NULL:
+        return -ENOMEM
+
+    for bucket in range(p.symtab[sepol.SYM_CATS].table[0].size):
+        node = p.symtab[sepol.SYM_CATS].table[0].htable[bucket]
+        while node != NULL:
+            cat_datum = <sepol.cat_datum_t *>node.datum
+            if cat_datum != NULL:
+                cat_val_to_struct[0][cat_datum.s.value - 1] = cat_datum
+
+            node = node.next
+
+    level_val_to_struct[0] = <sepol.level_datum_t**>PyMem_RawMalloc(
+        p.symtab[sepol.SYM_LEVELS].table.nel * sizeof(sepol.level_datum_t*))
+
+    if level_val_to_struct[0] == NULL:
+        return -ENOMEM
+
+    for bucket in range(p.symtab[sepol.SYM_LEVELS].table[0].size):
+        node = p.symtab[sepol.SYM_LEVELS].table[0].htable[bucket]
+        while node != NULL:
+            level_datum = <sepol.level_datum_t *>node.datum
+            if level_datum != NULL:
+                level_val_to_struct[0][level_datum.level.sens - 1] = level_datum
+
+            node = node.next
+
+    return 0
+
+
+cdef int rebuild_attrs_from_map(sepol.policydb_t *p) nogil:
+    """
+    Rebuild the type sets of the attributes from the attr_type_map,
+    and the attribute sets of the types.  Names are synthesized
+    for attributes which are missing them.
+
+    Return:     0 on success, -EINVAL on bitmap overflow, or -ENOMEM.
+    """
+    cdef:
+        size_t i
+        int bit
+        int ret
+        sepol.ebitmap_node_t *node = NULL
+        sepol.type_datum_t *tmp_type
+        sepol.type_datum_t *orig_type
+        char *tmp_name
+
+    for i in range(p.symtab[sepol.SYM_TYPES].nprim):
+        tmp_type = p.type_val_to_struct[i]
+
+        # skip types
+        if tmp_type.flavor != sepol.TYPE_ATTRIB:
+            continue
+
+        # Synthesize a name if it is missing
+        if p.sym_val_to_name[sepol.SYM_TYPES][i] == NULL:
+            # synthesize name
+            tmp_name = <char*>calloc(10, sizeof(char))
+            if tmp_name == NULL:
+                return -ENOMEM
+
+            snprintf(tmp_name, 9, "@ttr%04zd", i + 1)
+
+            p.sym_val_to_name[sepol.SYM_TYPES][i] = tmp_name
+
+            # do not free, memory is owned by policydb now.
+            tmp_name = NULL
+
+        # determine if attribute is empty
+        bit = sepol.ebitmap_start(&p.attr_type_map[i], &node)
+        while bit < sepol.ebitmap_length(&p.attr_type_map[i]):
+            if sepol.ebitmap_node_get_bit(node, bit):
+                break
+
+            bit = sepol.ebitmap_next(&node, bit)
+
+        else:
+            # skip empty attributes
+            continue
+
+        # relink the attr_type_map ebitmap to the type datum
+        tmp_type.types.node = p.attr_type_map[i].node
+        tmp_type.types.highbit = p.attr_type_map[i].highbit
+
+        # disconnect ebitmap from attr_type_map to avoid
+        # double free on policy destroy
+        p.attr_type_map[i].node = NULL
+        p.attr_type_map[i].highbit = 0
+
+        # now go through each of the member types, and set
+        # the reverse mapping
+        bit = sepol.ebitmap_start(&tmp_type.types, &node)
+        while bit < sepol.ebitmap_length(&tmp_type.types):
+            if sepol.ebitmap_node_get_bit(node, bit):
+                orig_type = p.type_val_to_struct[bit]
+                ret = ebitmap_set_bit(&orig_type.types, tmp_type.s.value - 1, 1)
+                if ret < 0:
+                    return ret
+
+            bit = sepol.ebitmap_next(&node, bit)
+
+    return 0
+
+
+cdef inline void fill_terule_row(sepol.policydb_t *p, terule_row_t *row, sepol.avtab_ptr_t node,
+                                 uint32_t cond, uint8_t block):
+    """Fill a TE rule row from an avtab node."""
+    cdef uint32_t ruletype = node.key.specified & ~sepol.AVTAB_ENABLED
+
+    row.ruletype = ruletype
+    row.source = node.key.source_type
+    row.target = node.key.target_type
+    row.tclass = node.key.target_class
+    row.cond = cond
+    row.block = block
+    row.filename = 0
+
+    if ruletype & sepol.AVTAB_XPERMS:
+        row.data = 0
+    elif ruletype & sepol.AVRULE_AV:
+        row.data = avtab_perm_vector(p, &node.key, &node.datum)
+    else:
+        row.data = node.datum.data
+
+
+cdef size_t fill_terule_rows(sepol.policydb_t *p, terule_row_t *rows, dict filenames) except *:
+    """
+    Fill TE rule rows in one pass over the unconditional avtab, the
+    filename type_transitions, and the conditional rule lists, in the
+    same order as SELinuxPolicy.terules().  The conditionals are
+    numbered from 1 in policy order.  The filenames are numbered from
+    1 in the filenames dictionary, in the order they are found.
+
+    Return:     The number of rows filled.
+    """
+    cdef:
+        size_t pos = 0
+        uint32_t bucket
+        uint32_t cond_id = 0
+        sepol.avtab_ptr_t node
+        sepol.hashtab_node_t *fnnode
+        sepol.filename_trans_t *fnkey
+        sepol.cond_node_t *cond
+        sepol.cond_av_list_t *cond_rule
+
+    for bucket in range(p.te_avtab.nslot):
+        node = p.te_avtab.htable[bucket]
+        while node != NULL:
+            fill_terule_row(p, &rows[pos], node, 0, 0)
+            pos += 1
+            node = node.next
+
+    if p.filename_trans != NULL:
+        for bucket in range(p.filename_trans.size):
+            fnnode = p.filename_trans.htable[bucket]
+            while fnnode != NULL:
+                fnkey = <sepol.filename_trans_t *>fnnode.key
+                rows[pos].ruletype = sepol.AVTAB_TRANSITION
+                rows[pos].source = fnkey.stype
+                rows[pos].target = fnkey.ttype
+                rows[pos].tclass = fnkey.tclass
+                rows[pos].data = (<sepol.filename_trans_datum_t *>fnnode.datum).otype
+                rows[pos].cond = 0
+                rows[pos].block = 0
+                rows[pos].filename = filenames.setdefault(intern(fnkey.name), len(filenames) + 1)
+                pos += 1
+                fnnode = fnnode.next
+
+    cond = p.cond_list
+    while cond != NULL:
+        cond_id += 1
+
+        cond_rule = cond.true_list
+        while cond_rule != NULL:
+            fill_terule_row(p, &rows[pos], cond_rule.node, cond_id, 1)
+            pos += 1
+            cond_rule = cond_rule.next
+
+        cond_rule = cond.false_list
+        while cond_rule != NULL:
+            fill_terule_row(p, &rows[pos], cond_rule.node, cond_id, 0)
+            pos += 1
+            cond_rule = cond_rule.next
+
+        cond = cond.next
+
+    return pos
+
+
+cdef dict terule_row_columns(const terule_row_t *rows, size_t count):
+    """Copy TE rule rows into a dictionary of column name to array.array."""
+    cdef:
+        size_t i
+        uint16_t[:] ruletype, source, target, tclass
+        uint32_t[:] data, cond, filename
+        uint8_t[:] block
+
+    columns = dict((name, array(typecode, bytes(count * array(typecode).itemsize)))
+                   for name, typecode, _ in terule_array_columns)
+
+    ruletype = columns["ruletype"]
+    source = columns["source"]
+    target = columns["target"]
+    tclass = columns["tclass"]
+    data = columns["data"]
+    cond = columns["cond"]
+    block = columns["block"]
+    filename = columns["filename"]
+
+    for i in range(count):
+        ruletype[i] = rows[i].ruletype
+        source[i] = rows[i].source
+        target[i] = rows[i].target
+        tclass[i] = rows[i].tclass
+        data[i] = rows[i].data
+        cond[i] = rows[i].cond
+        block[i] = rows[i].block
+        filename[i] = rows[i].filename
+
+    return columns
+
+
+cdef inline bint avtab_node_matches(sepol.avtab_ptr_t node, uint32_t ruletype, uint32_t source,
+                                    uint32_t target, uint32_t tclass, uint32_t xperms) nogil:
+    """Determine if an avtab node has the TE rule key from SELinuxPolicy.terule_key()."""
+    if node.key.source_type != source or node.key.target_type != target or \
+            node.key.target_class != tclass or \
+            node.key.specified & ~sepol.AVTAB_ENABLED != ruletype:
+        return False
+
+    if node.key.specified & sepol.AVTAB_XPERMS:
+        return node.datum.xperms != NULL and \
+            node.datum.xperms.specified << 8 | node.datum.xperms.driver == xperms
+
+    return True
+
+
+cdef build_conditional_index(SELinuxPolicy policy):
+    """
+    Build the ConditionalIndex of a policy, in one pass over its
+    conditional list.
+    """
+    cdef:
+        sepol.cond_node_t *node = policy.handle.p.cond_list
+        sepol.cond_expr_t *expr
+        size_t pos = 0
+
+    conditionals = []
+    by_boolean = {}
+    positions = {}
+
+    while node != NULL:
+        conditionals.append(Conditional.factory(policy, node))
+        positions[<uintptr_t>node] = pos
+
+        expr = node.expr
+        while expr != NULL:
+            if expr.expr_type == sepol.COND_BOOL:
+                bool_positions = by_boolean.setdefault(expr.bool, [])
+                # a Boolean can be used more than once in an expression
+                if not bool_positions or bool_positions[-1] != pos:
+                    bool_positions.append(pos)
+
+            expr = expr.next
+
+        node = node.next
+        pos += 1
+
+    return ConditionalIndex(conditionals,
+                            dict((value, tuple(p)) for value, p in by_boolean.items()),
+                            positions)
+
+
+cdef build_alias_map(sepol.hashtab_t table, size_t symtab):
+    """
+    Build the alias map of a type, category, or sensitivity symbol table,
+    in one pass over its hash table.  The aliases of each primary are
+    in hash table order.
+    """
+    cdef:
+        sepol.hashtab_node_t *node
+        sepol.type_datum_t *type_datum
+        sepol.cat_datum_t *cat_datum
+        sepol.level_datum_t *level_datum
+        uint32_t bucket
+        uint32_t primary
+
+    aliases = {}
+
+    for bucket in range(table.size):
+        node = table.htable[bucket]
+        while node != NULL:
+            primary = 0
+
+            if symtab == sepol.SYM_TYPES:
+                type_datum = <sepol.type_datum_t *>node.datum
+                if type_is_alias(type_datum):
+                    primary = type_datum.s.value
+            elif symtab == sepol.SYM_CATS:
+                cat_datum = <sepol.cat_datum_t *>node.datum
+                if cat_datum.isalias:
+                    primary = cat_datum.s.value
+            else:
+                level_datum = <sepol.level_datum_t *>node.datum
+                if level_datum.isalias:
+                    primary = level_datum.level.sens
+
+            if primary:
+                aliases.setdefault(primary, []).append(intern(node.key))
+
+            node = node.next
+
+    return dict((primary, tuple(names)) for primary, names in aliases.items())
@@ -21,7 +21,7 @@ from libc.stdint cimport uint8_t, uint16_t, uint32_t, uint64_t
 from libc.stdio cimport FILE
 
 
-cdef extern from "<sepol/handle.h>":
+cdef extern from "<sepol/handle.h>" nogil:
     cdef struct sepol_handle:
         pass
     ctypedef sepol_handle sepol_handle_t
@@ -30,12 +30,12 @@ cdef extern from "<sepol/handle.h>":
     void sepol_handle_destroy(sepol_handle_t *sh)
 
 
-cdef extern from "<sepol/debug.h>":
+cdef extern from "<sepol/debug.h>" nogil:
     ctypedef void (*msg_callback)(void *varg, sepol_handle_t *handle, const char *fmt, ...)
     void sepol_msg_set_callback(sepol_handle * handle, msg_callback cb, void *cb_arg)
 
 
-cdef extern from "<sepol/policydb/services.h>":
+cdef extern from "<sepol/policydb/services.h>" nogil:
     cdef int SECURITY_FS_USE_XATTR
     cdef int SECURITY_FS_USE_TRANS
     cdef int SECURITY_FS_USE_TASK
@@ -43,7 +43,7 @@ cdef extern from "<sepol/policydb/services.h>":
     cdef int SECURITY_FS_USE_NONE
 
 
-cdef extern from "<sepol/policydb/flask.h>":
+cdef extern from "<sepol/policydb/flask.h>" nogil:
     cdef int SECCLASS_DIR
     cdef int SECCLASS_FILE
     cdef int SECCLASS_LNK_FILE
@@ -53,7 +53,7 @@ cdef extern from "<sepol/policydb/flask.h>":
     cdef int SECCLASS_BLK_FILE
 
 
-cdef extern from "<sepol/policydb/flask_types.h>":
+cdef extern from "<sepol/policydb/flask_types.h>" nogil:
     cdef int SELINUX_MAGIC
 
     ctypedef char* sepol_security_context_t
@@ -62,7 +62,7 @@ cdef extern from "<sepol/policydb/flask_types.h>":
     ctypedef uint32_t sepol_security_id_t
 
 
-cdef extern from "<sepol/policydb/ebitmap.h>":
+cdef extern from "<sepol/policydb/ebitmap.h>" nogil:
     #
     # ebitmap_node_t
     #
@@ -95,7 +95,7 @@ cdef extern from "<sepol/policydb/ebitmap.h>":
     int ebitmap_node_get_bit(ebitmap_node_t * n, unsigned int bit)
 
 
-cdef extern from "<sepol/policydb/hashtab.h>":
+cdef extern from "<sepol/policydb/hashtab.h>" nogil:
     ctypedef char* hashtab_key_t
     ctypedef const char* const_hashtab_key_t
     ctypedef void* hashtab_datum_t
@@ -128,7 +128,7 @@ cdef extern from "<sepol/policydb/hashtab.h>":
     ctypedef hashtab_val_t* hashtab_t
 
 
-cdef extern from "<sepol/policydb/symtab.h>":
+cdef extern from "<sepol/policydb/symtab.h>" nogil:
     #
     # symtab_datum_t
     #
@@ -145,7 +145,7 @@ cdef extern from "<sepol/policydb/symtab.h>":
         uint32_t nprim
 
 
-cdef extern from "<sepol/policydb/avtab.h>":
+cdef extern from "<sepol/policydb/avtab.h>" nogil:
     #
     # avtab_key_t
     #
@@ -220,7 +220,7 @@ cdef extern from "<sepol/policydb/avtab.h>":
     ctypedef avtab avtab_t
 
 
-cdef extern from "<sepol/policydb/mls_types.h>":
+cdef extern from "<sepol/policydb/mls_types.h>" nogil:
     #
     # mls_level_t
     #
@@ -264,7 +264,7 @@ cdef extern from "<sepol/policydb/mls_types.h>":
     ctypedef mls_semantic_range mls_semantic_range_t
 
 
-cdef extern from "<sepol/policydb/context.h>":
+cdef extern from "<sepol/policydb/context.h>" nogil:
     #
     # context_struct_t
     #
@@ -277,7 +277,7 @@ cdef extern from "<sepol/policydb/context.h>":
     ctypedef context_struct context_struct_t
 
 
-cdef extern from "<sepol/policydb/sidtab.h>":
+cdef extern from "<sepol/policydb/sidtab.h>" nogil:
     #
     # sidtab_node_t/sidtab_ptr_t
     #
@@ -304,7 +304,7 @@ cdef extern from "<sepol/policydb/sidtab.h>":
         unsigned char shutdown
 
 
-cdef extern from "<sepol/policydb/conditional.h>":
+cdef extern from "<sepol/policydb/conditional.h>" nogil:
     cdef int COND_EXPR_MAXDEPTH
     cdef int COND_MAX_BOOLS
 
@@ -358,7 +358,7 @@ cdef extern from "<sepol/policydb/conditional.h>":
     ctypedef cond_node cond_list_t
 
 
-cdef extern from "<sepol/policydb/constraint.h>":
+cdef extern from "<sepol/policydb/constraint.h>" nogil:
     cdef int CEXPR_NOT
     cdef int CEXPR_AND
     cdef int CEXPR_OR
@@ -406,11 +406,11 @@ cdef extern from "<sepol/policydb/constraint.h>":
     ctypedef constraint_node constraint_node_t
 
 
-cdef extern from "<sepol/policydb/polcaps.h>":
+cdef extern from "<sepol/policydb/polcaps.h>" nogil:
     const char *sepol_polcap_getname(unsigned int capnum)
 
 
-cdef extern from "<sepol/policydb/policydb.h>":
+cdef extern from "<sepol/policydb/policydb.h>" nogil:
     #
     # class_perm_node_t
     #
@@ -846,7 +846,7 @@ cdef extern from "<sepol/policydb/policydb.h>":
     ctypedef policydb policydb_t
 
 
-cdef extern from "<sepol/policydb.h>":
+cdef extern from "<sepol/policydb.h>" nogil:
     cdef struct sepol_policy_file:
         pass
     ctypedef sepol_policy_file sepol_policy_file_t
@@ -868,6 +868,7 @@ cdef extern from "<sepol/policydb.h>":
     int sepol_policy_file_create(sepol_policy_file_t ** pf)
     void sepol_policy_file_set_handle(sepol_policy_file_t * pf, sepol_handle_t * handle)
     void sepol_policy_file_set_fp(sepol_policy_file_t * pf, FILE * fp)
+    void sepol_policy_file_set_mem(sepol_policy_file_t * pf, char *data, size_t len)
     int sepol_policydb_read(sepol_policydb_t * p, sepol_policy_file_t * pf)
     void sepol_policydb_free(sepol_policydb_t * p)
     void sepol_policy_file_free(sepol_policy_file_t * pf)
@@ -184,7 +184,7 @@ cdef class HashtabIterator(PolicyIterator):
         sepol.hashtab_node_t *curr
         unsigned int bucket
 
-    def _next_bucket(self):
+    cdef void _next_bucket(self):
         """Internal method for advancing to the next bucket."""
         self.bucket += 1
         if self.bucket < self.table[0].size:
@@ -192,7 +192,7 @@ cdef class HashtabIterator(PolicyIterator):
         else:
             self.node = NULL
 
-    def _next_node(self):
+    cdef void _next_node(self):
         """Internal method for advancing to the next node."""
         if self.node != NULL and self.node.next != NULL:
             self.node = self.node.next
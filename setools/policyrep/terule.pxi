@@ -18,6 +18,7 @@
 # <http://www.gnu.org/licenses/>.
 #
 import itertools
+from array import array
 
 
 #
@@ -126,7 +127,7 @@ cdef class AVRule(BaseTERule):
     cdef factory(SELinuxPolicy policy, sepol.avtab_key_t *key, sepol.avtab_datum_t *datum,
                  conditional, conditional_block):
         """Factory function for creating AVRule objects."""
-        r = AVRule()
+        cdef AVRule r = AVRule.__new__(AVRule)
         r.policy = policy
         r.key = key
         r.datum = datum
@@ -185,6 +186,14 @@ cdef class AVRule(BaseTERule):
         return set(p for p in PermissionVectorIterator.factory(self.policy, self.tclass,
             ~self.datum.data if self.key.specified & sepol.AVTAB_AUDITDENY else self.datum.data))
 
+    @property
+    def perm_vector(self):
+        """
+        The rule's permission set as an access vector.  Each permission
+        is the bit (value - 1) of the permission in the object class.
+        """
+        return avtab_perm_vector(&self.policy.handle.p, self.key, self.datum)
+
     @property
     def default(self):
         """The rule's default type."""
@@ -210,13 +219,59 @@ cdef class AVRule(BaseTERule):
             yield r
 
 
-cdef class IoctlSet(set):
+cdef class IoctlSet:
 
     """
-    A set with overridden string functions which compresses
-    the output into ioctl ranges instead of individual elements.
+    A set of ioctls, stored as a 65536 bit bitmap indexed by ioctl number.
+
+    Set comparisons and operations work on whole machine words, rather
+    than on the members, and the string functions compress the output
+    into ioctl ranges instead of individual elements.  Other iterables
+    of ints are accepted as the other operand of set operations.
     """
 
+    cdef readonly object bits
+
+    def __cinit__(self):
+        self.bits = 0
+
+    def __init__(self, iterable=None):
+        if iterable is not None:
+            self.update(iterable)
+
+    @staticmethod
+    cdef factory(object bits):
+        """Factory function for creating IoctlSet objects."""
+        cdef IoctlSet s = IoctlSet.__new__(IoctlSet)
+        s.bits = bits
+        return s
+
+    @staticmethod
+    cdef from_xperms(sepol.avtab_extended_perms_t *xperms):
+        """Create an IoctlSet from the extended permissions of an AV rule."""
+        cdef:
+            size_t i
+            size_t curr
+            size_t words = sizeof(xperms.perms) // sizeof(xperms.perms[0])
+
+        perms = 0
+        for i in range(words):
+            perms |= <object>xperms.perms[i] << (32 * i)
+
+        if xperms.specified & sepol.AVTAB_XPERMS_IOCTLFUNCTION:
+            return IoctlSet.factory(perms << (xperms.driver << 8))
+
+        elif xperms.specified & sepol.AVTAB_XPERMS_IOCTLDRIVER:
+            # each driver is represented by its first ioctl
+            bits = 0
+            for curr in range(32 * words):
+                if sepol.xperm_test(curr, xperms.perms):
+                    bits |= <object>1 << (curr << 8)
+
+            return IoctlSet.factory(bits)
+
+        raise LowLevelPolicyError("Unknown extended permission: {}".format(xperms.specified))
+
     def __format__(self, spec):
         """
         String formating.
@@ -232,21 +287,19 @@ cdef class IoctlSet(set):
         """
 
         # generate short permission notation
-        perms = sorted(self)
         shortlist = []
-        for _, i in itertools.groupby(perms, key=lambda k, c=itertools.count(): k - next(c)):
-            group = list(i)
-            if len(group) > 1:
-                shortlist.append("{0:#06x}-{1:#06x}".format(group[0], group[-1]))
+        for low, high in self._runs():
+            if low != high:
+                shortlist.append("{0:#06x}-{1:#06x}".format(low, high))
             else:
-                shortlist.append("{0:#06x}".format(group[0]))
+                shortlist.append("{0:#06x}".format(low))
 
         if not spec:
             return " ".join(shortlist)
         elif spec == ",":
             return ", ".join(shortlist)
         else:
-            return super(IoctlSet, self).__format__(spec)
+            return format(set(self), spec)
 
     def __str__(self):
         return "{0}".format(self)
@@ -254,14 +307,189 @@ cdef class IoctlSet(set):
     def __repr__(self):
         return "{{ {0:,} }}".format(self)
 
+    def __reduce__(self):
+        return IoctlSet, (), self.bits
+
+    def __setstate__(self, bits):
+        self.bits = bits
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __iter__(self):
+        return _bit_positions(self.bits)
+
+    def __contains__(self, ioctl):
+        try:
+            return 0 <= ioctl <= 0xffff and bool(self.bits >> ioctl & 1)
+        except TypeError:
+            return False
+
+    def __eq__(self, other):
+        if isinstance(other, IoctlSet):
+            return self.bits == (<IoctlSet>other).bits
+        elif isinstance(other, (set, frozenset)):
+            return len(self) == len(other) and all(i in self for i in other)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __le__(self, other):
+        return self.issubset(other)
+
+    def __lt__(self, other):
+        return self != other and self.issubset(other)
+
+    def __ge__(self, other):
+        return self.issuperset(other)
+
+    def __gt__(self, other):
+        return self != other and self.issuperset(other)
+
+    # In Cython, either operand of a binary operator can be the IoctlSet
+    def __and__(left, right):
+        return IoctlSet.factory(_ioctl_bits(left) & _ioctl_bits(right))
+
+    def __or__(left, right):
+        return IoctlSet.factory(_ioctl_bits(left) | _ioctl_bits(right))
+
+    def __sub__(left, right):
+        return IoctlSet.factory(_ioctl_bits(left) & ~_ioctl_bits(right))
+
+    def __xor__(left, right):
+        return IoctlSet.factory(_ioctl_bits(left) ^ _ioctl_bits(right))
+
+    def __iand__(self, other):
+        self.bits &= _ioctl_bits(other)
+        return self
+
+    def __ior__(self, other):
+        self.bits |= _ioctl_bits(other)
+        return self
+
+    def __isub__(self, other):
+        self.bits &= ~_ioctl_bits(other)
+        return self
+
+    def __ixor__(self, other):
+        self.bits ^= _ioctl_bits(other)
+        return self
+
+    def _runs(self):
+        """Generator which yields the (low, high) ranges of consecutive ioctls."""
+        bits = self.bits
+        return zip(_bit_positions(bits & ~(bits << 1)), _bit_positions(bits & ~(bits >> 1)))
+
+    def add(self, ioctl):
+        """Add an ioctl to the set."""
+        self.bits |= _ioctl_bits((ioctl,))
+
+    def add_range(self, low, high):
+        """Add the ioctls from low to high, inclusive, to the set."""
+        if not (0 <= low <= high <= 0xffff):
+            raise ValueError("{0:#06x}-{1:#06x} is not a valid ioctl range.".format(low, high))
+
+        self.bits |= ((1 << (high - low + 1)) - 1) << low
+
+    def discard(self, ioctl):
+        """Remove an ioctl from the set, if it is present."""
+        if ioctl in self:
+            self.bits &= ~(1 << ioctl)
+
+    def remove(self, ioctl):
+        """Remove an ioctl from the set.  Raises KeyError if it is not present."""
+        if ioctl not in self:
+            raise KeyError(ioctl)
+
+        self.bits &= ~(1 << ioctl)
+
+    def clear(self):
+        """Remove all ioctls from the set."""
+        self.bits = 0
+
+    def copy(self):
+        """Get a copy of the set."""
+        return IoctlSet.factory(self.bits)
+
+    def update(self, *others):
+        """Add the ioctls of the others to the set."""
+        for other in others:
+            self.bits |= _ioctl_bits(other)
+
+    def intersection(self, *others):
+        """The intersection of this set and the others."""
+        bits = self.bits
+        for other in others:
+            bits &= _ioctl_bits(other)
+
+        return IoctlSet.factory(bits)
+
+    def union(self, *others):
+        """The union of this set and the others."""
+        bits = self.bits
+        for other in others:
+            bits |= _ioctl_bits(other)
+
+        return IoctlSet.factory(bits)
+
+    def difference(self, *others):
+        """The ioctls of this set which are not in the others."""
+        bits = self.bits
+        for other in others:
+            bits &= ~_ioctl_bits(other)
+
+        return IoctlSet.factory(bits)
+
+    def isdisjoint(self, other):
+        """(T/F) this set has no ioctls in common with the other."""
+        return not self.bits & _ioctl_bits(other)
+
+    def issubset(self, other):
+        """(T/F) all ioctls in this set are in the other."""
+        return not self.bits & ~_ioctl_bits(other)
+
+    def issuperset(self, other):
+        """(T/F) all ioctls in the other are in this set."""
+        return not _ioctl_bits(other) & ~self.bits
+
     def ranges(self):
         """
         Return the number of ranges in the set.  Main use
         is to determine if brackets need to be used in
         string output.
         """
-        return sum(1 for (_a, _b) in itertools.groupby(
-            sorted(self), key=lambda k, c=itertools.count(): k - next(c)))
+        return bin(self.bits & ~(self.bits << 1)).count("1")
+
+
+cdef _ioctl_bits(other):
+    """Get the bitmap of an IoctlSet or an iterable of ioctls."""
+    if isinstance(other, IoctlSet):
+        return (<IoctlSet>other).bits
+
+    bits = 0
+    for ioctl in other:
+        if not (0 <= ioctl <= 0xffff):
+            raise ValueError("{0!r} is not a valid ioctl.".format(ioctl))
+
+        bits |= 1 << ioctl
+
+    return bits
+
+
+def _bit_positions(bits):
+    """Generator which yields the positions of the set bits, in ascending order."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield offset * 8 + low.bit_length() - 1
+            byte ^= low
 
 
 cdef class AVRuleXperm(AVRule):
@@ -272,8 +500,9 @@ cdef class AVRuleXperm(AVRule):
     cdef factory(SELinuxPolicy policy, sepol.avtab_key_t *key, sepol.avtab_datum_t *datum,
                  conditional, conditional_block):
         """Factory function for creating AVRule objects."""
-        r = AVRuleXperm()
+        cdef AVRuleXperm r = AVRuleXperm.__new__(AVRuleXperm)
         r.policy = policy
+        r.extended = True
         r.key = key
         r.datum = datum
         r._conditional = conditional
@@ -343,25 +572,14 @@ cdef class AVRuleXperm(AVRule):
     @property
     def perms(self):
         """The rule's extended permission set."""
-        cdef:
-            sepol.avtab_extended_perms_t *xperms = self.datum.xperms
-            IoctlSet ret = IoctlSet()
-            size_t curr = 0
-            size_t len = sizeof(xperms.perms) * sepol.EXTENDED_PERMS_LEN
-
-        while curr < len:
-            if sepol.xperm_test(curr, xperms.perms):
-                if xperms.specified & sepol.AVTAB_XPERMS_IOCTLFUNCTION:
-                    ret.add(xperms.driver << 8 | curr)
-                elif xperms.specified & sepol.AVTAB_XPERMS_IOCTLDRIVER:
-                    ret.add(curr << 8)
-                else:
-                    raise LowLevelPolicyError("Unknown extended permission: {}".format(
-                                              xperms.specified))
+        if self.datum.xperms == NULL:
+            raise LowLevelPolicyError("Extended permission information is NULL")
 
-            curr += 1
+        return IoctlSet.from_xperms(self.datum.xperms)
 
-        return ret
+    @property
+    def perm_vector(self):
+        raise RuleUseError("{0} rules do not have an access vector.".format(self.ruletype))
 
     def expand(self):
         """Expand the rule into an equivalent set of rules without attributes."""
@@ -387,7 +605,7 @@ cdef class TERule(BaseTERule):
     cdef factory(SELinuxPolicy policy, sepol.avtab_key_t *key, sepol.avtab_datum_t *datum,
                  conditional, conditional_block):
         """Factory function for creating TERule objects."""
-        r = TERule()
+        cdef TERule r = TERule.__new__(TERule)
         r.policy = policy
         r.key = key
         r.datum = datum
@@ -437,6 +655,10 @@ cdef class TERule(BaseTERule):
         """The rule's permission set."""
         raise RuleUseError("{0} rules do not have a permission set.".format(self.ruletype))
 
+    @property
+    def perm_vector(self):
+        raise RuleUseError("{0} rules do not have an access vector.".format(self.ruletype))
+
     @property
     def default(self):
         """The rule's default type."""
@@ -470,8 +692,9 @@ cdef class FileNameTERule(PolicyRule):
     @staticmethod
     cdef factory(SELinuxPolicy policy, sepol.filename_trans_t *key, sepol.filename_trans_datum_t *datum):
         """Factory function for creating TERule objects."""
-        r = FileNameTERule()
+        cdef FileNameTERule r = FileNameTERule.__new__(FileNameTERule)
         r.policy = policy
+        r.ruletype = TERuletype.type_transition
         r.key = key
         r.datum = datum
         return r
@@ -540,6 +763,10 @@ cdef class FileNameTERule(PolicyRule):
         """The rule's permission set."""
         raise RuleUseError("{0} rules do not have a permission set.".format(self.ruletype))
 
+    @property
+    def perm_vector(self):
+        raise RuleUseError("{0} rules do not have an access vector.".format(self.ruletype))
+
     @property
     def default(self):
         """The rule's default type."""
@@ -633,6 +860,228 @@ cdef class ExpandedFileNameTERule(FileNameTERule):
         return str(self) < str(other)
 
 
+cdef class TERuleIndex:
+
+    """
+    Inverted indexes of the TE rules in a policy.  The rules are indexed
+    by rule type, source, target, and object class.  Source and target
+    are indexed on the type or attribute as written in the rule.
+
+    The rule type, source, target, object class, and permission vector
+    of each rule are also available as integer columns, indexed by the
+    rule's position.  The columns hold the policy values of the symbols.
+    """
+
+    cdef:
+        SELinuxPolicy policy
+        list rules
+        readonly object ruletype_col
+        readonly object source_col
+        readonly object target_col
+        readonly object tclass_col
+        readonly object perms_col
+        dict by_ruletype
+        dict by_source
+        dict by_target
+        dict by_tclass
+        dict type_expansions
+
+    @staticmethod
+    cdef factory(SELinuxPolicy policy):
+        """Factory function for creating TE rule indexes."""
+        cdef:
+            TERuleIndex idx = TERuleIndex.__new__(TERuleIndex)
+            BaseTERule terule
+            FileNameTERule fnrule
+            size_t pos = 0
+            uint32_t ruletype, source, target, tclass, perms
+
+        idx.policy = policy
+        idx.rules = []
+        idx.ruletype_col = array("H")
+        idx.source_col = array("H")
+        idx.target_col = array("H")
+        idx.tclass_col = array("H")
+        idx.perms_col = array("L")
+        idx.by_ruletype = {}
+        idx.by_source = {}
+        idx.by_target = {}
+        idx.by_tclass = {}
+        idx.type_expansions = {}
+
+        for rule in policy.terules():
+            if isinstance(rule, FileNameTERule):
+                fnrule = <FileNameTERule>rule
+                ruletype = sepol.AVTAB_TRANSITION
+                source = fnrule.key.stype
+                target = fnrule.key.ttype
+                tclass = fnrule.key.tclass
+                perms = 0
+            else:
+                terule = <BaseTERule>rule
+                ruletype = terule.key.specified & ~sepol.AVTAB_ENABLED
+                source = terule.key.source_type
+                target = terule.key.target_type
+                tclass = terule.key.target_class
+                perms = terule.datum.data if ruletype & sepol.AVRULE_AV else 0
+
+            idx.rules.append(rule)
+            idx.ruletype_col.append(ruletype)
+            idx.source_col.append(source)
+            idx.target_col.append(target)
+            idx.tclass_col.append(tclass)
+            idx.perms_col.append(perms)
+            TERuleIndex._add(idx.by_ruletype, ruletype, pos)
+            TERuleIndex._add(idx.by_source, source, pos)
+            TERuleIndex._add(idx.by_target, target, pos)
+            TERuleIndex._add(idx.by_tclass, tclass, pos)
+            pos += 1
+
+        return idx
+
+    @staticmethod
+    cdef inline _add(dict index, uint32_t value, size_t pos):
+        """Add a rule position to an inverted index."""
+        try:
+            index[value].append(pos)
+        except KeyError:
+            index[value] = array("L", (pos,))
+
+    def __getitem__(self, pos):
+        return self.rules[pos]
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def class_perms(self, value):
+        """
+        Get the permissions of an object class, including those inherited
+        from its common, as a dictionary of permission name to the
+        permission's bit in a rule's permission vector.
+
+        Parameter:
+        value       The object class's policy value.
+        """
+        # setools.util imports policyrep, so it is imported here
+        from ..util import class_perm_bits
+        return class_perm_bits(self.tclass(value))
+
+    def expand_type(self, value):
+        """
+        Get the policy values of the types in a type or attribute.
+
+        Parameter:
+        value       The type or attribute's policy value.
+
+        Return:     A tuple of type values.
+        """
+        cdef:
+            sepol.type_datum_t *symbol
+            sepol.ebitmap_node_t *node = NULL
+            size_t bit
+
+        try:
+            return self.type_expansions[value]
+        except KeyError:
+            symbol = self.policy.type_value_to_datum(value - 1)
+            if symbol.flavor == sepol.TYPE_ATTRIB:
+                types = []
+                bit = sepol.ebitmap_start(&symbol.types, &node)
+                while bit < sepol.ebitmap_length(&symbol.types):
+                    if sepol.ebitmap_node_get_bit(node, bit):
+                        types.append(bit + 1)
+
+                    bit = sepol.ebitmap_next(&node, bit)
+
+                expansion = tuple(types)
+            else:
+                expansion = (value,)
+
+            self.type_expansions[value] = expansion
+            return expansion
+
+    def positions(self, ruletype):
+        """
+        Get the positions of the rules of a rule type, in policy order.
+
+        Parameter:
+        ruletype    The TERuletype (or its name) of the rules.
+        """
+        return self.by_ruletype.get(TERuletype.lookup(ruletype).value, array("L"))
+
+    def tclass(self, value):
+        """Get the object class with the specified policy value."""
+        return ObjClass.factory(self.policy, self.policy.class_value_to_datum(value - 1))
+
+    def type_(self, value):
+        """Get the type or attribute with the specified policy value."""
+        return type_or_attr_factory(self.policy, self.policy.type_value_to_datum(value - 1))
+
+    def lookup(self, ruletypes=None, sources=None, targets=None, tclasses=None):
+        """
+        Generator which yields the rules matching all of the criteria, in
+        policy order.  Each criteria is a collection of acceptable values,
+        or None for no restriction.
+
+        Keyword Parameters:
+        ruletypes   A collection of TERuletypes.
+        sources     A collection of types and attributes to match on
+                    the rule's source.  The criteria are matched directly,
+                    so indirect matching must be expanded by the caller.
+        targets     A collection of types and attributes to match on
+                    the rule's target, as with sources.
+        tclasses    A collection of object classes.
+        """
+        criteria = []
+        if ruletypes is not None:
+            criteria.append((set(r.value for r in ruletypes), self.by_ruletype,
+                             self.ruletype_col))
+
+        if sources is not None:
+            criteria.append((set((<BaseType>t).handle.s.value for t in sources),
+                             self.by_source, self.source_col))
+
+        if targets is not None:
+            criteria.append((set((<BaseType>t).handle.s.value for t in targets),
+                             self.by_target, self.target_col))
+
+        if tclasses is not None:
+            criteria.append((set((<ObjClass>c).handle.s.value for c in tclasses),
+                             self.by_tclass, self.tclass_col))
+
+        if not criteria:
+            yield from self.rules
+            return
+
+        # start from the most selective criteria and check the
+        # remaining criteria against the index columns.
+        criteria.sort(key=lambda c: sum(len(c[1].get(v, ())) for v in c[0]))
+        values, index, _ = criteria[0]
+        remaining = [(v, col) for v, _, col in criteria[1:]]
+
+        for pos in sorted(itertools.chain.from_iterable(index[v] for v in values if v in index)):
+            for allowed, col in remaining:
+                if col[pos] not in allowed:
+                    break
+            else:
+                yield self.rules[pos]
+
+
+cdef terule_factory(SELinuxPolicy policy, sepol.avtab_ptr_t node, conditional, cond_block):
+    """Factory function for creating the TE rule object of an avtab node."""
+    if node.key.specified & sepol.AVRULE_AV:
+        return AVRule.factory(policy, &node.key, &node.datum, conditional, cond_block)
+    elif node.key.specified & sepol.AVRULE_TYPE:
+        return TERule.factory(policy, &node.key, &node.datum, conditional, cond_block)
+    elif node.key.specified & sepol.AVRULE_XPERMS:
+        return AVRuleXperm.factory(policy, &node.key, &node.datum, conditional, cond_block)
+    else:
+        raise LowLevelPolicyError("Unknown AV rule type 0x{}".format(node.key.specified, '04x'))
+
+
 #
 # Iterators
 #
@@ -656,7 +1105,7 @@ cdef class TERuleIterator(PolicyIterator):
         i.reset()
         return i
 
-    def _next_bucket(self):
+    cdef void _next_bucket(self):
         """Internal method for advancing to the next bucket."""
         self.bucket += 1
         if self.bucket < self.table.nslot:
@@ -664,7 +1113,7 @@ cdef class TERuleIterator(PolicyIterator):
         else:
             self.node = NULL
 
-    def _next_node(self):
+    cdef void _next_node(self):
         """Internal method for advancing to the next node."""
         if self.node != NULL and self.node.next != NULL:
             self.node = self.node.next
@@ -780,3 +1229,141 @@ cdef class FileNameTERuleIterator(HashtabIterator):
         super().__next__()
         return FileNameTERule.factory(self.policy, <sepol.filename_trans_t *>self.curr.key,
                                       <sepol.filename_trans_datum_t *>self.curr.datum)
+
+
+cdef class TERuleCursor(PolicyIterator):
+
+    """
+    Cursor over the TE rules in the policy, in the same order as
+    SELinuxPolicy.terules().
+
+    Rather than creating a rule object for each rule, the cursor moves
+    one reusable view object per rule class to each rule as it advances.
+    A rule yielded by the cursor is only valid until the cursor advances,
+    so references to it must not be kept.  Use copy.deepcopy() to keep
+    a rule.
+    """
+
+    cdef:
+        # 0: unconditional rules, 1: filename rules,
+        # 2: conditional rules, 3: done
+        int phase
+        uint32_t bucket
+        sepol.avtab_ptr_t node
+        sepol.hashtab_node_t *fnnode
+        sepol.cond_node_t *cond
+        sepol.cond_av_list_t *cond_rule
+        object conditional
+        object conditional_block
+        AVRule avrule
+        AVRuleXperm xpermrule
+        TERule terule
+        FileNameTERule fnrule
+
+    @staticmethod
+    cdef factory(SELinuxPolicy policy):
+        """Factory function for creating TE rule cursors."""
+        c = TERuleCursor()
+        c.policy = policy
+        c.avrule = AVRule.factory(policy, NULL, NULL, None, None)
+        c.xpermrule = AVRuleXperm.factory(policy, NULL, NULL, None, None)
+        c.terule = TERule.factory(policy, NULL, NULL, None, None)
+        c.fnrule = FileNameTERule.factory(policy, NULL, NULL)
+        c.reset()
+        return c
+
+    def __next__(self):
+        cdef:
+            sepol.policydb_t *p = &self.policy.handle.p
+            sepol.avtab_ptr_t node
+
+        while True:
+            if self.phase == 0:
+                if self.node != NULL:
+                    node = self.node
+                    self.node = node.next
+                    return self._view(node)
+                elif self.bucket < p.te_avtab.nslot:
+                    self.node = p.te_avtab.htable[self.bucket]
+                    self.bucket += 1
+                else:
+                    self.phase = 1
+                    self.bucket = 0
+
+            elif self.phase == 1:
+                if self.fnnode != NULL:
+                    self.fnrule.key = <sepol.filename_trans_t *>self.fnnode.key
+                    self.fnrule.datum = <sepol.filename_trans_datum_t *>self.fnnode.datum
+                    self.fnnode = self.fnnode.next
+                    return self.fnrule
+                elif p.filename_trans != NULL and self.bucket < p.filename_trans.size:
+                    self.fnnode = p.filename_trans.htable[self.bucket]
+                    self.bucket += 1
+                else:
+                    self.phase = 2
+                    self._start_conditional(p.cond_list)
+
+            elif self.phase == 2:
+                if self.cond_rule != NULL:
+                    node = self.cond_rule.node
+                    self.cond_rule = self.cond_rule.next
+                    return self._view(node)
+                elif self.conditional_block:
+                    self.conditional_block = False
+                    self.cond_rule = self.cond.false_list
+                else:
+                    self._start_conditional(self.cond.next)
+
+            else:
+                raise StopIteration
+
+    def __len__(self):
+        cdef terule_counts_t counts = self.policy._terule_counts()
+        return counts.allow + counts.auditallow + counts.dontaudit + counts.neverallow + \
+            counts.allowxperm + counts.auditallowxperm + counts.dontauditxperm + \
+            counts.neverallowxperm + counts.type_transition + counts.type_change + \
+            counts.type_member
+
+    def reset(self):
+        """Reset the cursor to the start."""
+        self.phase = 0
+        self.bucket = 0
+        self.node = NULL
+        self.fnnode = NULL
+        self.cond = NULL
+        self.cond_rule = NULL
+        self.conditional = None
+        self.conditional_block = None
+
+    cdef _start_conditional(self, sepol.cond_node_t *cond):
+        """Move the cursor to the true block of a conditional."""
+        self.cond = cond
+        if cond == NULL:
+            self.phase = 3
+            self.cond_rule = NULL
+            self.conditional = None
+            self.conditional_block = None
+        else:
+            self.cond_rule = cond.true_list
+            self.conditional = Conditional.factory(self.policy, cond)
+            self.conditional_block = True
+
+    cdef BaseTERule _view(self, sepol.avtab_ptr_t node):
+        """Move the view object of the rule's class to the avtab node."""
+        cdef BaseTERule view
+
+        if node.key.specified & sepol.AVRULE_AV:
+            view = self.avrule
+        elif node.key.specified & sepol.AVRULE_TYPE:
+            view = self.terule
+        elif node.key.specified & sepol.AVRULE_XPERMS:
+            view = self.xpermrule
+        else:
+            raise LowLevelPolicyError("Unknown AV rule type 0x{}".format(node.key.specified,
+                                                                         '04x'))
+
+        view.key = &node.key
+        view.datum = &node.datum
+        view._conditional = self.conditional
+        view._conditional_block = self.conditional_block
+        return view
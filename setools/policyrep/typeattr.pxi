@@ -46,7 +46,9 @@ cdef class BaseType(PolicySymbol):
 
     """Type/attribute base class."""
 
-    cdef sepol.type_datum_t *handle
+    cdef:
+        sepol.type_datum_t *handle
+        object typeset
 
     def __str__(self):
         return self.policy.type_value_to_name(self.handle.s.value - 1)
@@ -55,6 +57,15 @@ cdef class BaseType(PolicySymbol):
         """Low-level equality check (C pointers)."""
         return self.handle == other.handle
 
+    @property
+    def _value(self):
+        """
+        The value of the type or attribute.
+
+        This is a low-level policy detail exposed for internal use only.
+        """
+        return self.handle.s.value
+
     @property
     def ispermissive(self):
         raise NotImplementedError
@@ -63,6 +74,10 @@ cdef class BaseType(PolicySymbol):
         """Generator that expands this attribute into its member types."""
         raise NotImplementedError
 
+    def type_set(self):
+        """The member types, as a TypeSet."""
+        raise NotImplementedError
+
     def attributes(self):
         """Generator that yields all attributes for this type."""
         raise NotImplementedError
@@ -120,6 +135,13 @@ cdef class Type(BaseType):
         """Generator that expands this into its member types."""
         yield self
 
+    def type_set(self):
+        """This type, as a TypeSet."""
+        if self.typeset is None:
+            self.typeset = TypeSet.factory(self.policy, 1 << (self.handle.s.value - 1))
+
+        return self.typeset
+
     def attributes(self):
         """Generator that yields all attributes for this type."""
         return TypeAttributeEbitmapIterator.factory(self.policy, &self.handle.types)
@@ -174,6 +196,16 @@ cdef class TypeAttribute(BaseType):
         """Generator that expands this attribute into its member types."""
         return TypeEbitmapIterator.factory(self.policy, &self.handle.types)
 
+    def type_set(self):
+        """
+        The member types, as a TypeSet.  This is
+        computed on first use and then cached.
+        """
+        if self.typeset is None:
+            self.typeset = TypeSet.from_ebitmap(self.policy, &self.handle.types)
+
+        return self.typeset
+
     def attributes(self):
         """Generator that yields all attributes for this type."""
         raise SymbolUseError("{0} is an attribute, thus does not have attributes.".format(self))
@@ -191,6 +223,172 @@ cdef class TypeAttribute(BaseType):
         return "attribute {0};".format(self)
 
 
+cdef class TypeSet:
+
+    """
+    An immutable set of types, stored as a bitset indexed by type value.
+
+    Set comparisons and operations between TypeSets work on whole
+    machine words, rather than on the members.  Iterating over the
+    set yields the Type objects.  An empty TypeSet can be created
+    with TypeSet().
+    """
+
+    cdef:
+        SELinuxPolicy policy
+        readonly object bits
+
+    def __cinit__(self):
+        self.bits = 0
+
+    @staticmethod
+    cdef factory(SELinuxPolicy policy, bits):
+        """Factory function for creating TypeSet objects."""
+        cdef TypeSet t = TypeSet.__new__(TypeSet)
+        t.policy = policy
+        t.bits = bits
+        return t
+
+    @staticmethod
+    cdef from_ebitmap(SELinuxPolicy policy, sepol.ebitmap_t *ebitmap):
+        """Create a TypeSet from an ebitmap of type values - 1."""
+        cdef:
+            sepol.ebitmap_node_t *node = ebitmap.node
+            uint32_t length = 0
+            size_t i
+            unsigned char *data
+
+        # the nodes are ordered by startbit and each
+        # has a 64 bit map, so the last node has the highest bits.
+        while node != NULL:
+            length = node.startbit // 8 + sizeof(node.map)
+            node = node.next
+
+        buffer = bytearray(length)
+        data = <unsigned char *>PyByteArray_AS_STRING(buffer)
+
+        node = ebitmap.node
+        while node != NULL:
+            for i in range(sizeof(node.map)):
+                data[node.startbit // 8 + i] = (node.map >> (8 * i)) & 0xff
+
+            node = node.next
+
+        return TypeSet.factory(policy, int.from_bytes(buffer, "little"))
+
+    cdef TypeSet _new(self, TypeSet other, bits):
+        """Create a TypeSet of the result of an operation with another TypeSet."""
+        return TypeSet.factory(self.policy if self.policy is not None else other.policy, bits)
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __iter__(self):
+        data = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+        for offset, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield Type.factory(self.policy, self.policy.type_value_to_datum(
+                    offset * 8 + low.bit_length() - 1))
+                byte ^= low
+
+    def __contains__(self, other):
+        if isinstance(other, Type):
+            return bool(self.bits >> ((<Type>other).handle.s.value - 1) & 1)
+
+        return False
+
+    def __repr__(self):
+        return "TypeSet({{{0}}})".format(", ".join(sorted(str(t) for t in self)))
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __eq__(self, other):
+        if isinstance(other, TypeSet):
+            return self.bits == (<TypeSet>other).bits
+        elif isinstance(other, (set, frozenset)):
+            return set(self) == other
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, TypeSet):
+            return self.bits != (<TypeSet>other).bits
+        elif isinstance(other, (set, frozenset)):
+            return set(self) != other
+
+        return NotImplemented
+
+    def __le__(self, TypeSet other):
+        return self.issubset(other)
+
+    def __lt__(self, TypeSet other):
+        return self.bits != other.bits and self.issubset(other)
+
+    def __ge__(self, TypeSet other):
+        return self.issuperset(other)
+
+    def __gt__(self, TypeSet other):
+        return self.bits != other.bits and self.issuperset(other)
+
+    # In Cython, either operand of a binary operator can be the TypeSet
+    def __and__(left, right):
+        if not isinstance(left, TypeSet) or not isinstance(right, TypeSet):
+            return NotImplemented
+
+        return (<TypeSet>left)._new(right, (<TypeSet>left).bits & (<TypeSet>right).bits)
+
+    def __or__(left, right):
+        if not isinstance(left, TypeSet) or not isinstance(right, TypeSet):
+            return NotImplemented
+
+        return (<TypeSet>left)._new(right, (<TypeSet>left).bits | (<TypeSet>right).bits)
+
+    def __sub__(left, right):
+        if not isinstance(left, TypeSet) or not isinstance(right, TypeSet):
+            return NotImplemented
+
+        return (<TypeSet>left)._new(right, (<TypeSet>left).bits & ~(<TypeSet>right).bits)
+
+    def __xor__(left, right):
+        if not isinstance(left, TypeSet) or not isinstance(right, TypeSet):
+            return NotImplemented
+
+        return (<TypeSet>left)._new(right, (<TypeSet>left).bits ^ (<TypeSet>right).bits)
+
+    def intersection(self, *others):
+        """The intersection of this set and the other TypeSets."""
+        result = self
+        for other in others:
+            result = result & other
+
+        return result
+
+    def union(self, *others):
+        """The union of this set and the other TypeSets."""
+        result = self
+        for other in others:
+            result = result | other
+
+        return result
+
+    def isdisjoint(self, TypeSet other):
+        """(T/F) this set has no types in common with the other TypeSet."""
+        return not self.bits & other.bits
+
+    def issubset(self, TypeSet other):
+        """(T/F) all types in this set are in the other TypeSet."""
+        return not self.bits & ~other.bits
+
+    def issuperset(self, TypeSet other):
+        """(T/F) all types in the other TypeSet are in this set."""
+        return not other.bits & ~self.bits
+
+
 #
 # Hash Table Iterator Classes
 #
@@ -225,23 +423,7 @@ cdef class TypeHashtabIterator(HashtabIterator):
         return Type.factory(self.policy, datum)
 
     def __len__(self):
-        cdef sepol.type_datum_t *datum
-        cdef sepol.hashtab_node_t *node
-        cdef uint32_t bucket = 0
-        cdef size_t count = 0
-
-        while bucket < self.table[0].size:
-            node = self.table[0].htable[bucket]
-            while node != NULL:
-                datum = <sepol.type_datum_t *>node.datum if node else NULL
-                if datum != NULL and datum.flavor == sepol.TYPE_TYPE and not type_is_alias(datum):
-                    count += 1
-
-                node = node.next
-
-            bucket += 1
-
-        return count
+        return self.policy._symbol_counts().types
 
     def reset(self):
         super().reset()
@@ -272,23 +454,7 @@ cdef class TypeAttributeHashtabIterator(HashtabIterator):
         return TypeAttribute.factory(self.policy, <sepol.type_datum_t *> self.curr.datum)
 
     def __len__(self):
-        cdef sepol.type_datum_t *datum
-        cdef sepol.hashtab_node_t *node
-        cdef uint32_t bucket = 0
-        cdef size_t count = 0
-
-        while bucket < self.table[0].size:
-            node = self.table[0].htable[bucket]
-            while node != NULL:
-                datum = <sepol.type_datum_t *>node.datum if node else NULL
-                if datum != NULL and datum.flavor == sepol.TYPE_ATTRIB:
-                    count += 1
-
-                node = node.next
-
-            bucket += 1
-
-        return count
+        return self.policy._symbol_counts().type_attributes
 
     def reset(self):
         super().reset()
@@ -298,66 +464,6 @@ cdef class TypeAttributeHashtabIterator(HashtabIterator):
             self._next_node()
 
 
-cdef class TypeAliasHashtabIterator(HashtabIterator):
-
-    """Iterate over type aliases in the policy."""
-
-    cdef uint32_t primary
-
-    @staticmethod
-    cdef factory(SELinuxPolicy policy, sepol.hashtab_t *table, Type primary):
-        """Factory function for creating type alias iterators."""
-        i = TypeAliasHashtabIterator()
-        i.policy = policy
-        i.table = table
-        i.primary = primary.handle.s.value
-        i.reset()
-        return i
-
-    def __next__(self):
-        super().__next__()
-        datum = <sepol.type_datum_t *> self.curr.datum if self.curr else NULL
-
-        while datum != NULL and (not type_is_alias(datum) or datum.s.value != self.primary):
-            super().__next__()
-            datum = <sepol.type_datum_t *> self.curr.datum if self.curr else NULL
-
-        return intern(self.curr.key)
-
-    def __len__(self):
-        cdef sepol.type_datum_t *datum
-        cdef sepol.hashtab_node_t *node
-        cdef uint32_t bucket = 0
-        cdef size_t count = 0
-
-        while bucket < self.table[0].size:
-            node = self.table[0].htable[bucket]
-            while node != NULL:
-                datum = <sepol.type_datum_t *>node.datum if node else NULL
-                if datum != NULL and self.primary == datum.s.value and type_is_alias(datum):
-                    count += 1
-
-                node = node.next
-
-            bucket += 1
-
-        return count
-
-    def reset(self):
-        super().reset()
-
-        cdef sepol.type_datum_t *datum = <sepol.type_datum_t *> self.node.datum if self.node else NULL
-
-        # advance over any attributes or aliases
-        while datum != NULL and (not type_is_alias(datum) and self.primary != datum.s.value):
-            self._next_node()
-
-            if self.node == NULL or self.bucket >= self.table[0].size:
-                break
-
-            datum = <sepol.type_datum_t *> self.node.datum if self.node else NULL
-
-
 #
 # Ebitmap Iterator Classes
 #
@@ -66,25 +66,40 @@ class PolicyEnum(Enum):
 #
 # Functions
 #
-cdef void sepol_logging_callback(void *varg, sepol.sepol_handle_t * sh, const char *fmt, ...):
-    """Python logging for sepol log callback."""
+cdef void sepol_logging_callback(void *varg, sepol.sepol_handle_t * sh, const char *fmt,
+                                 ...) with gil:
+    """
+    Python logging for sepol log callback.
+
+    This acquires the GIL, since libsepol calls it from
+    policy loading, which runs without the GIL.
+    """
     cdef:
         va_list args
         char *msg
+        int ret
 
     va_start(args, fmt)
-    if vasprintf(&msg, fmt, args) < 0:
-        raise MemoryError
+    ret = vasprintf(&msg, fmt, args)
     va_end(args)
 
-    logging.getLogger("libsepol").debug(msg)
+    if ret < 0:
+        raise MemoryError
+
+    try:
+        logging.getLogger("libsepol").debug(msg)
+    finally:
+        free(msg)
 
 
-cdef void ebitmap_set_bit(sepol.ebitmap_t * e, unsigned int bit, int value):
+cdef int ebitmap_set_bit(sepol.ebitmap_t * e, unsigned int bit, int value) nogil:
     """
     Set a specific bit value in an ebitmap.
 
     This is derived from the libsepol function of the same name.
+
+    Return:     0 on success, -EINVAL on bitmap overflow,
+                or -ENOMEM on memory allocation failure.
     """
 
     cdef:
@@ -95,7 +110,7 @@ cdef void ebitmap_set_bit(sepol.ebitmap_t * e, unsigned int bit, int value):
         uint32_t highbit = startbit + sepol.MAPSIZE
 
     if highbit == 0:
-        raise LowLevelPolicyError("Bitmap overflow, bit {0:#06x}".format(bit))
+        return -EINVAL
 
     prev = NULL
     n = e.node;
@@ -123,17 +138,17 @@ cdef void ebitmap_set_bit(sepol.ebitmap_t * e, unsigned int bit, int value):
 
                     free(n)
 
-            return
+            return 0
 
         prev = n
         n = n.next
 
     if not value:
-        return
+        return 0
 
     new = <sepol.ebitmap_node_t*>calloc(1, sizeof(sepol.ebitmap_node_t))
     if new == NULL:
-        raise MemoryError
+        return -ENOMEM
 
     new.startbit = startbit;
     new.map = sepol.MAPBIT << (bit - new.startbit)
@@ -149,6 +164,77 @@ cdef void ebitmap_set_bit(sepol.ebitmap_t * e, unsigned int bit, int value):
         new.next = e.node
         e.node = new
 
+    return 0
+
+
+cdef bint ebitmap_contains(sepol.ebitmap_t *e1, sepol.ebitmap_t *e2) nogil:
+    """
+    Determine if all of the bits set in e2 are set in e1.
+
+    This is derived from the libsepol function of the same name.
+    """
+
+    cdef:
+        sepol.ebitmap_node_t *n1 = e1.node
+        sepol.ebitmap_node_t *n2 = e2.node
+
+    if e1.highbit < e2.highbit:
+        return False
+
+    while n1 and n2 and n1.startbit <= n2.startbit:
+        if n1.startbit < n2.startbit:
+            n1 = n1.next
+            continue
+
+        if (n1.map & n2.map) != n2.map:
+            return False
+
+        n1 = n1.next
+        n2 = n2.next
+
+    return n2 == NULL
+
+
+cdef bint ebitmap_cmp(sepol.ebitmap_t *e1, sepol.ebitmap_t *e2) nogil:
+    """
+    Determine if two ebitmaps have the same bits set.
+
+    This is derived from the libsepol function of the same name.
+    """
+
+    cdef:
+        sepol.ebitmap_node_t *n1 = e1.node
+        sepol.ebitmap_node_t *n2 = e2.node
+
+    if e1.highbit != e2.highbit:
+        return False
+
+    while n1 and n2 and n1.startbit == n2.startbit and n1.map == n2.map:
+        n1 = n1.next
+        n2 = n2.next
+
+    return n1 == NULL and n2 == NULL
+
+
+cdef void ebitmap_destroy(sepol.ebitmap_t *e) nogil:
+    """
+    Free the nodes of an ebitmap.
+
+    This is derived from the libsepol function of the same name.
+    """
+
+    cdef:
+        sepol.ebitmap_node_t *n = e.node
+        sepol.ebitmap_node_t *next
+
+    while n:
+        next = n.next
+        free(n)
+        n = next
+
+    e.node = NULL
+    e.highbit = 0
+
 
 cdef int hashtab_insert(sepol.hashtab_t h, sepol.hashtab_key_t key, sepol.hashtab_datum_t datum):
     """
@@ -185,3 +271,122 @@ cdef int hashtab_insert(sepol.hashtab_t h, sepol.hashtab_key_t key, sepol.hashta
         h.htable[hvalue] = newnode
 
     h.nel += 1
+
+
+cdef sepol.hashtab_datum_t hashtab_search(sepol.hashtab_t h, sepol.const_hashtab_key_t key):
+    """
+    Search a hash table for the specified key.
+
+    This is derived from the libsepol function of the same name.
+    """
+    cdef sepol.hashtab_ptr_t cur = hashtab_search_node(h, key)
+
+    if cur == NULL:
+        return NULL
+
+    return cur.datum
+
+
+cdef sepol.hashtab_ptr_t hashtab_search_node(sepol.hashtab_t h, sepol.const_hashtab_key_t key):
+    """
+    Search a hash table for the node of the specified key, so the
+    key stored in the hash table can also be used.
+
+    This is derived from the libsepol function hashtab_search.
+    """
+
+    cdef:
+        unsigned int hvalue
+        sepol.hashtab_ptr_t cur
+
+    if h == NULL:
+        return NULL
+
+    hvalue = h.hash_value(h, key)
+    cur = h.htable[hvalue]
+    while cur and h.keycmp(h, key, cur.key) > 0:
+        cur = cur.next
+
+    if cur == NULL or h.keycmp(h, key, cur.key) != 0:
+        return NULL
+
+    return cur
+
+
+cdef inline uint32_t avtab_perm_vector(sepol.policydb_t *p, sepol.avtab_key_t *key,
+                                       sepol.avtab_datum_t *datum) nogil:
+    """
+    Get the access vector of an access vector rule.  Each permission is
+    the bit (value - 1) of the permission in the object class.  dontaudit
+    rules store the permissions to audit, so their vector is inverted and
+    limited to the permissions of the object class.
+    """
+    cdef uint32_t nprim
+
+    if key.specified & sepol.AVTAB_AUDITDENY:
+        nprim = p.class_val_to_struct[key.target_class - 1].permissions.nprim
+        if nprim < 32:
+            return ~datum.data & ((<uint32_t>1 << nprim) - 1)
+
+        return ~datum.data
+
+    return datum.data
+
+
+cdef inline uint32_t avtab_hash_mix(uint32_t h, uint32_t v) nogil:
+    """One round of avtab_hash()."""
+    v *= <uint32_t>0xcc9e2d51
+    v = (v << 15) | (v >> 17)
+    v *= <uint32_t>0x1b873593
+    h ^= v
+    h = (h << 13) | (h >> 19)
+    return h * 5 + <uint32_t>0xe6546b64
+
+
+cdef uint32_t avtab_hash(sepol.avtab_key_t *keyp, uint32_t mask) nogil:
+    """
+    Get the hash table slot of an access vector table key.
+
+    This is derived from the libsepol function of the same name.
+    """
+    cdef uint32_t h = 0
+
+    h = avtab_hash_mix(h, keyp.target_class)
+    h = avtab_hash_mix(h, keyp.target_type)
+    h = avtab_hash_mix(h, keyp.source_type)
+
+    h ^= h >> 16
+    h *= <uint32_t>0x85ebca6b
+    h ^= h >> 13
+    h *= <uint32_t>0xc2b2ae35
+    h ^= h >> 16
+
+    return h & mask
+
+
+cdef sepol.avtab_ptr_t avtab_search_node(sepol.avtab_t *h, sepol.avtab_key_t *key) nogil:
+    """
+    Search an access vector table for the first node of the specified
+    key.  Other nodes with the same key, e.g. extended permission rules
+    of other ioctl drivers, follow it in the hash chain.
+
+    This is derived from the libsepol function of the same name.
+    """
+    cdef:
+        sepol.avtab_ptr_t cur
+        uint16_t specified = key.specified & ~sepol.AVTAB_ENABLED
+
+    if h == NULL or h.htable == NULL:
+        return NULL
+
+    cur = h.htable[avtab_hash(key, h.mask)]
+    while cur != NULL:
+        if key.source_type == cur.key.source_type and \
+                key.target_type == cur.key.target_type and \
+                key.target_class == cur.key.target_class and \
+                specified == cur.key.specified & ~sepol.AVTAB_ENABLED:
+            return cur
+
+        cur = cur.next
+
+    return NULL
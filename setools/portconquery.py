@@ -18,11 +18,11 @@
 #
 import logging
 from socket import IPPROTO_TCP, IPPROTO_UDP
+from operator import attrgetter
 
 from .mixins import MatchContext
-from .query import PolicyQuery
+from .query import PolicyQuery, equal_predicate, range_predicate
 from .policyrep import PortconRange, PortconProtocol
-from .util import match_range
 
 
 class PortconQuery(MatchContext, PolicyQuery):
@@ -124,21 +124,20 @@ class PortconQuery(MatchContext, PolicyQuery):
         self.log.debug("Protocol: {0.protocol!r}".format(self))
         self._match_context_debug(self.log)
 
-        for portcon in self.policy.portcons():
+        yield from self.plan().results()
 
-            if self.ports and not match_range(
-                    portcon.ports,
-                    self.ports,
-                    self.ports_subset,
-                    self.ports_overlap,
-                    self.ports_superset,
-                    self.ports_proper):
-                continue
+    def _candidates(self):
+        return self.policy.portcons()
 
-            if self.protocol and self.protocol != portcon.protocol:
-                continue
+    def _predicates(self):
+        predicates = self._match_context_predicates()
 
-            if not self._match_context(portcon.context):
-                continue
+        if self.ports:
+            predicates.append(range_predicate(attrgetter("ports"), self.ports,
+                                              self.ports_subset, self.ports_overlap,
+                                              self.ports_superset, self.ports_proper))
 
-            yield portcon
+        if self.protocol:
+            predicates.append(equal_predicate(attrgetter("protocol"), self.protocol))
+
+        return predicates
@@ -18,6 +18,24 @@
 #
 import logging
 
+from .policyrep import IoctlSet, TypeSet
+from .policyrep.libpolicyrep import BaseType
+from .util import match_level, match_range, type_set_union
+
+#
+# Predicate selectivity estimates
+#
+# The estimated fraction of candidates which match a predicate.  Query
+# plans evaluate the most selective predicates first, so most candidates
+# are rejected by the first predicate.  Regular expressions are also the
+# most expensive to evaluate, so they are estimated as least selective.
+#
+equal_selectivity = 0.01
+member_selectivity = 0.02
+indirect_selectivity = 0.1
+range_selectivity = 0.25
+regex_selectivity = 0.5
+
 
 class PolicyQuery:
 
@@ -40,7 +58,250 @@ class PolicyQuery:
 
     def results(self):
         """
-        Generator which returns the matches for the query.  This method
+        Generator which returns the matches for the query.  The query is
+        compiled into a plan when the generator starts, so changing the
+        criteria does not affect results which are in progress.
+        """
+        yield from self.plan().results()
+
+    def plan(self, candidates=None):
+        """
+        Compile the query criteria into a QueryPlan.
+
+        Parameter:
+        candidates  An iterable of objects to match, rather than the
+                    query's candidates.  It may contain any object of the
+                    kind that the query matches, e.g. any TE rule for a
+                    TE rule query.
+        """
+        if candidates is None:
+            return QueryPlan(self._candidates(), self._predicates())
+
+        return QueryPlan(candidates, self._scan_predicates())
+
+    def _candidates(self):
+        """
+        Get the iterable of objects which can match the query.  This method
         should be overridden by subclasses.
         """
         raise NotImplementedError
+
+    def _predicates(self):
+        """
+        Get the list of predicates of the query, as returned by the predicate
+        functions below.  This method should be overridden by subclasses.
+        """
+        raise NotImplementedError
+
+    def _scan_predicates(self):
+        """
+        Get the list of predicates of the query for matching any object of
+        the kind that the query matches.  Subclasses which narrow their
+        candidates beyond that must override this method.
+        """
+        return self._predicates()
+
+
+class QueryPlan:
+
+    """
+    A compiled, immutable query.
+
+    Parameters:
+    candidates  The iterable of objects which can match the query.
+    predicates  An iterable of (selectivity, function) pairs.  Each function
+                takes a candidate object and returns true if it matches.
+                Objects match the plan if they match all predicates.
+    """
+
+    __slots__ = ("candidates", "predicates")
+
+    def __init__(self, candidates, predicates):
+        # sort is stable, so predicates with the same
+        # estimate are evaluated in the given order.
+        object.__setattr__(self, "candidates", candidates)
+        object.__setattr__(self, "predicates", tuple(
+            function for _, function in sorted(predicates, key=lambda p: p[0])))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Query plans are immutable.")
+
+    def __repr__(self):
+        return "<QueryPlan with {0} predicates>".format(len(self.predicates))
+
+    def match(self, obj):
+        """Determine if the object matches all predicates."""
+        for match in self.predicates:
+            if not match(obj):
+                return False
+
+        return True
+
+    def results(self):
+        """Generator which yields the candidates matching all predicates."""
+        predicates = self.predicates
+        for obj in self.candidates:
+            for match in predicates:
+                if not match(obj):
+                    break
+            else:
+                yield obj
+
+
+#
+# Predicate functions
+#
+# These return a (selectivity, function) pair for a QueryPlan.  The criteria
+# are resolved when the predicate is created.  The getter parameter is a
+# callable which returns the value to match from a candidate object.
+#
+def itself(obj):
+    """Getter for matching the candidate object itself."""
+    return obj
+
+
+def guard_predicate(predicate, *exceptions):
+    """Make a predicate fail to match, rather than raise, on the exceptions."""
+    selectivity, function = predicate
+
+    def match(obj):
+        try:
+            return function(obj)
+        except exceptions:
+            return False
+
+    return selectivity, match
+
+
+def equal_predicate(getter, criteria):
+    """Predicate matching if the value is equal to the criteria."""
+    return equal_selectivity, lambda obj: getter(obj) == criteria
+
+
+def regex_predicate(getter, criteria, regex):
+    """Predicate of match_regex()."""
+    if regex:
+        search = criteria.search
+        return regex_selectivity, lambda obj: bool(search(str(getter(obj))))
+
+    return equal_predicate(getter, criteria)
+
+
+def member_predicate(getter, criteria, regex=False):
+    """
+    Predicate matching if the value is a member of the criteria (a collection),
+    or with optional regular expression matching.
+    """
+    if regex:
+        search = criteria.search
+        return regex_selectivity, lambda obj: bool(search(str(getter(obj))))
+
+    members = frozenset(criteria)
+    return min(1.0, member_selectivity * len(members)), lambda obj: getter(obj) in members
+
+
+def in_set_predicate(getter, criteria, regex):
+    """Predicate of match_in_set()."""
+    if regex:
+        search = criteria.search
+        return regex_selectivity, lambda obj: any(search(str(m)) for m in getter(obj))
+
+    return member_selectivity, lambda obj: criteria in getter(obj)
+
+
+def indirect_predicate(getter, criteria, indirect, regex):
+    """
+    Predicate of match_indirect_regex().  Attribute criteria are expanded
+    once, into a TypeSet for types and attributes.
+    """
+    if not indirect:
+        return regex_predicate(getter, criteria, regex)
+
+    if regex:
+        search = criteria.search
+        return regex_selectivity, \
+            lambda obj: any(search(str(o)) for o in getter(obj).expand())
+
+    members = frozenset(criteria.expand())
+    if not isinstance(criteria, BaseType):
+        return indirect_selectivity, lambda obj: not members.isdisjoint(getter(obj).expand())
+
+    types = criteria.type_set()
+
+    def match(obj):
+        value = getter(obj)
+        if isinstance(value, BaseType):
+            return not value.type_set().isdisjoint(types)
+
+        return not members.isdisjoint(value.expand())
+
+    return indirect_selectivity, match
+
+
+def set_predicate(getter, criteria, equal, regex):
+    """
+    Predicate of match_regex_or_set().  The value may be a TypeSet or
+    IoctlSet if the criteria is the same kind of set.
+    """
+    if regex:
+        search = criteria.search
+        return regex_selectivity, lambda obj: any(search(str(m)) for m in getter(obj))
+
+    members = criteria if isinstance(criteria, (IoctlSet, TypeSet)) else frozenset(criteria)
+    if equal:
+        return equal_selectivity, lambda obj: getter(obj) == members
+
+    return min(1.0, member_selectivity * len(members)), \
+        lambda obj: not members.isdisjoint(getter(obj))
+
+
+def resolve_regex(criteria, symbols):
+    """
+    Resolve a regular expression criteria once, against the symbols which
+    can match it, e.g. a symbol table of the policy.  The result can be
+    matched by the predicates below without further string matching.
+
+    Return:     A list of the symbols with names matching the criteria.
+    """
+    search = criteria.search
+    return [s for s in symbols if search(str(s))]
+
+
+def value_predicate(getter, symbols):
+    """
+    Predicate matching if the value is one of the symbols, by comparing
+    the policy values of the symbols rather than their names.
+    """
+    values = frozenset(s._value for s in symbols)
+    return min(1.0, member_selectivity * len(values)), lambda obj: getter(obj)._value in values
+
+
+def values_predicate(getter, symbols):
+    """
+    Predicate matching if any symbol of the value (a collection of symbols)
+    is one of the symbols, by comparing the policy values of the symbols.
+    """
+    values = frozenset(s._value for s in symbols)
+    return min(1.0, member_selectivity * len(values)), \
+        lambda obj: not values.isdisjoint(m._value for m in getter(obj))
+
+
+def type_set_predicate(getter, types):
+    """
+    Predicate matching if the value (a type or attribute) expands to any
+    of the types, by comparing TypeSets.
+    """
+    members = type_set_union(types)
+    return indirect_selectivity, lambda obj: not getter(obj).type_set().isdisjoint(members)
+
+
+def range_predicate(getter, criteria, subset, overlap, superset, proper):
+    """Predicate of match_range()."""
+    return range_selectivity, \
+        lambda obj: match_range(getter(obj), criteria, subset, overlap, superset, proper)
+
+
+def level_predicate(getter, criteria, dom, domby, incomp):
+    """Predicate of match_level()."""
+    return range_selectivity, \
+        lambda obj: match_level(getter(obj), criteria, dom, domby, incomp)
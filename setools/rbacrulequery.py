@@ -18,12 +18,13 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from . import mixins, query
+from .query import guard_predicate, indirect_predicate, member_predicate
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .policyrep import RBACRuletype
 from .policyrep.exception import InvalidType, RuleUseError
-from .util import match_indirect_regex
 
 
 class RBACRuleQuery(mixins.MatchObjClass, query.PolicyQuery):
@@ -99,59 +100,34 @@ class RBACRuleQuery(mixins.MatchObjClass, query.PolicyQuery):
         self._match_object_class_debug(self.log)
         self.log.debug("Default: {0.default!r}, regex: {0.default_regex}".format(self))
 
-        for rule in self.policy.rbacrules():
-            #
-            # Matching on rule type
-            #
-            if self.ruletype:
-                if rule.ruletype not in self.ruletype:
-                    continue
-
-            #
-            # Matching on source role
-            #
-            if self.source and not match_indirect_regex(
-                    rule.source,
-                    self.source,
-                    self.source_indirect,
-                    self.source_regex):
-                continue
-
-            #
-            # Matching on target type (role_transition)/role(allow)
-            #
-            if self.target and not match_indirect_regex(
-                    rule.target,
-                    self.target,
-                    self.target_indirect,
-                    self.target_regex):
-                continue
-
-            #
-            # Matching on object class
-            #
-            try:
-                if not self._match_object_class(rule):
-                    continue
-            except RuleUseError:
-                continue
-
-            #
-            # Matching on default role
-            #
-            if self.default:
-                try:
-                    # because default role is always a single
-                    # role, hard-code indirect to True
-                    # so the criteria can be an attribute
-                    if not match_indirect_regex(
-                            rule.default,
-                            self.default,
-                            True,
-                            self.default_regex):
-                        continue
-                except RuleUseError:
-                    continue
-
-            # if we get here, we have matched all available criteria
-            yield rule
+        yield from self.plan().results()
+
+    def _candidates(self):
+        return self.policy.rbacrules()
+
+    def _predicates(self):
+        # role allow rules do not have an object class or default role
+        predicates = [guard_predicate(p, RuleUseError)
+                      for p in self._match_object_class_predicates()]
+
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
+
+        if self.source:
+            predicates.append(indirect_predicate(attrgetter("source"), self.source,
+                                                 self.source_indirect, self.source_regex))
+
+        if self.target:
+            predicates.append(indirect_predicate(attrgetter("target"), self.target,
+                                                 self.target_indirect, self.target_regex))
+
+        if self.default:
+            # because default role is always a single
+            # role, hard-code indirect to True
+            # so the criteria can be an attribute
+            predicates.append(guard_predicate(
+                indirect_predicate(attrgetter("default"), self.default, True,
+                                   self.default_regex),
+                RuleUseError))
+
+        return predicates
@@ -20,8 +20,7 @@ import logging
 
 from .descriptors import CriteriaDescriptor
 from .mixins import MatchAlias, MatchName
-from .query import PolicyQuery
-from .util import match_level
+from .query import PolicyQuery, itself, level_predicate
 
 
 class SensitivityQuery(MatchAlias, MatchName, PolicyQuery):
@@ -61,19 +60,17 @@ class SensitivityQuery(MatchAlias, MatchName, PolicyQuery):
         self._match_alias_debug(self.log)
         self.log.debug("Sens: {0.sens!r}, dom: {0.sens_dom}, domby: {0.sens_domby}".format(self))
 
-        for s in self.policy.sensitivities():
-            if not self._match_name(s):
-                continue
+        yield from self.plan().results()
 
-            if not self._match_alias(s):
-                continue
+    def _candidates(self):
+        return self.policy.sensitivities()
 
-            if self.sens and not match_level(
-                    s,
-                    self.sens,
-                    self.sens_dom,
-                    self.sens_domby,
-                    False):
-                continue
+    def _predicates(self):
+        predicates = self._match_name_predicates() + self._match_alias_predicates()
 
-            yield s
+        sens = self.sens
+        if sens:
+            predicates.append(level_predicate(itself, sens, self.sens_dom, self.sens_domby,
+                                              False))
+
+        return predicates
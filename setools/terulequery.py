@@ -18,12 +18,16 @@
 #
 import logging
 import re
+from itertools import chain
+from operator import attrgetter
 
 from . import mixins, query
+from .query import guard_predicate, indirect_predicate, member_predicate, resolve_regex, \
+    set_predicate, type_set_predicate, value_predicate, values_predicate
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .policyrep import IoctlSet, TERuletype
 from .policyrep.exception import RuleUseError, RuleNotConditional
-from .util import match_regex, match_indirect_regex, match_regex_or_set
+from .util import class_perm_bits
 
 
 class TERuleQuery(mixins.MatchObjClass, mixins.MatchPermission, query.PolicyQuery):
@@ -116,7 +120,7 @@ class TERuleQuery(mixins.MatchObjClass, mixins.MatchPermission, query.PolicyQuer
                 if high < low:
                     high, low = low, high
 
-                pending_xperms.update(i for i in range(low, high+1))
+                pending_xperms.add_range(low, high)
 
             self._xperms = pending_xperms
         else:
@@ -141,102 +145,203 @@ class TERuleQuery(mixins.MatchObjClass, mixins.MatchPermission, query.PolicyQuer
         self.log.debug("Boolean: {0.boolean!r}, eq: {0.boolean_equal}, "
                        "regex: {0.boolean_regex}".format(self))
 
-        for rule in self.policy.terules():
-            #
-            # Matching on rule type
-            #
-            if self.ruletype:
-                if rule.ruletype not in self.ruletype:
-                    continue
-
-            #
-            # Matching on source type
-            #
-            if self.source and not match_indirect_regex(
-                    rule.source,
-                    self.source,
-                    self.source_indirect,
-                    self.source_regex):
-                continue
+        yield from self.plan().results()
 
-            #
-            # Matching on target type
-            #
-            if self.target and not match_indirect_regex(
-                    rule.target,
-                    self.target,
-                    self.target_indirect,
-                    self.target_regex):
-                continue
+    def _candidates(self):
+        """
+        Return the rules which can match the rule type, source, target,
+        object class, and permission criteria, using the policy's TE rule
+        index.  Regular expression criteria are resolved against the
+        policy's symbols, and are also narrowed by the index.
 
-            #
-            # Matching on object class
-            #
-            if not self._match_object_class(rule):
-                continue
+        If there are Boolean criteria, only the rules of the conditionals
+        which match the criteria are candidates, and these are matched
+        against the other index criteria directly.
+        """
+        if self.boolean:
+            return query.QueryPlan(self._conditional_rules(), self._index_predicates()).results()
 
-            #
-            # Matching on permission set
-            #
-            try:
-                if self.perms and rule.extended:
-                    if self.perms_equal and len(self.perms) > 1:
-                        # if criteria is more than one standard permission,
-                        # extended perm rules can never match if the
-                        # permission set equality option is on.
-                        continue
-
-                    if rule.xperm_type not in self.perms:
-                        continue
-                elif not self._match_perms(rule):
-                    continue
-            except RuleUseError:
-                continue
+        sources = self._index_types(self.source, self.source_indirect, self.source_regex)
+        targets = self._index_types(self.target, self.target_indirect, self.target_regex)
+        tclasses = self._index_classes()
+        ruletypes = self.ruletype or None
+
+        if self.perms and not self.perms_regex:
+            # rules can only match if their object class has any of
+            # the permissions.  This includes extended permission
+            # rules, since the extended permission type is a permission.
+            perms = frozenset(self.perms)
+            tclasses = [c for c in (self.policy.classes() if tclasses is None else tclasses)
+                        if not perms.isdisjoint(class_perm_bits(c))]
+
+        if ruletypes is None and sources is None and targets is None and tclasses is None:
+            return self.policy.terules()
+
+        return self.policy.terule_index().lookup(ruletypes=ruletypes,
+                                                 sources=sources,
+                                                 targets=targets,
+                                                 tclasses=tclasses)
+
+    def _predicates(self):
+        #
+        # The candidates of _candidates() exactly match the rule
+        # type, source, target, object class, and Boolean criteria.
+        #
+        predicates = []
+
+        if self.perms:
+            predicates.append(guard_predicate(self._perms_predicate(), RuleUseError))
+
+        if self.xperms:
+            predicates.append(guard_predicate(
+                set_predicate(attrgetter("perms"), self.xperms, self.xperms_equal, False),
+                RuleUseError))
+
+        if self.default:
+            # because default type is always a single
+            # type, hard-code indirect to True
+            # so the criteria can be an attribute
+            predicates.append(guard_predicate(
+                self._type_predicate(attrgetter("default"), self.default, True,
+                                     self.default_regex),
+                RuleUseError))
+
+        return predicates
+
+    def _scan_predicates(self):
+        predicates = self._predicates()
+        predicates.extend(self._index_predicates())
+
+        if self.boolean:
+            if self.boolean_regex:
+                predicate = values_predicate(attrgetter("conditional.booleans"),
+                                             resolve_regex(self.boolean, self.policy.bools()))
+            else:
+                predicate = set_predicate(attrgetter("conditional.booleans"), self.boolean,
+                                          self.boolean_equal, False)
+
+            predicates.append(guard_predicate(predicate, RuleNotConditional))
+
+        return predicates
+
+    def _index_predicates(self):
+        """
+        Get the query plan predicates for the rule type, source, target,
+        and object class criteria, which are otherwise matched by the
+        policy's TE rule index.
+        """
+        predicates = []
+
+        if self.ruletype:
+            predicates.append(member_predicate(attrgetter("ruletype"), self.ruletype))
+
+        if self.source:
+            predicates.append(self._type_predicate(attrgetter("source"), self.source,
+                                                   self.source_indirect, self.source_regex))
 
-            #
-            # Matching on extended permissions
-            #
-            try:
-                if self.xperms and not match_regex_or_set(
-                        rule.perms,
-                        self.xperms,
-                        self.xperms_equal,
-                        False):
-                    continue
-
-            except RuleUseError:
+        if self.target:
+            predicates.append(self._type_predicate(attrgetter("target"), self.target,
+                                                   self.target_indirect, self.target_regex))
+
+        predicates.extend(self._match_object_class_predicates())
+
+        return predicates
+
+    def _conditional_rules(self):
+        """
+        Generator which yields the rules of the conditionals matching
+        the Boolean criteria, using the policy's Boolean-to-conditional
+        index.  Only the blocks of these conditionals are walked.
+        """
+        if self.boolean_regex:
+            booleans = resolve_regex(self.boolean, self.policy.bools())
+        else:
+            booleans = self.boolean
+
+        for cond in self.policy.boolean_conditionals(booleans):
+            if self.boolean_equal and not self.boolean_regex and cond.booleans != booleans:
                 continue
 
-            #
-            # Matching on default type
-            #
-            if self.default:
-                try:
-                    # because default type is always a single
-                    # type, hard-code indirect to True
-                    # so the criteria can be an attribute
-                    if not match_indirect_regex(
-                            rule.default,
-                            self.default,
-                            True,
-                            self.default_regex):
-                        continue
-                except RuleUseError:
-                    continue
-
-            #
-            # Match on Boolean in conditional expression
-            #
-            if self.boolean:
-                try:
-                    if not match_regex_or_set(
-                            rule.conditional.booleans,
-                            self.boolean,
-                            self.boolean_equal,
-                            self.boolean_regex):
-                        continue
-                except RuleNotConditional:
-                    continue
-
-            # if we get here, we have matched all available criteria
-            yield rule
+            yield from cond.true_rules()
+            yield from cond.false_rules()
+
+    def _type_predicate(self, getter, criteria, indirect, regex):
+        """
+        Get the query plan predicate for matching a type or attribute.
+        Regular expressions are resolved against the policy's types
+        and attributes, so rules are not matched by name.
+        """
+        if not regex:
+            return indirect_predicate(getter, criteria, indirect, False)
+        elif indirect:
+            return type_set_predicate(getter, resolve_regex(criteria, self.policy.types()))
+        else:
+            return value_predicate(getter, resolve_regex(
+                criteria, chain(self.policy.types(), self.policy.typeattributes())))
+
+    def _perms_predicate(self):
+        """
+        Get the query plan predicate for permission matching.  Extended
+        permission rules match the criteria on their extended permission type.
+        """
+        selectivity, match_perms = self._match_perms_predicates(by_class=True, vector=True)[0]
+        perms = self.perms
+        regex = self.perms_regex
+
+        # if criteria is more than one standard permission,
+        # extended perm rules can never match if the
+        # permission set equality option is on.
+        xperm_types = frozenset() if regex or (self.perms_equal and len(perms) > 1) \
+            else frozenset(perms)
+
+        def match(rule):
+            if not rule.extended:
+                return match_perms(rule)
+            elif regex:
+                return bool(perms.search(rule.xperm_type))
+            else:
+                return rule.xperm_type in xperm_types
+
+        return selectivity, match
+
+    def _index_classes(self):
+        """
+        Determine the object classes which a rule must have for the rule
+        to match the object class criteria.  Returns None if there are
+        no object class criteria.
+        """
+        if not self.tclass:
+            return None
+
+        if self.tclass_regex:
+            return resolve_regex(self.tclass, self.policy.classes())
+
+        return self.tclass
+
+    def _index_types(self, criteria, indirect, regex):
+        """
+        Determine the types and attributes which a rule's source or target
+        must be for the rule to match the criteria.  Regular expressions
+        are resolved against the policy's types and attributes.  Returns
+        None if there are no criteria.
+        """
+        if not criteria:
+            return None
+
+        if not indirect:
+            if regex:
+                return resolve_regex(criteria, chain(self.policy.types(),
+                                                     self.policy.typeattributes()))
+
+            return [criteria]
+
+        # a rule matches if its type/attribute expands to
+        # any of the types in the criteria's expansion, or for
+        # regular expressions, any of the types matching it.
+        types = set(resolve_regex(criteria, self.policy.types()) if regex
+                    else criteria.expand())
+        keys = set(types)
+        for t in types:
+            keys.update(t.attributes())
+
+        return keys
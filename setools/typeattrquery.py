@@ -18,11 +18,12 @@
 #
 import logging
 import re
+from operator import methodcaller
 
 from .descriptors import CriteriaSetDescriptor
 from .mixins import MatchName
-from .query import PolicyQuery
-from .util import match_regex_or_set
+from .query import PolicyQuery, set_predicate
+from .util import type_set_union
 
 
 class TypeAttributeQuery(MatchName, PolicyQuery):
@@ -62,15 +63,20 @@ class TypeAttributeQuery(MatchName, PolicyQuery):
         self.log.debug("Types: {0.types!r}, regex: {0.types_regex}, "
                        "eq: {0.types_equal}".format(self))
 
-        for attr in self.policy.typeattributes():
-            if not self._match_name(attr):
-                continue
+        yield from self.plan().results()
 
-            if self.types and not match_regex_or_set(
-                    set(attr.expand()),
-                    self.types,
-                    self.types_equal,
-                    self.types_regex):
-                continue
+    def _candidates(self):
+        return self.policy.typeattributes()
 
-            yield attr
+    def _predicates(self):
+        predicates = self._match_name_predicates()
+
+        if self.types:
+            # match on the member type bitsets, unless using regexes
+            predicates.append(set_predicate(
+                methodcaller("type_set"),
+                self.types if self.types_regex else type_set_union(self.types),
+                self.types_equal,
+                self.types_regex))
+
+        return predicates
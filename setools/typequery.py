@@ -18,11 +18,11 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from .descriptors import CriteriaSetDescriptor
 from .mixins import MatchAlias, MatchName
-from .query import PolicyQuery
-from .util import match_regex_or_set
+from .query import PolicyQuery, equal_predicate, set_predicate
 
 
 class TypeQuery(MatchAlias, MatchName, PolicyQuery):
@@ -81,21 +81,23 @@ class TypeQuery(MatchAlias, MatchName, PolicyQuery):
                        "eq: {0.attrs_equal}".format(self))
         self.log.debug("Permissive: {0.permissive}".format(self))
 
-        for t in self.policy.types():
-            if not self._match_name(t):
-                continue
+        yield from self.plan().results()
 
-            if not self._match_alias(t):
-                continue
+    def _candidates(self):
+        return self.policy.types()
 
-            if self.attrs and not match_regex_or_set(
-                    set(t.attributes()),
-                    self.attrs,
-                    self.attrs_equal,
-                    self.attrs_regex):
-                continue
+    def _predicates(self):
+        predicates = self._match_name_predicates() + self._match_alias_predicates()
 
-            if self.permissive is not None and t.ispermissive != self.permissive:
-                continue
+        if self.attrs:
+            predicates.append(set_predicate(
+                lambda t: set(t.attributes()),
+                self.attrs,
+                self.attrs_equal,
+                self.attrs_regex))
 
-            yield t
+        permissive = self.permissive
+        if permissive is not None:
+            predicates.append(equal_predicate(attrgetter("ispermissive"), permissive))
+
+        return predicates
@@ -18,11 +18,11 @@
 #
 import logging
 import re
+from operator import attrgetter
 
 from .descriptors import CriteriaDescriptor, CriteriaSetDescriptor
 from .mixins import MatchName
-from .query import PolicyQuery
-from .util import match_regex_or_set, match_level, match_range
+from .query import PolicyQuery, level_predicate, range_predicate, set_predicate
 
 
 class UserQuery(MatchName, PolicyQuery):
@@ -91,32 +91,26 @@ class UserQuery(MatchName, PolicyQuery):
         self.log.debug("Range: {0.range_!r}, subset: {0.range_subset}, overlap: {0.range_overlap}, "
                        "superset: {0.range_superset}, proper: {0.range_proper}".format(self))
 
-        for user in self.policy.users():
-            if not self._match_name(user):
-                continue
-
-            if self.roles and not match_regex_or_set(
-                    user.roles,
-                    self.roles,
-                    self.roles_equal,
-                    self.roles_regex):
-                continue
-
-            if self.level and not match_level(
-                    user.mls_level,
-                    self.level,
-                    self.level_dom,
-                    self.level_domby,
-                    self.level_incomp):
-                continue
-
-            if self.range_ and not match_range(
-                    user.mls_range,
-                    self.range_,
-                    self.range_subset,
-                    self.range_overlap,
-                    self.range_superset,
-                    self.range_proper):
-                continue
-
-            yield user
+        yield from self.plan().results()
+
+    def _candidates(self):
+        return self.policy.users()
+
+    def _predicates(self):
+        predicates = self._match_name_predicates()
+
+        if self.roles:
+            predicates.append(set_predicate(attrgetter("roles"), self.roles, self.roles_equal,
+                                            self.roles_regex))
+
+        if self.level:
+            predicates.append(level_predicate(attrgetter("mls_level"), self.level,
+                                              self.level_dom, self.level_domby,
+                                              self.level_incomp))
+
+        if self.range_:
+            predicates.append(range_predicate(attrgetter("mls_range"), self.range_,
+                                              self.range_subset, self.range_overlap,
+                                              self.range_superset, self.range_proper))
+
+        return predicates
@@ -16,6 +16,44 @@
 # License along with SETools.  If not, see
 # <http://www.gnu.org/licenses/>.
 #
+import operator
+from contextlib import suppress
+from functools import reduce
+
+from .policyrep import TypeSet
+from .policyrep.exception import NoCommon
+from .policyrep.libpolicyrep import BaseType
+
+
+def type_set_union(symbols):
+    """
+    Get the member types of types and attributes as one TypeSet.
+
+    Parameter:
+    symbols     An iterable of types and attributes.
+    """
+    return reduce(operator.or_, (s.type_set() for s in symbols), TypeSet())
+
+
+def class_perm_bits(tclass):
+    """
+    Get the permissions of an object class, including those inherited
+    from its common, as a dictionary of permission name to the
+    permission's bit in an access vector.
+
+    Parameter:
+    tclass      The object class.
+    """
+    bits = {}
+
+    with suppress(NoCommon):
+        for value, name in tclass.common._perm_table.items():
+            bits[name] = 1 << (value - 1)
+
+    for value, name in tclass._perm_table.items():
+        bits[name] = 1 << (value - 1)
+
+    return bits
 
 
 def match_regex(obj, criteria, regex):
@@ -83,6 +121,9 @@ def match_indirect_regex(obj, criteria, indirect, regex):
     if indirect:
         if regex:
             return [o for o in obj.expand() if criteria.search(str(o))]
+        elif isinstance(obj, BaseType) and isinstance(criteria, BaseType):
+            # compare the precomputed member type bitsets
+            return not obj.type_set().isdisjoint(criteria.type_set())
         else:
             return set(criteria.expand()).intersection(obj.expand())
     else:
@@ -28,6 +28,7 @@ from . import genfsconquery
 from . import infoflow
 from . import initsidquery
 from . import mlsrulequery
+from . import multiquery
 from . import netifconquery
 from . import nodeconquery
 from . import objclassquery
@@ -85,6 +85,31 @@ class ConstraintQueryTest(unittest.TestCase):
         constraint = sorted(c.tclass for c in q.results())
         self.assertListEqual(["test21c"], constraint)
 
+    def test_022_perms_scan(self):
+        """Constraint query permission matching on access vectors matches the permission names."""
+        for criteria in (dict(perms=["test20ap", "test20bp"]),
+                         dict(perms=["test21ap", "test21bp"], perms_equal=True),
+                         dict(perms=["test21ap", "test21bp"], perms_subset=True)):
+
+            q = ConstraintQuery(self.p, **criteria)
+            perms = set(criteria["perms"])
+            expected = []
+            for c in self.p.constraints():
+                if not c.ruletype.name.endswith("constrain"):
+                    continue
+
+                if criteria.get("perms_equal"):
+                    match = c.perms == perms
+                elif criteria.get("perms_subset"):
+                    match = c.perms >= perms
+                else:
+                    match = not c.perms.isdisjoint(perms)
+
+                if match:
+                    expected.append(c)
+
+            self.assertListEqual(expected, list(q.results()), criteria)
+
     def test_030_role_match_single(self):
         """Constraint query with role match."""
         q = ConstraintQuery(self.p, role="test30r")
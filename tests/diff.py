@@ -1834,6 +1834,32 @@ class PolicyDifferenceTest(ValidateRule, unittest.TestCase):
         self.assertSetEqual(set([0x0005]), matched_perms)
 
 
+class PolicyDifferenceStreamTest(PolicyDifferenceTest):
+
+    """Policy difference tests, diffing access vector rules with a tiny memory budget."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p_left = compile_policy("tests/diff_left.conf")
+        cls.p_right = compile_policy("tests/diff_right.conf")
+        cls.diff = PolicyDifference(cls.p_left, cls.p_right)
+
+        # one source type per partition
+        cls.diff.terule_memory_budget = 1
+
+
+class PolicyDifferenceParallelTest(PolicyDifferenceTest):
+
+    """Policy difference tests, computing the differences in worker processes."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p_left = compile_policy("tests/diff_left.conf")
+        cls.p_right = compile_policy("tests/diff_right.conf")
+        cls.diff = PolicyDifference(cls.p_left, cls.p_right)
+        cls.diff.run_all(workers=2)
+
+
 class PolicyDifferenceRmIsidTest(unittest.TestCase):
 
     """
@@ -16,6 +16,8 @@
 # along with SETools.  If not, see <http://www.gnu.org/licenses/>.
 #
 import os
+import shutil
+import tempfile
 import unittest
 
 from setools import DomainTransitionAnalysis
@@ -497,6 +499,24 @@ class DomainTransitionAnalysisTest(mixins.ValidateRule, unittest.TestCase):
                                  (trans2, trans3),
                                  (trans3, trans5)]), edges)
 
+    def test_204_exclude_entrypoint_graph_unchanged(self):
+        """DTA: exclude entrypoint does not change the full graph"""
+        self.a.reverse = False
+        self.a.exclude = ["trans3_exec1"]
+        self.a._build_subgraph()
+
+        trans2 = self.p.lookup_type("trans2")
+        trans3 = self.p.lookup_type("trans3")
+        trans3_exec1 = self.p.lookup_type("trans3_exec1")
+        trans3_exec2 = self.p.lookup_type("trans3_exec2")
+
+        k = sorted(self.a.G.edges[trans2, trans3]["entrypoint"].keys())
+        self.assertEqual([trans3_exec1, trans3_exec2], k)
+
+        steps = list(self.a.transitions("trans2"))
+        self.assertEqual(1, len(steps))
+        self.assertEqual([trans3_exec2], [e.name for e in steps[0].entrypoints])
+
     def test_300_all_paths(self):
         """DTA: all paths output"""
         self.a.reverse = False
@@ -977,3 +997,45 @@ class DomainTransitionAnalysisTest(mixins.ValidateRule, unittest.TestCase):
         self.a.exclude = ["trans3"]
         paths = list(self.a.transitions("trans5"))
         self.assertEqual(0, len(paths))
+
+
+class DomainTransitionAnalysisCSRTest(DomainTransitionAnalysisTest):
+
+    """Run the domain transition analysis tests on the CSR graph backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = compile_policy("tests/dta.conf")
+        cls.a = DomainTransitionAnalysis(cls.p, backend="csr")
+        cls.a._build_graph()
+
+    def test_990_invalid_backend(self):
+        """DTA: invalid graph backend."""
+        with self.assertRaises(ValueError):
+            DomainTransitionAnalysis(self.p, backend="invalid")
+
+
+class DomainTransitionAnalysisCSRCacheTest(DomainTransitionAnalysisTest):
+
+    """Run the domain transition analysis tests on a graph loaded from the graph cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = compile_policy("tests/dta.conf")
+        cls.cache_dir = tempfile.mkdtemp()
+
+        # build and save the graph, then load it in a new analysis
+        DomainTransitionAnalysis(cls.p, backend="csr", cache_dir=cls.cache_dir)._build_graph()
+        cls.a = DomainTransitionAnalysis(cls.p, backend="csr", cache_dir=cls.cache_dir)
+        cls.a._build_graph()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.p.path)
+        shutil.rmtree(cls.cache_dir)
+
+    def test_990_cache_file(self):
+        """DTA: graph cache file created."""
+        files = os.listdir(self.cache_dir)
+        self.assertEqual(1, len(files))
+        self.assertTrue(files[0].startswith("dta-"))
@@ -16,6 +16,8 @@
 # along with SETools.  If not, see <http://www.gnu.org/licenses/>.
 #
 import os
+import shutil
+import tempfile
 import unittest
 
 from setools import InfoFlowAnalysis
@@ -484,3 +486,53 @@ class InfoFlowAnalysisTest(mixins.ValidateRule, unittest.TestCase):
         self.a.min_weight = 1
         paths = list(self.a.infoflows("disconnected1"))
         self.assertEqual(0, len(paths))
+
+
+class InfoFlowAnalysisCSRTest(InfoFlowAnalysisTest):
+
+    """Run the information flow analysis tests on the CSR graph backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = compile_policy("tests/infoflow.conf")
+        cls.m = PermissionMap("tests/perm_map")
+        cls.a = InfoFlowAnalysis(cls.p, cls.m, backend="csr")
+
+    def test_990_invalid_backend(self):
+        """Information flow analysis: invalid graph backend."""
+        with self.assertRaises(ValueError):
+            InfoFlowAnalysis(self.p, self.m, backend="invalid")
+
+
+class InfoFlowAnalysisCSRCacheTest(InfoFlowAnalysisTest):
+
+    """Run the information flow analysis tests on a graph loaded from the graph cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = compile_policy("tests/infoflow.conf")
+        cls.m = PermissionMap("tests/perm_map")
+        cls.cache_dir = tempfile.mkdtemp()
+
+        # build and save the graph, then load it in a new analysis
+        InfoFlowAnalysis(cls.p, cls.m, backend="csr", cache_dir=cls.cache_dir)._build_graph()
+        cls.a = InfoFlowAnalysis(cls.p, cls.m, backend="csr", cache_dir=cls.cache_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.p.path)
+        shutil.rmtree(cls.cache_dir)
+
+    def test_990_cache_file(self):
+        """Information flow analysis: graph cache file created."""
+        files = os.listdir(self.cache_dir)
+        self.assertEqual(1, len(files))
+        self.assertTrue(files[0].startswith("infoflow-"))
+
+    def test_991_cache_map_change(self):
+        """Information flow analysis: permission map change does not use the cached graph."""
+        m = PermissionMap("tests/perm_map")
+        m.set_weight("infoflow", "low_w", 10)
+        a = InfoFlowAnalysis(self.p, m, backend="csr", cache_dir=self.cache_dir)
+        a._build_graph()
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
@@ -0,0 +1,74 @@
+"""Multiple query unit tests."""
+# Copyright 2018, Chris PeBenito <pebenito@ieee.org>
+#
+# This file is part of SETools.
+#
+# SETools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# SETools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with SETools.  If not, see <http://www.gnu.org/licenses/>.
+#
+import os
+import unittest
+
+from setools import RBACRuleQuery, RoleQuery, TERuleQuery, run_queries
+
+from .policyrep.util import compile_policy
+
+
+class RunQueriesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = compile_policy("tests/terulequery.conf")
+        cls.p2 = compile_policy("tests/rbacrulequery.conf")
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.p.path)
+        os.unlink(cls.p2.path)
+
+    def assertSameResults(self, policy, queries):
+        results = run_queries(policy, queries)
+        self.assertEqual(len(queries), len(results))
+        for q, r in zip(queries, results):
+            self.assertListEqual(sorted(q.results()), sorted(r))
+
+    def test_001_terules(self):
+        """Run queries: TE rule queries."""
+        self.assertSameResults(self.p, [
+            TERuleQuery(self.p),
+            TERuleQuery(self.p, ruletype=["allow"], source="test1a", source_indirect=False),
+            TERuleQuery(self.p, ruletype=["allow"], source="test2a", source_indirect=True),
+            TERuleQuery(self.p, target="test5(s|t)", target_regex=True),
+            TERuleQuery(self.p, tclass=["infoflow3", "infoflow4"]),
+            TERuleQuery(self.p, perms=["super_r"], perms_equal=False),
+            TERuleQuery(self.p, ruletype=["auditallow", "dontaudit"]),
+            TERuleQuery(self.p, default="test100d"),
+            TERuleQuery(self.p, boolean=["test200"])])
+
+    def test_002_mixed(self):
+        """Run queries: RBAC rule, TE rule, and role queries."""
+        self.assertSameResults(self.p2, [
+            RBACRuleQuery(self.p2, ruletype=["allow"]),
+            TERuleQuery(self.p2, ruletype=["allow"]),
+            RoleQuery(self.p2, name="test1s"),
+            RBACRuleQuery(self.p2, ruletype=["role_transition"], source="test1s"),
+            RBACRuleQuery(self.p2, tclass=["infoflow2"])])
+
+    def test_003_empty(self):
+        """Run queries: no queries."""
+        self.assertListEqual([], run_queries(self.p, []))
+
+    def test_004_wrong_policy(self):
+        """Run queries: query of a different policy."""
+        with self.assertRaises(ValueError):
+            run_queries(self.p, [TERuleQuery(self.p2)])
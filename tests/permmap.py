@@ -393,6 +393,15 @@ class PermissionMapTest(unittest.TestCase):
         self.assertEqual(r, 0)
         self.assertEqual(w, 0)
 
+    def test_149_weight_table(self):
+        """PermMap get weight table of a class."""
+        bits = {"low_r": 0x1, "hi_w": 0x2, "med_r": 0x4}
+
+        permmap = PermissionMap("tests/perm_map")
+        permmap.exclude_permission("infoflow", "med_r")
+        table = permmap.weight_table("infoflow", bits)
+        self.assertEqual(sorted(table), [(0x1, 1, 0), (0x2, 0, 10)])
+
     def test_150_map_policy(self):
         """PermMap create mappings for classes/perms in a policy."""
         permmap = PermissionMap("tests/perm_map")
@@ -17,12 +17,16 @@
 #
 
 import copy
+import itertools
 import os
 import sys
 import unittest
 
-from setools import SELinuxPolicy, HandleUnknown
-from setools.policyrep.exception import InvalidPolicy
+from setools import SELinuxPolicy, HandleUnknown, TERuletype, load_policies
+from setools.policyrep.exception import InvalidPolicy, InvalidBoolean, InvalidCategory, \
+    InvalidClass, InvalidRole, InvalidSensitivity, InvalidType, InvalidUser, LowLevelPolicyError, \
+    RuleNotConditional, RuleUseError, TERuleNoFilename
+from setools.util import class_perm_bits
 
 from .util import compile_policy
 
@@ -54,6 +58,42 @@ class SELinuxPolicyTest(unittest.TestCase):
         self.assertIs(self.p.policy, p.policy)
         self.assertIs(self.p.filename, p.filename)
 
+    def test_004_from_bytes(self):
+        """SELinuxPolicy: load policy from bytes."""
+        with open(self.p.path, "rb") as fd:
+            data = fd.read()
+
+        p = SELinuxPolicy.from_bytes(data, "test-policy")
+        self.assertEqual("test-policy", p.path)
+        self.assertTrue(p.in_memory)
+        self.assertFalse(self.p.in_memory)
+        self.assertEqual(self.p.type_count, p.type_count)
+        self.assertEqual(sorted(str(r) for r in self.p.terules()),
+                         sorted(str(r) for r in p.terules()))
+
+    def test_005_from_buffer(self):
+        """SELinuxPolicy: load policy from a buffer."""
+        with open(self.p.path, "rb") as fd:
+            data = bytearray(fd.read())
+
+        p = SELinuxPolicy.from_buffer(memoryview(data))
+        self.assertEqual(self.p.allow_count, p.allow_count)
+        self.assertEqual(self.p.conditional_count, p.conditional_count)
+
+    def test_006_from_bytes_invalid(self):
+        """SELinuxPolicy: invalid policy bytes."""
+        self.assertRaises(InvalidPolicy, SELinuxPolicy.from_bytes, b"not a policy")
+
+    def test_007_load_policies(self):
+        """SELinuxPolicy: load policies concurrently."""
+        policies = load_policies([self.p.path] * 3, workers=3)
+        self.assertEqual(3, len(policies))
+        for p in policies:
+            self.assertEqual(self.p.path, p.path)
+            self.assertEqual(self.p.type_attribute_count, p.type_attribute_count)
+            self.assertEqual(self.p.permissives_count, p.permissives_count)
+            self.assertEqual(self.p.level_count, p.level_count)
+
     def test_010_handle_unknown(self):
         """SELinuxPolicy: handle unknown setting."""
         self.assertEqual(self.p.handle_unknown, HandleUnknown.reject)
@@ -224,6 +264,274 @@ class SELinuxPolicyTest(unittest.TestCase):
         """SELinuxPolicy: dontauditxperm rount"""
         self.assertEqual(self.p.dontauditxperm_count, 193)
 
+    def test_140_terule_counts_match_rules(self):
+        """SELinuxPolicy: TE rule counts match the rules iterator"""
+        counts = dict((rt, 0) for rt in TERuletype)
+        for rule in self.p.terules():
+            counts[rule.ruletype] += 1
+
+        for ruletype, count in counts.items():
+            self.assertEqual(count, getattr(self.p, "{0}_count".format(ruletype)))
+
+    def test_141_terule_index(self):
+        """SELinuxPolicy: TE rule index contains all rules"""
+        index = self.p.terule_index()
+        self.assertEqual(len(list(self.p.terules())), len(index))
+        self.assertEqual(list(self.p.terules()), list(index.lookup()))
+
+    def test_142_terule_index_lookup(self):
+        """SELinuxPolicy: TE rule index lookup"""
+        ruletypes = [TERuletype.allow, TERuletype.type_transition]
+        source = self.p.lookup_type_or_attr("type0")
+        tclasses = [self.p.lookup_class("infoflow")]
+        expected = [r for r in self.p.terules() if r.ruletype in ruletypes and
+                    r.source == source and r.tclass in tclasses]
+
+        self.assertEqual(expected, list(self.p.terule_index().lookup(ruletypes=ruletypes,
+                                                                     sources=[source],
+                                                                     tclasses=tclasses)))
+
+    def test_143_terule_array(self):
+        """SELinuxPolicy: TE rule array matches the rules iterator"""
+        rules, types, classes, conditionals, filenames = self.p.terule_array()
+        terules = list(self.p.terules())
+        self.assertEqual(len(terules), len(rules["ruletype"]))
+
+        for pos, rule in enumerate(terules):
+            self.assertEqual(rule.ruletype, rules["ruletype"][pos])
+            self.assertEqual(str(rule.source), types[rules["source"][pos]])
+            self.assertEqual(str(rule.target), types[rules["target"][pos]])
+            self.assertEqual(str(rule.tclass), classes[rules["tclass"][pos]])
+
+            try:
+                self.assertEqual(str(rule.conditional), conditionals[rules["cond"][pos]])
+                self.assertEqual(rule.conditional_block, bool(rules["block"][pos]))
+            except RuleNotConditional:
+                self.assertEqual(0, rules["cond"][pos])
+
+            try:
+                self.assertEqual(rule.filename, filenames[rules["filename"][pos]])
+            except (RuleUseError, TERuleNoFilename):
+                self.assertEqual(0, rules["filename"][pos])
+
+            if rule.ruletype in (TERuletype.type_transition, TERuletype.type_change,
+                                 TERuletype.type_member):
+                self.assertEqual(str(rule.default), types[rules["data"][pos]])
+            elif not rule.extended:
+                perms = self.p.terule_index().class_perms(rules["tclass"][pos])
+                self.assertEqual(rule.perms, set(p for p, bit in perms.items()
+                                                 if rules["data"][pos] & bit))
+                self.assertEqual(rule.perm_vector, rules["data"][pos])
+
+    def test_144_terule_cursor(self):
+        """SELinuxPolicy: TE rule cursor matches the rules iterator"""
+        cursor = self.p.terule_cursor()
+        terules = list(self.p.terules())
+        self.assertEqual(len(terules), len(cursor))
+
+        for _ in range(2):
+            cursor_rules = [(str(r), copy.deepcopy(r)) for r in cursor]
+            self.assertEqual([str(r) for r in terules], [s for s, _ in cursor_rules])
+            self.assertEqual(terules, [r for _, r in cursor_rules])
+            cursor.reset()
+
+    def test_145_terule_perm_vector(self):
+        """SELinuxPolicy: TE rule access vectors match the permission sets"""
+        for rule in self.p.terules():
+            if rule.ruletype not in (TERuletype.allow, TERuletype.auditallow,
+                                     TERuletype.dontaudit, TERuletype.neverallow):
+                continue
+
+            bits = class_perm_bits(rule.tclass)
+            self.assertEqual(rule.perms,
+                             set(name for name, bit in bits.items() if rule.perm_vector & bit))
+
+    def test_146_level_comparison(self):
+        """SELinuxPolicy: level comparisons match the category sets"""
+        levels = [self.p.lookup_level(name) for name in ("s0", "s0:c0", "s0:c1", "s0:c0.c1",
+                                                         "s1:c1", "s1:c0.c3", "s2:c0,c2,c4",
+                                                         "s4:c0.c5")]
+
+        # a level of the policy
+        levels.append(self.p.lookup_user("user0").mls_level)
+
+        for a, b in itertools.product(levels, repeat=2):
+            acats = set(a.categories())
+            bcats = set(b.categories())
+            dom = a.sensitivity >= b.sensitivity and acats >= bcats
+            domby = a.sensitivity <= b.sensitivity and acats <= bcats
+            equal = a.sensitivity == b.sensitivity and acats == bcats
+
+            self.assertEqual(equal, a == b)
+            self.assertEqual(dom, a >= b)
+            self.assertEqual(domby, a <= b)
+            self.assertEqual(dom and not equal, a > b)
+            self.assertEqual(domby and not equal, a < b)
+            self.assertEqual(not (dom or domby), a ^ b)
+
+    def test_147_aliases(self):
+        """SELinuxPolicy: aliases of types, categories, and sensitivities"""
+        aliases = {}
+        for symbols, lookup in ((self.p.types(), self.p.lookup_type),
+                                (self.p.categories(), self.p.lookup_category),
+                                (self.p.sensitivities(), self.p.lookup_sensitivity)):
+            for symbol in symbols:
+                names = sorted(symbol.aliases())
+                aliases[str(symbol)] = names
+
+                for alias in names:
+                    self.assertEqual(symbol, lookup(alias))
+
+        self.assertEqual(["type_alias0"], aliases["type0"])
+        self.assertEqual(["cat_alias1"], aliases["c1"])
+        self.assertEqual(["sens_alias2"], aliases["s2"])
+        self.assertEqual([], aliases["s3"])
+
+    def test_148_symbol_counts(self):
+        """SELinuxPolicy: cached symbol counts match the iterators"""
+        self.assertEqual(sum(1 for _ in self.p.types()), self.p.type_count)
+        self.assertEqual(sum(1 for _ in self.p.typeattributes()), self.p.type_attribute_count)
+        self.assertEqual(sum(1 for _ in self.p.bounds()), self.p.typebounds_count)
+        self.assertEqual(sum(1 for _ in self.p.conditionals()), self.p.conditional_count)
+        self.assertEqual(sum(len(list(t.aliases())) for t in self.p.types()),
+                         self.p.type_alias_count)
+
+        self.assertEqual(self.p.type_count, len(self.p.types()))
+        self.assertEqual(self.p.type_attribute_count, len(self.p.typeattributes()))
+        self.assertEqual(self.p.typebounds_count, len(self.p.bounds()))
+        self.assertEqual(self.p.conditional_count, len(self.p.conditionals()))
+
+    def test_149_boolean_conditionals(self):
+        """SELinuxPolicy: conditionals of Booleans match the conditional expressions"""
+        for b in self.p.bools():
+            expected = [c for c in self.p.conditionals() if b in c.booleans]
+            self.assertListEqual(expected, self.p.boolean_conditionals([b]), str(b))
+
+        bools = list(self.p.bools())[:3]
+        expected = [c for c in self.p.conditionals() if not c.booleans.isdisjoint(bools)]
+        self.assertListEqual(expected, self.p.boolean_conditionals(bools))
+        self.assertListEqual([], self.p.boolean_conditionals([]))
+
+    def test_150_conditional_canonical(self):
+        """SELinuxPolicy: conditional canonical forms match the expressions"""
+        operators = {"||": lambda a, b: a or b,
+                     "&&": lambda a, b: a and b,
+                     "^": lambda a, b: a != b,
+                     "==": lambda a, b: a == b,
+                     "!=": lambda a, b: a != b}
+
+        tables = {}
+        for cond in self.p.conditionals():
+            for row in cond.truth_table():
+                stack = []
+                for node in cond.expression():
+                    if str(node) in row.values:
+                        stack.append(row.values[str(node)])
+                    elif node.unary:
+                        stack.append(not stack.pop())
+                    else:
+                        stack.append(operators[str(node)](stack.pop(), stack.pop()))
+
+                self.assertEqual(stack[0], row.result, str(cond))
+                self.assertEqual(row.result, cond.evaluate(**row.values), str(cond))
+
+            table = (tuple(sorted(str(b) for b in cond.booleans)),
+                     tuple(row.result for row in cond.truth_table()))
+            self.assertEqual(table, tables.setdefault(cond.canonical, table), str(cond))
+
+        self.assertEqual(len(tables), len(set(tables.values())))
+
+    def _check_terule_keys(self, policy):
+        """Check that all TE rules of a policy are looked up by their keys."""
+        conditional_rules = 0
+        for rule in policy.terules():
+            found = policy.lookup_terule(policy.terule_key(rule))
+            self.assertEqual(rule, found, str(rule))
+
+            try:
+                conditional = rule.conditional
+            except RuleNotConditional:
+                self.assertRaises(RuleNotConditional, getattr, found, "conditional")
+            else:
+                self.assertEqual(conditional, found.conditional, str(rule))
+                self.assertEqual(rule.conditional_block, found.conditional_block, str(rule))
+                conditional_rules += 1
+
+        self.assertTrue(conditional_rules)
+
+    def test_151_terule_key(self):
+        """SELinuxPolicy: TE rules are looked up by their keys"""
+        self._check_terule_keys(self.p)
+
+        with self.assertRaises(LowLevelPolicyError):
+            self.p.lookup_terule((0, 0, 0, 0, 0, 0, None))
+
+    def test_152_terule_key_shared_booleans(self):
+        """SELinuxPolicy: TE rules of conditionals sharing Booleans are looked up by their keys"""
+        p = compile_policy("tests/terulequery.conf")
+        try:
+            self._check_terule_keys(p)
+
+            # test201a is used by two conditionals
+            conditionals = p.boolean_conditionals([p.lookup_boolean("test201a")])
+            self.assertEqual(2, len(conditionals))
+            for cond in conditionals:
+                for rule in itertools.chain(cond.true_rules(), cond.false_rules()):
+                    self.assertEqual(cond, p.lookup_terule(p.terule_key(rule)).conditional)
+        finally:
+            os.unlink(p.path)
+
+    def test_200_lookup_type(self):
+        """SELinuxPolicy: type lookup."""
+        self.assertEqual("type0", self.p.lookup_type("type0"))
+
+    def test_201_lookup_type_alias(self):
+        """SELinuxPolicy: type lookup by alias."""
+        self.assertEqual("type1", self.p.lookup_type("type_alias1"))
+
+    def test_202_lookup_type_attribute(self):
+        """SELinuxPolicy: type lookup of an attribute."""
+        self.assertRaises(InvalidType, self.p.lookup_type, "attr0")
+
+    def test_203_lookup_type_invalid(self):
+        """SELinuxPolicy: invalid type lookup."""
+        self.assertRaises(InvalidType, self.p.lookup_type, "type_does_not_exist")
+
+    def test_204_lookup_typeattr(self):
+        """SELinuxPolicy: type attribute lookup."""
+        self.assertEqual("attr0", self.p.lookup_typeattr("attr0"))
+        self.assertRaises(InvalidType, self.p.lookup_typeattr, "type0")
+
+    def test_205_lookup_type_or_attr(self):
+        """SELinuxPolicy: type or attribute lookup."""
+        self.assertEqual("type0", self.p.lookup_type_or_attr("type0"))
+        self.assertEqual("type2", self.p.lookup_type_or_attr("type_alias2"))
+        self.assertEqual("attr0", self.p.lookup_type_or_attr("attr0"))
+        self.assertRaises(InvalidType, self.p.lookup_type_or_attr, "type_does_not_exist")
+
+    def test_206_lookup_category(self):
+        """SELinuxPolicy: category lookup."""
+        self.assertEqual("c3", self.p.lookup_category("c3"))
+        self.assertEqual("c0", self.p.lookup_category("cat_alias0"))
+        self.assertRaises(InvalidCategory, self.p.lookup_category, "c1024")
+
+    def test_207_lookup_sensitivity(self):
+        """SELinuxPolicy: sensitivity lookup."""
+        self.assertEqual("s3", self.p.lookup_sensitivity("s3"))
+        self.assertEqual("s1", self.p.lookup_sensitivity("sens_alias1"))
+        self.assertRaises(InvalidSensitivity, self.p.lookup_sensitivity, "s99")
+
+    def test_208_lookup_other(self):
+        """SELinuxPolicy: Boolean, class, role, and user lookup."""
+        self.assertEqual("bool0", self.p.lookup_boolean("bool0"))
+        self.assertRaises(InvalidBoolean, self.p.lookup_boolean, "bool_does_not_exist")
+        self.assertEqual("infoflow", self.p.lookup_class("infoflow"))
+        self.assertRaises(InvalidClass, self.p.lookup_class, "class_does_not_exist")
+        self.assertEqual("role0", self.p.lookup_role("role0"))
+        self.assertRaises(InvalidRole, self.p.lookup_role, "role_does_not_exist")
+        self.assertEqual("user0", self.p.lookup_user("user0"))
+        self.assertRaises(InvalidUser, self.p.lookup_user, "user_does_not_exist")
+
 
 @unittest.skip("No longer necessary since source policy support was dropped.")
 class SELinuxPolicyLoadError(unittest.TestCase):
@@ -17,12 +17,16 @@
 #
 # Until this is fixed for cython:
 # pylint: disable=undefined-variable
+import os
 import unittest
 from unittest.mock import Mock, patch
 
 from setools import SELinuxPolicy
+from setools.policyrep import TypeSet
 from setools.policyrep.exception import InvalidType, SymbolUseError
 
+from .util import compile_policy
+
 
 @unittest.skip("Needs to be reworked for cython")
 class TypeTest(unittest.TestCase):
@@ -266,3 +270,62 @@ class TypeAttributeTest(unittest.TestCase):
         attr = self.mock_attr_factory("name70", types=['type31a', 'type31b', 'type31c'])
         self.assertIn("type31b", attr)
         self.assertNotIn("type30", attr)
+
+
+class TypeSetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = compile_policy("tests/policyrep/selinuxpolicy.conf")
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.p.path)
+
+    def test_001_attribute(self):
+        """TypeSet: attribute members"""
+        for attr in self.p.typeattributes():
+            types = set(attr.expand())
+            self.assertEqual(types, set(attr.type_set()))
+            self.assertEqual(len(types), len(attr.type_set()))
+            self.assertEqual(types, attr.type_set())
+            self.assertIs(attr.type_set(), attr.type_set())
+
+    def test_002_type(self):
+        """TypeSet: type"""
+        for type_ in self.p.types():
+            self.assertEqual([type_], list(type_.type_set()))
+            self.assertIn(type_, type_.type_set())
+
+    def test_003_role(self):
+        """TypeSet: role types"""
+        for role in self.p.roles():
+            self.assertEqual(set(role.types()), set(role.type_set()))
+
+    def test_004_operations(self):
+        """TypeSet: set operations match Python sets"""
+        attrs = list(self.p.typeattributes())[:20]
+        for a in attrs:
+            for b in attrs:
+                a_set, b_set = set(a.expand()), set(b.expand())
+                a_ts, b_ts = a.type_set(), b.type_set()
+                self.assertEqual(a_set & b_set, set(a_ts & b_ts))
+                self.assertEqual(a_set | b_set, set(a_ts | b_ts))
+                self.assertEqual(a_set - b_set, set(a_ts - b_ts))
+                self.assertEqual(a_set ^ b_set, set(a_ts ^ b_ts))
+                self.assertEqual(a_set.isdisjoint(b_set), a_ts.isdisjoint(b_ts))
+                self.assertEqual(a_set <= b_set, a_ts <= b_ts)
+                self.assertEqual(a_set < b_set, a_ts < b_ts)
+                self.assertEqual(a_set >= b_set, a_ts >= b_ts)
+                self.assertEqual(a_set == b_set, a_ts == b_ts)
+
+    def test_005_empty(self):
+        """TypeSet: empty set"""
+        empty = TypeSet()
+        self.assertFalse(empty)
+        self.assertEqual(0, len(empty))
+        self.assertEqual([], list(empty))
+
+        type_ = next(self.p.types())
+        self.assertEqual([type_], list(empty | type_.type_set()))
+        self.assertNotIn(type_, empty)
@@ -254,6 +254,17 @@ class TERuleQueryTest(mixins.ValidateRule, unittest.TestCase):
         self.validate_rule(r[1], TRT.allow, "test202t2", "test202t2", "infoflow7",
                            set(["super_unmapped"]), cond="test202b || test202c")
 
+    def test_203_boolean_multiple_conditionals(self):
+        """TE rule query with a Boolean used by several conditionals."""
+        q = TERuleQuery(self.p, boolean=["test201a"])
+
+        r = sorted(q.results())
+        self.assertEqual(len(r), 2)
+        self.validate_rule(r[0], TRT.allow, "test201t1", "test201t1", "infoflow7",
+                           set(["super_unmapped"]), cond="test201b && test201a")
+        self.validate_rule(r[1], TRT.allow, "test201t1", "test201t1", "infoflow7",
+                           set(["super_w"]), cond="test201a")
+
     def test_300_issue111(self):
         """TE rule query with attribute source criteria, indirect match."""
         # https://github.com/TresysTechnology/setools/issues/111
@@ -292,6 +303,64 @@ class TERuleQueryTest(mixins.ValidateRule, unittest.TestCase):
         self.validate_rule(r[1], TRT.type_transition, "test302source", "test302t2", "infoflow7",
                            "test302t2")
 
+    def test_400_plan(self):
+        """TE rule query plan is not affected by criteria changes."""
+        q = TERuleQuery(self.p, perms=["super_r"], perms_equal=False)
+        plan = q.plan()
+        q.perms = ["super_w"]
+
+        with self.assertRaises(AttributeError):
+            plan.predicates = ()
+
+        r = sorted(plan.results())
+        self.assertEqual(len(r), 2)
+        self.validate_rule(r[0], TRT.allow, "test12a", "test12a", "infoflow7", set(["super_r"]))
+        self.validate_rule(r[1], TRT.allow, "test12b", "test12b", "infoflow7",
+                           set(["super_r", "super_none"]))
+
+    def test_401_perms_no_class(self):
+        """TE rule query with permissions which are not in any class."""
+        q = TERuleQuery(self.p, perms=["super_r", "test401_unknown"], perms_equal=True)
+        self.assertEqual(0, len(list(q.results())))
+
+    def test_402_perms_dontaudit(self):
+        """TE rule query with permissions of a dontaudit rule."""
+        q = TERuleQuery(self.p, ruletype=["dontaudit"], perms=["super_unmapped"],
+                        perms_equal=True)
+
+        r = sorted(q.results())
+        self.assertEqual(len(r), 1)
+        self.validate_rule(r[0], TRT.dontaudit, "test14", "test14", "infoflow7",
+                           set(["super_unmapped"]))
+
+    def test_403_regex_scan(self):
+        """TE rule query with regex criteria matches the same rules with and without the index."""
+        for criteria in (dict(source="test4(s|t)", source_indirect=True, source_regex=True),
+                         dict(source="test3a.*", source_indirect=False, source_regex=True),
+                         dict(target="test8(s|t)", target_indirect=True, target_regex=True),
+                         dict(tclass="infoflow(5|6)", tclass_regex=True),
+                         dict(default="test101.", default_regex=True),
+                         dict(boolean="test202(a|b)", boolean_regex=True),
+                         dict(source="test_no_match.*", source_regex=True)):
+
+            q = TERuleQuery(self.p, **criteria)
+            scanned = q.plan(candidates=self.p.terules()).results()
+            self.assertListEqual(sorted(q.results()), sorted(scanned), criteria)
+
+    def test_404_boolean_scan(self):
+        """TE rule query with Boolean criteria matches the same rules with and without the index."""
+        for criteria in (dict(boolean=["test200"]),
+                         dict(boolean=["test200"], source="test200t2"),
+                         dict(boolean=["test200"], ruletype=["dontaudit"]),
+                         dict(boolean=["test201a", "test201b"], boolean_equal=True),
+                         dict(boolean=["test201a"], tclass=["infoflow7"], perms=["super_w"]),
+                         dict(boolean="test202(a|b)", boolean_regex=True,
+                              target="test202t2")):
+
+            q = TERuleQuery(self.p, **criteria)
+            scanned = q.plan(candidates=self.p.terules()).results()
+            self.assertListEqual(sorted(q.results()), sorted(scanned), criteria)
+
 
 class TERuleQueryXperm(mixins.ValidateRule, unittest.TestCase):
 
@@ -474,3 +543,23 @@ class TERuleQueryXperm(mixins.ValidateRule, unittest.TestCase):
         self.assertEqual(len(r), 1)
         self.validate_rule(r[0], TRT.allowxperm, "test101c", "test101c", "infoflow7",
                            set([0x9011, 0x9012, 0x9013]), xperm="ioctl")
+
+    def test_102_xperm_full_range(self):
+        """Xperm rule query match any perm of the full ioctl range."""
+        q = TERuleQuery(self.p, xperms=[(0x0000, 0xffff)], xperms_equal=False)
+        self.assertEqual(65536, len(q.xperms))
+        self.assertEqual(1, q.xperms.ranges())
+
+        xperm_rules = TERuleQuery(self.p, ruletype=["allowxperm", "auditallowxperm",
+                                                    "dontauditxperm"])
+
+        self.assertListEqual(sorted(xperm_rules.results()), sorted(q.results()))
+
+    def test_103_xperm_ranges(self):
+        """Xperm rule query range formatting of the matched perm set."""
+        q = TERuleQuery(self.p, source="test101d", xperms=[(0x9011, 0x9011)])
+
+        r = list(q.results())
+        self.assertEqual(len(r), 1)
+        self.assertEqual(1, r[0].perms.ranges())
+        self.assertEqual("0x9011-0x9014", str(r[0].perms))